@@ -8,6 +8,8 @@ from threading import RLock
 from typing import List
 from yacs.config import CfgNode as CN
 from digitalHuman.utils import logger
+from digitalHuman.protocol import ENGINE_TYPE, EngineDesc, ParamDesc
+from digitalHuman.core import parseParameters, engineDesc
 from .agentBase import BaseAgent
 from .core import AgentFactory
 
@@ -20,6 +22,11 @@ class AgentPool():
     def __init__(self):
         if not self._init:
             self._pool = dict()
+            # agent配置, 首次获取时创建实例
+            self._configs = dict()
+            self._lock = RLock()
+            # 配置版本, 每次setup递增, 用于失效接口缓存
+            self.revision = 0
             self._init = True
     
     # Single Instance
@@ -31,18 +38,53 @@ class AgentPool():
 
     def __del__(self):
         self._pool.clear()
+        self._configs.clear()
         self._init = False
     
+    def _release(self, name: str):
+        agent = self._pool.pop(name)
+        try:
+            agent.release()
+        except Exception as e:
+            logger.warning(f"[AgentPool] AGENT Engine {name} release failed: {e}")
+        logger.info(f"[AgentPool] AGENT Engine {name} is released.")
+
     def setup(self, config: CN):
-        for cfg in config.SUPPORT_LIST:
-            self._pool[cfg.NAME] = AgentFactory.create(cfg)
-            logger.info(f"[AgentPool] AGENT Engine {cfg.NAME} is created.")
+        configs = {cfg.NAME: cfg for cfg in config.SUPPORT_LIST}
+        # 配置变化的agent重新创建
+        for name in list(self._pool.keys()):
+            if configs.get(name) != self._configs.get(name):
+                self._release(name)
+        self._configs = configs
+        for name in configs:
+            logger.info(f"[AgentPool] AGENT Engine {name} is registered.")
         logger.info(f"[AgentPool] AGENT Engine default is {config.DEFAULT}.")
+        # 预热: 启动时创建的agent
+        for name in config.get("WARMUP", None) or []:
+            self.get(name)
+        self.revision += 1
             
+    def _config(self, name: str) -> CN:
+        if name not in self._configs:
+            raise KeyError(f"[AgentPool] No such engine: {name}")
+        return self._configs[name]
+
+    def getDesc(self, name: str) -> EngineDesc:
+        """由配置生成agent描述, 不创建agent实例"""
+        return engineDesc(self._config(name), ENGINE_TYPE.AGENT)
+
+    def getParameters(self, name: str) -> List[ParamDesc]:
+        return parseParameters(self._config(name))
+
     def get(self, name: str) -> BaseAgent:
-        if name not in self._pool:
-            raise KeyError(f"[AgentPool] No such engine: {name}") 
-        return self._pool[name]
+        agent = self._pool.get(name)
+        if agent is not None: return agent
+        cfg = self._config(name)
+        with self._lock:
+            if name not in self._pool:
+                self._pool[name] = AgentFactory.create(cfg)
+                logger.info(f"[AgentPool] AGENT Engine {name} is created.")
+            return self._pool[name]
 
     def list(self) -> List[str]:
-        return list(self._pool.keys())
\ No newline at end of file
+        return list(self._configs.keys())
\ No newline at end of file
@@ -4,11 +4,14 @@
 @Author  :   一力辉 
 '''
 
-from .difyAgent import DifyApiAgent
-from .repeaterAgent import RepeaterAgent
-from .fastgptAgent import FastgptApiAgent
-from .openaiAgent import OpenaiApiAgent
-from .cozeAgent import CozeApiAgent
+from ..builder import AGENTS
 from .agentFactory import AgentFactory
 
-__all__ = ['AgentFactory']
\ No newline at end of file
+# agent模块在首次创建时导入
+AGENTS.registerLazy("Dify", f"{__name__}.difyAgent")
+AGENTS.registerLazy("Repeater", f"{__name__}.repeaterAgent")
+AGENTS.registerLazy("FastGPT", f"{__name__}.fastgptAgent")
+AGENTS.registerLazy("OpenAI", f"{__name__}.openaiAgent")
+AGENTS.registerLazy("Coze", f"{__name__}.cozeAgent")
+
+__all__ = ['AgentFactory']
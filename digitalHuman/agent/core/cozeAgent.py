@@ -9,7 +9,7 @@ from ..agentBase import BaseAgent
 import re
 import json
 from digitalHuman.protocol import *
-from digitalHuman.utils import httpxAsyncClient, logger, resonableStreamingParser, checkResponse
+from digitalHuman.utils import getHttpClient, logger, resonableStreamingParser, checkResponse
 
 __all__ = ["CozeApiAgent"]
 
@@ -26,7 +26,7 @@ class CozeApiAgent(BaseAgent):
             'Content-Type': 'application/json'
         }
 
-        response = await httpxAsyncClient.post('https://api.coze.cn/v1/conversation/create', headers=headers)
+        response = await getHttpClient("coze").post('https://api.coze.cn/v1/conversation/create', headers=headers)
         result = checkResponse(response, "CozeApiAgent", "create conversation")
         return result['data']['id']
 
@@ -69,7 +69,7 @@ class CozeApiAgent(BaseAgent):
                 conversation_id = await self.createConversation(**kwargs)
                 yield eventStreamConversationId(conversation_id)
             
-            async with httpxAsyncClient.stream('POST', api_url, headers=headers, json=payload) as response:
+            async with getHttpClient("coze").stream('POST', api_url, headers=headers, json=payload) as response:
                 event = None
                 async for chunk in response.aiter_lines():
                     chunkStr = chunk.strip()
@@ -9,7 +9,7 @@ from ..agentBase import BaseAgent
 import re
 import json
 from digitalHuman.protocol import *
-from digitalHuman.utils import httpxAsyncClient, logger, resonableStreamingParser
+from digitalHuman.utils import getHttpClient, logger, resonableStreamingParser
 
 __all__ = ["DifyApiAgent"]
 
@@ -36,7 +36,7 @@ class DifyApiAgent(BaseAgent):
             "files":[]
         }
 
-        response = await httpxAsyncClient.post(api_server + "/chat-messages", headers=headers, json=payload)
+        response = await getHttpClient("dify").post(api_server + "/chat-messages", headers=headers, json=payload)
         if response.status_code != 200:
             raise RuntimeError(f"DifyAPI agent api error: {response.status_code}")
 
@@ -79,7 +79,7 @@ class DifyApiAgent(BaseAgent):
             }
 
             pattern = re.compile(r'data:\s*({.*})')
-            async with httpxAsyncClient.stream('POST', api_server + "/chat-messages", headers=headers, json=payload) as response:
+            async with getHttpClient("dify").stream('POST', api_server + "/chat-messages", headers=headers, json=payload) as response:
                 coversaiotnIdRequire = False if conversation_id else True
                 async def generator(coversaiotnIdRequire):
                     message_id = ""
@@ -102,7 +102,7 @@ class DifyApiAgent(BaseAgent):
                         if not message_id and 'message_id' in data:
                             message_id = data['message_id']
                         if "message" in data["event"] and 'answer' in data:
-                            logger.debug(f"[AGENT] Engine response: {data}")
+                            logger.debug(f"[AGENT] Engine response: {data}", extra={"sample": "agent_chunk"})
                             yield (EVENT_TYPE.TEXT, data['answer'])
                     yield (EVENT_TYPE.MESSAGE_ID, message_id)
                 async for parseResult in resonableStreamingParser(generator(coversaiotnIdRequire)):
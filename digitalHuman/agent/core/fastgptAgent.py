@@ -9,7 +9,7 @@ from ..agentBase import BaseAgent
 import re
 import json
 from digitalHuman.protocol import *
-from digitalHuman.utils import httpxAsyncClient, logger, resonableStreamingParser
+from digitalHuman.utils import getHttpClient, logger, resonableStreamingParser
 
 
 __all__ = ["FastgptApiAgent"]
@@ -55,7 +55,7 @@ class FastgptApiAgent(BaseAgent):
             if coversaiotnIdRequire:
                 conversation_id = await self.createConversation()
                 yield eventStreamConversationId(conversation_id)
-            async with httpxAsyncClient.stream('POST', base_url + "/v1/chat/completions", headers=headers, json=payload) as response:
+            async with getHttpClient("fastgpt").stream('POST', base_url + "/v1/chat/completions", headers=headers, json=payload) as response:
                 async def generator():
                     async for chunk in response.aiter_lines():
                         chunkStr = chunk.strip()
@@ -70,7 +70,7 @@ class FastgptApiAgent(BaseAgent):
                         data = json.loads(chunkData)
                         # 处理流式返回字符串
                         if len(data["choices"]) > 0:
-                            logger.debug(f"[AGENT] Engine response: {data}")
+                            logger.debug(f"[AGENT] Engine response: {data}", extra={"sample": "agent_chunk"})
                             content = data["choices"][0]['delta']['content']
                             if content:
                                 yield (EVENT_TYPE.TEXT, content)
@@ -6,14 +6,48 @@
 
 from ..builder import AGENTS
 from ..agentBase import BaseAgent
+import asyncio
+from typing import List
 from digitalHuman.protocol import *
 from digitalHuman.utils import logger, resonableStreamingParser
-from digitalHuman.core import OpenaiLLM
+from digitalHuman.core import OpenaiLLM, createHistoryStore
 
 __all__ = ["OpenaiApiAgent"]
 
+SUMMARY_PROMPT = "你是对话摘要助手。请将已有摘要和新增的对话内容合并为一段简洁的摘要，保留用户的关键信息、偏好和未完成的事项，只输出摘要内容。"
+
 @AGENTS.register("OpenAI")
 class OpenaiApiAgent(BaseAgent):
+    def setup(self):
+        historyCfg = self.cfg.get("HISTORY", None)
+        self._history = createHistoryStore(historyCfg)
+        self._summary = historyCfg.get("SUMMARY", False) if historyCfg else False
+        # 保持摘要任务引用, 防止被回收
+        self._summaryTasks = set()
+
+    def release(self):
+        if hasattr(self, "_history"):
+            self._history.close()
+
+    async def _compact(self, conversation_id: str, dropped: List[RoleMessage], base_url: str, api_key: str, model: str):
+        """将移出窗口的历史压缩进摘要"""
+        try:
+            summary, _ = await self._history.aget(conversation_id)
+            content = "\n".join(f"{message.role}: {message.content}" for message in dropped)
+            messages = [
+                RoleMessage(role=ROLE_TYPE.SYSTEM, content=SUMMARY_PROMPT),
+                RoleMessage(role=ROLE_TYPE.USER, content=f"已有摘要:\n{summary}\n\n新增对话:\n{content}")
+            ]
+            newSummary = ""
+            async for chunk in OpenaiLLM.chat(base_url=base_url, api_key=api_key, model=model, messages=messages):
+                if not chunk or len(chunk.choices) == 0: continue
+                if chunk.choices[0].delta.content:
+                    newSummary += chunk.choices[0].delta.content
+            if newSummary:
+                await self._history.asetSummary(conversation_id, newSummary.strip())
+        except Exception as e:
+            logger.warning(f"[OpenaiApiAgent] Compact history failed: {e}")
+
     async def run(
         self, 
         user: UserDesc,
@@ -40,7 +74,10 @@ class OpenaiApiAgent(BaseAgent):
                 thinkResponses = ""
                 responses = ""
                 currentMessage = [RoleMessage(role=ROLE_TYPE.USER, content=query)]
-                messages = currentMessage
+                summary, history = await self._history.aget(conversation_id)
+                messages = history + currentMessage
+                if summary:
+                    messages.insert(0, RoleMessage(role=ROLE_TYPE.SYSTEM, content=f"以下是之前对话的摘要:\n{summary}"))
                 async for chunk in OpenaiLLM.chat(
                     base_url=API_URL,
                     api_key=API_KEY,
@@ -59,9 +96,14 @@ class OpenaiApiAgent(BaseAgent):
                         responses += content
                         yield (EVENT_TYPE.TEXT, content)
                 currentMessage.append(RoleMessage(role=ROLE_TYPE.ASSISTANT, content=responses))
+                dropped = await self._history.aappend(conversation_id, currentMessage)
+                if dropped and self._summary:
+                    task = asyncio.create_task(self._compact(conversation_id, dropped, API_URL, API_KEY, API_MODEL))
+                    self._summaryTasks.add(task)
+                    task.add_done_callback(self._summaryTasks.discard)
             async for parseResult in resonableStreamingParser(generator(user.user_id, conversation_id, input.data)):
                 yield parseResult
             yield eventStreamDone()
         except Exception as e:
             logger.error(f"[OpenaiApiAgent] Exception: {e}", exc_info=True)
-            yield eventStreamError(str(e))
\ No newline at end of file
+            yield eventStreamError(str(e))
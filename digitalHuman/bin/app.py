@@ -5,16 +5,17 @@
 '''
 
 import uvicorn
-from digitalHuman.engine import EnginePool
-from digitalHuman.agent import AgentPool
 from digitalHuman.server import app
-from digitalHuman.utils import config
+from digitalHuman.utils import config, logger
 
 __all__ = ["runServer"]
 
 def runServer():
-    enginePool = EnginePool()
-    enginePool.setup(config.SERVER.ENGINES)
-    agentPool = AgentPool()
-    agentPool.setup(config.SERVER.AGENTS)
-    uvicorn.run(app, host=config.SERVER.IP, port=config.SERVER.PORT, log_level="info")
\ No newline at end of file
+    # 引擎池在app的lifespan中初始化, 每个worker进程各自创建
+    workers = config.SERVER.get("WORKERS", 1)
+    if workers > 1:
+        logger.info(f"[System] Run server with {workers} workers")
+        # 多进程需要以导入字符串的方式指定app
+        uvicorn.run("digitalHuman.server:app", host=config.SERVER.IP, port=config.SERVER.PORT, workers=workers, log_level="info")
+    else:
+        uvicorn.run(app, host=config.SERVER.IP, port=config.SERVER.PORT, log_level="info")
\ No newline at end of file
@@ -4,5 +4,7 @@
 @Author  :   一力辉
 '''
 
-from .runner import BaseRunner
-from .openai import OpenaiLLM
\ No newline at end of file
+from .runner import BaseRunner, parseParameters, engineDesc
+from .openai import OpenaiLLM
+from .history import *
+from .tencent import *
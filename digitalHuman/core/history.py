@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   history.py
+@Author  :   一力辉
+'''
+
+import os
+import re
+import time
+import asyncio
+import sqlite3
+from threading import RLock
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from typing import Any, Callable, List, Tuple, Optional
+from yacs.config import CfgNode as CN
+from digitalHuman.protocol import RoleMessage, ROLE_TYPE
+from digitalHuman.utils import config as globalConfig, logger
+from digitalHuman.utils.env import OUTPUT_PATH
+
+__all__ = ["estimateTokens", "MemoryHistoryStore", "SqliteHistoryStore", "createHistoryStore"]
+
+# 默认配置
+MAX_TOKENS = 2000
+MAX_MESSAGES = 64
+MAX_CONVERSATIONS = 10000
+IDLE_TIMEOUT = 3600
+SQLITE_BUSY_TIMEOUT = 10
+
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+def estimateTokens(text: str) -> int:
+    """粗略估算token数: 中日文按字计, 其余按4字符1个token计"""
+    if not text: return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4 + 1
+
+class _Conversation():
+    __slots__ = ("summary", "messages", "tokens", "lastActive")
+
+    def __init__(self, maxMessages: int):
+        self.summary = ""
+        # (message, tokens)
+        self.messages: deque[Tuple[RoleMessage, int]] = deque(maxlen=maxMessages)
+        self.tokens = 0
+        self.lastActive = time.time()
+
+class MemoryHistoryStore():
+    """
+    会话历史(内存)
+    每个会话保留token预算内的最近消息, 超出部分返回给调用方做摘要压缩
+    长时间不活跃的会话会被回收
+    """
+    def __init__(
+        self,
+        maxTokens: int = MAX_TOKENS,
+        maxMessages: int = MAX_MESSAGES,
+        maxConversations: int = MAX_CONVERSATIONS,
+        idleTimeout: float = IDLE_TIMEOUT
+    ):
+        self._maxTokens = maxTokens
+        self._maxMessages = maxMessages
+        self._maxConversations = maxConversations
+        self._idleTimeout = idleTimeout
+        # 按最近活跃排序
+        self._conversations: OrderedDict[str, _Conversation] = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def _touch(self, conversation_id: str, create: bool = True) -> Optional[_Conversation]:
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = self._load(conversation_id)
+            if conversation is None:
+                if not create: return None
+                conversation = _Conversation(self._maxMessages)
+            self._conversations[conversation_id] = conversation
+        conversation.lastActive = time.time()
+        self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def _load(self, conversation_id: str) -> Optional[_Conversation]:
+        return None
+
+    def _evict(self):
+        now = time.time()
+        while self._conversations:
+            conversation = next(iter(self._conversations.values()))
+            if len(self._conversations) <= self._maxConversations and now - conversation.lastActive <= self._idleTimeout:
+                break
+            self._conversations.popitem(last=False)
+
+    def get(self, conversation_id: str) -> Tuple[str, List[RoleMessage]]:
+        """返回(摘要, 历史消息)"""
+        with self._lock:
+            conversation = self._touch(conversation_id, create=False)
+            if conversation is None: return "", []
+            return conversation.summary, [message for message, _ in conversation.messages]
+
+    def append(self, conversation_id: str, messages: List[RoleMessage]) -> List[RoleMessage]:
+        """追加消息, 返回因超出预算被移出窗口的消息"""
+        with self._lock:
+            conversation = self._touch(conversation_id)
+            dropped = []
+            for message in messages:
+                if len(conversation.messages) == conversation.messages.maxlen:
+                    droppedMessage, tokens = conversation.messages.popleft()
+                    conversation.tokens -= tokens
+                    dropped.append(droppedMessage)
+                tokens = estimateTokens(message.content)
+                conversation.messages.append((message, tokens))
+                conversation.tokens += tokens
+            # 超出预算从最早的消息开始移除, 至少保留最近一轮
+            while len(conversation.messages) > 2 and conversation.tokens > self._maxTokens:
+                droppedMessage, tokens = conversation.messages.popleft()
+                conversation.tokens -= tokens
+                dropped.append(droppedMessage)
+            # 保证窗口以用户消息开头
+            while conversation.messages and conversation.messages[0][0].role != ROLE_TYPE.USER:
+                droppedMessage, tokens = conversation.messages.popleft()
+                conversation.tokens -= tokens
+                dropped.append(droppedMessage)
+            self._onAppend(conversation_id, conversation, messages, len(dropped))
+            self._evict()
+            return dropped
+
+    def _onAppend(self, conversation_id: str, conversation: _Conversation, messages: List[RoleMessage], dropped: int):
+        pass
+
+    def setSummary(self, conversation_id: str, summary: str):
+        with self._lock:
+            conversation = self._touch(conversation_id)
+            conversation.summary = summary
+            self._onSummary(conversation_id, summary)
+
+    def _onSummary(self, conversation_id: str, summary: str):
+        pass
+
+    async def _call(self, func: Callable, *args) -> Any:
+        # 内存后端直接执行
+        return func(*args)
+
+    async def aget(self, conversation_id: str) -> Tuple[str, List[RoleMessage]]:
+        return await self._call(self.get, conversation_id)
+
+    async def aappend(self, conversation_id: str, messages: List[RoleMessage]) -> List[RoleMessage]:
+        return await self._call(self.append, conversation_id, messages)
+
+    async def asetSummary(self, conversation_id: str, summary: str):
+        return await self._call(self.setSummary, conversation_id, summary)
+
+    def close(self):
+        with self._lock:
+            self._conversations.clear()
+
+class SqliteHistoryStore(MemoryHistoryStore):
+    """
+    会话历史(sqlite)
+    内存作为缓存, 数据写穿到sqlite, 重启或被回收后可恢复
+    shared为True时每次访问都从sqlite读取, 用于多个worker进程共享会话
+    """
+    def __init__(self, path: str, shared: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self._shared = shared
+        # sqlite读写在专用线程中执行, 不阻塞事件循环
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+        # 多进程并发读写
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                conversation_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL DEFAULT '',
+                last_active REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id, id);
+        """)
+        # 清理超时会话
+        expired = time.time() - self._idleTimeout
+        self._db.execute("DELETE FROM messages WHERE conversation_id IN (SELECT conversation_id FROM conversations WHERE last_active < ?)", (expired,))
+        self._db.execute("DELETE FROM conversations WHERE last_active < ?", (expired,))
+        self._db.commit()
+
+    def _touch(self, conversation_id: str, create: bool = True) -> Optional[_Conversation]:
+        # 其它进程可能已更新, 丢弃本地缓存
+        if self._shared: self._conversations.pop(conversation_id, None)
+        return super()._touch(conversation_id, create)
+
+    def _load(self, conversation_id: str) -> Optional[_Conversation]:
+        row = self._db.execute("SELECT summary, last_active FROM conversations WHERE conversation_id = ?", (conversation_id,)).fetchone()
+        if row is None or time.time() - row[1] > self._idleTimeout: return None
+        conversation = _Conversation(self._maxMessages)
+        conversation.summary = row[0]
+        rows = self._db.execute(
+            "SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY id DESC LIMIT ?",
+            (conversation_id, self._maxMessages)
+        ).fetchall()
+        for role, content in reversed(rows):
+            tokens = estimateTokens(content)
+            conversation.messages.append((RoleMessage(role=role, content=content), tokens))
+            conversation.tokens += tokens
+        return conversation
+
+    def _saveConversation(self, conversation_id: str, conversation: _Conversation):
+        self._db.execute(
+            "INSERT INTO conversations (conversation_id, summary, last_active) VALUES (?, ?, ?) "
+            "ON CONFLICT(conversation_id) DO UPDATE SET summary = excluded.summary, last_active = excluded.last_active",
+            (conversation_id, conversation.summary, conversation.lastActive)
+        )
+
+    def _onAppend(self, conversation_id: str, conversation: _Conversation, messages: List[RoleMessage], dropped: int):
+        self._saveConversation(conversation_id, conversation)
+        self._db.executemany(
+            "INSERT INTO messages (conversation_id, role, content) VALUES (?, ?, ?)",
+            [(conversation_id, str(message.role), message.content) for message in messages]
+        )
+        if dropped:
+            # 只保留窗口内的消息
+            self._db.execute(
+                "DELETE FROM messages WHERE conversation_id = ? AND id NOT IN "
+                "(SELECT id FROM messages WHERE conversation_id = ? ORDER BY id DESC LIMIT ?)",
+                (conversation_id, conversation_id, len(conversation.messages))
+            )
+        self._db.commit()
+
+    def _onSummary(self, conversation_id: str, summary: str):
+        self._saveConversation(conversation_id, self._conversations[conversation_id])
+        self._db.commit()
+
+    async def _call(self, func: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        super().close()
+        with self._lock:
+            self._db.close()
+
+def createHistoryStore(config: Optional[CN]) -> MemoryHistoryStore:
+    config = config or CN()
+    kwargs = dict(
+        maxTokens=config.get("MAX_TOKENS", MAX_TOKENS),
+        maxMessages=config.get("MAX_MESSAGES", MAX_MESSAGES),
+        maxConversations=config.get("MAX_CONVERSATIONS", MAX_CONVERSATIONS),
+        idleTimeout=config.get("IDLE_TIMEOUT", IDLE_TIMEOUT)
+    )
+    backend = config.get("BACKEND", "memory")
+    multiWorker = globalConfig.SERVER.get("WORKERS", 1) > 1
+    if backend == "sqlite":
+        path = config.get("SQLITE_PATH", "") or os.path.join(OUTPUT_PATH, "history.db")
+        logger.info(f"[History] Use sqlite history store: {path}")
+        return SqliteHistoryStore(path, shared=multiWorker, **kwargs)
+    if backend != "memory":
+        raise RuntimeError(f"[History] Unsupported history backend: {backend}")
+    if multiWorker:
+        logger.warning(f"[History] Memory history store is not shared between workers, use sqlite backend instead.")
+    return MemoryHistoryStore(**kwargs)
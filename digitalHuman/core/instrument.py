@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   instrument.py
+@Author  :   一力辉
+'''
+
+import time
+import inspect
+from contextlib import aclosing
+from functools import wraps
+from typing import Any, Callable
+from digitalHuman.protocol import BaseMessage, EVENT_TYPE
+from digitalHuman.utils.metrics import Counter, Histogram
+
+__all__ = ["instrument"]
+
+# agent流式输出中的错误事件前缀, 见protocol.eventStreamError
+ERROR_EVENT_PREFIX = f"event: {EVENT_TYPE.ERROR}\n"
+
+REQUESTS = Counter("adh_runner_requests_total", "Total calls of engine/agent methods")
+ERRORS = Counter("adh_runner_errors_total", "Total failed calls of engine/agent methods")
+LATENCY = Histogram("adh_runner_latency_seconds", "Latency of engine/agent methods in seconds")
+FIRST_CHUNK = Histogram("adh_runner_first_chunk_seconds", "Time to first chunk of streaming engine/agent methods in seconds")
+INPUT_BYTES = Counter("adh_runner_input_bytes_total", "Total input bytes of engine/agent methods")
+OUTPUT_BYTES = Counter("adh_runner_output_bytes_total", "Total output bytes of engine/agent methods")
+
+def _size(data: Any) -> int:
+    if data is None: return 0
+    if isinstance(data, (bytes, bytearray, memoryview)): return len(data)
+    if isinstance(data, str): return len(data.encode("utf-8"))
+    if isinstance(data, BaseMessage): return _size(getattr(data, "data", None))
+    return 0
+
+def _input(args: tuple, kwargs: dict) -> Any:
+    """调用方通常以关键字传入input"""
+    return kwargs.get("input", args[0] if args else None)
+
+def _labels(runner, method: str) -> dict:
+    return {"type": str(runner.type), "name": runner.name, "method": method}
+
+def _isErrorEvent(chunk: Any) -> bool:
+    return isinstance(chunk, str) and chunk.startswith(ERROR_EVENT_PREFIX)
+
+def instrument(method: str, func: Callable) -> Callable:
+    """
+    统计调用次数、错误数、耗时及输入输出字节数
+    异步生成器额外统计首块耗时, agent输出的错误事件计为错误
+    """
+    if getattr(func, "__instrumented__", False): return func
+
+    if inspect.isasyncgenfunction(func):
+        @wraps(func)
+        async def generatorWrapper(self, *args, **kwargs):
+            labels = _labels(self, method)
+            REQUESTS.inc(**labels)
+            INPUT_BYTES.inc(_size(_input(args, kwargs)), **labels)
+            start = time.perf_counter()
+            first = True
+            failed = False
+            try:
+                # 调用方提前关闭时同时关闭被包装的生成器
+                async with aclosing(func(self, *args, **kwargs)) as stream:
+                    async for chunk in stream:
+                        if first:
+                            FIRST_CHUNK.observe(time.perf_counter() - start, **labels)
+                            first = False
+                        if _isErrorEvent(chunk): failed = True
+                        OUTPUT_BYTES.inc(_size(chunk), **labels)
+                        yield chunk
+            except Exception:
+                failed = True
+                raise
+            finally:
+                if failed: ERRORS.inc(**labels)
+                LATENCY.observe(time.perf_counter() - start, **labels)
+        wrapper = generatorWrapper
+    elif inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def coroutineWrapper(self, *args, **kwargs):
+            labels = _labels(self, method)
+            REQUESTS.inc(**labels)
+            INPUT_BYTES.inc(_size(_input(args, kwargs)), **labels)
+            start = time.perf_counter()
+            try:
+                output = await func(self, *args, **kwargs)
+            except Exception:
+                ERRORS.inc(**labels)
+                raise
+            finally:
+                LATENCY.observe(time.perf_counter() - start, **labels)
+            OUTPUT_BYTES.inc(_size(output), **labels)
+            return output
+        wrapper = coroutineWrapper
+    else:
+        return func
+    wrapper.__instrumented__ = True
+    return wrapper
@@ -4,10 +4,87 @@
 @Author  :   一力辉
 '''
 
+import time
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionChunk
-from typing import List, AsyncGenerator
+from typing import List, AsyncGenerator, Tuple
 from digitalHuman.protocol import RoleMessage
+from digitalHuman.utils import logger, markUpstream
+
+# 客户端池上限及空闲回收时间(秒)
+CLIENT_POOL_MAX_SIZE = 32
+CLIENT_IDLE_TIMEOUT = 300
+
+@dataclass
+class _ClientEntry:
+    client: AsyncOpenAI
+    lastUsed: float
+    active: int = 0
+
+class OpenaiClientPool():
+    """
+    按(base_url, api_key)复用AsyncOpenAI客户端, 保持长连接
+    超出上限或空闲超时的客户端在无请求使用时关闭
+    """
+    def __init__(self, maxSize: int = CLIENT_POOL_MAX_SIZE, idleTimeout: float = CLIENT_IDLE_TIMEOUT):
+        self._maxSize = maxSize
+        self._idleTimeout = idleTimeout
+        self._clients: OrderedDict[Tuple[str, str], _ClientEntry] = OrderedDict()
+
+    @staticmethod
+    def _key(base_url: str, api_key: str) -> Tuple[str, str]:
+        return (base_url, hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @asynccontextmanager
+    async def acquire(self, base_url: str, api_key: str) -> AsyncGenerator[AsyncOpenAI, None]:
+        key = self._key(base_url, api_key)
+        entry = self._clients.get(key)
+        if entry is None:
+            entry = _ClientEntry(client=AsyncOpenAI(base_url=base_url, api_key=api_key), lastUsed=time.monotonic())
+            self._clients[key] = entry
+        self._clients.move_to_end(key)
+        entry.active += 1
+        try:
+            yield entry.client
+        finally:
+            entry.active -= 1
+            entry.lastUsed = time.monotonic()
+            await self._evict()
+
+    async def _evict(self):
+        now = time.monotonic()
+        expired = []
+        overflow = len(self._clients) - self._maxSize
+        # OrderedDict按最近使用排序, 从最久未使用的开始回收
+        for key, entry in list(self._clients.items()):
+            if entry.active > 0: continue
+            if overflow > 0 or now - entry.lastUsed > self._idleTimeout:
+                expired.append(self._clients.pop(key))
+                overflow -= 1
+        for entry in expired:
+            await self._closeClient(entry.client)
+
+    @staticmethod
+    async def _closeClient(client: AsyncOpenAI):
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"[OpenaiClientPool] Close client failed: {e}")
+
+    async def close(self):
+        entries = list(self._clients.values())
+        self._clients.clear()
+        for entry in entries:
+            await self._closeClient(entry.client)
+
+_clientPool = OpenaiClientPool()
 
 class OpenaiLLM():
     @staticmethod
@@ -18,15 +95,18 @@ class OpenaiLLM():
         messages: List[RoleMessage],
         **kwargs
     ) -> AsyncGenerator[ChatCompletionChunk, None]:
-        client = AsyncOpenAI(
-            base_url=base_url,
-            api_key=api_key
-        )
-        completions = await client.chat.completions.create(
-            model=model,
-            messages=[message.model_dump() for message in messages],
-            stream=True,
-            **kwargs
-        )
-        async for chunk in completions:
-            yield chunk
\ No newline at end of file
+        async with _clientPool.acquire(base_url, api_key) as client:
+            completions = await client.chat.completions.create(
+                model=model,
+                messages=[message.model_dump() for message in messages],
+                stream=True,
+                **kwargs
+            )
+            # 流式请求在收到响应头后返回, AsyncOpenAI不经过共享http客户端, 在此记录上游建连耗时
+            markUpstream()
+            async for chunk in completions:
+                yield chunk
+
+    @staticmethod
+    async def close():
+        await _clientPool.close()
@@ -4,21 +4,108 @@
 @Author  :   一力辉
 '''
 
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional
 from yacs.config import CfgNode as CN
 from abc import ABC, abstractmethod
-from digitalHuman.protocol import BaseMessage, ParamDesc, EngineDesc, ENGINE_TYPE, INFER_TYPE
+from digitalHuman.protocol import BaseMessage, ParamDesc, EngineDesc, ENGINE_TYPE, INFER_TYPE, PARAM_TYPE
+from .instrument import instrument
 
-__all__ = ["BaseRunner"]
+__all__ = ["BaseRunner", "parseParameters", "engineDesc"]
+
+# 需要统计指标的方法
+INSTRUMENTED_METHODS = ("run", "stream")
+# 选项由引擎接口动态获取的参数, 不校验choices
+DYNAMIC_CHOICE_PARAMS = ("voice",)
+
+def _toBool(value: Any) -> bool:
+    if isinstance(value, str):
+        if value.lower() in ("true", "1", "yes", "on"): return True
+        if value.lower() in ("false", "0", "no", "off", ""): return False
+        raise ValueError(value)
+    return bool(value)
+
+def _toInt(value: Any) -> int:
+    if isinstance(value, float) and not value.is_integer(): raise ValueError(value)
+    return int(float(value)) if isinstance(value, str) else int(value)
+
+_COERCE: Dict[PARAM_TYPE, Callable[[Any], Any]] = {
+    PARAM_TYPE.STRING: str,
+    PARAM_TYPE.INT: _toInt,
+    PARAM_TYPE.FLOAT: float,
+    PARAM_TYPE.BOOL: _toBool,
+}
+
+class _ParamSchema():
+    """单个参数的校验规则, 由ParamDesc预先生成"""
+    __slots__ = ("name", "required", "default", "coerce", "minimum", "maximum", "choices")
+
+    def __init__(self, param: ParamDesc):
+        self.name = param.name
+        self.required = param.required
+        self.default = param.default
+        self.coerce = _COERCE[param.type]
+        self.minimum, self.maximum = None, None
+        if param.type in (PARAM_TYPE.INT, PARAM_TYPE.FLOAT) and len(param.range) == 2:
+            self.minimum, self.maximum = float(param.range[0]), float(param.range[1])
+        self.choices: Optional[frozenset] = None
+        if param.choices and param.name not in DYNAMIC_CHOICE_PARAMS:
+            self.choices = frozenset(self.coerce(choice) for choice in param.choices)
+
+    def check(self, value: Any) -> Any:
+        try:
+            value = self.coerce(value)
+        except (TypeError, ValueError):
+            raise RuntimeError(f"Invalid parameter: {self.name}={value!r}")
+        if self.minimum is not None and not (self.minimum <= value <= self.maximum):
+            raise RuntimeError(f"Parameter out of range: {self.name}={value}, range [{self.minimum:g}, {self.maximum:g}]")
+        if self.choices is not None and value not in self.choices:
+            raise RuntimeError(f"Invalid parameter choice: {self.name}={value!r}")
+        return value
+
+def parseParameters(config: CN) -> List[ParamDesc]:
+    if "PARAMETERS" not in config: return []
+    return [ParamDesc.model_validate(param) for param in config.PARAMETERS]
+
+def parseInferType(meta: Dict) -> INFER_TYPE:
+    if "infer_type" not in meta: return INFER_TYPE.NORMAL
+    if meta['infer_type'] == 'stream': return INFER_TYPE.STREAM
+    raise RuntimeError(f"Invalid infer type: {meta['infer_type']}")
+
+def engineDesc(config: CN, type: ENGINE_TYPE) -> EngineDesc:
+    """引擎描述只依赖配置, 无需创建实例"""
+    meta = config.META if "META" in config else {}
+    return EngineDesc(
+        name=config.NAME,
+        type=type,
+        infer_type=parseInferType(meta),
+        desc=config.DESC if "DESC" in config else "",
+        meta=meta
+    )
 
 class BaseRunner(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 子类实现的run/stream自动包装指标统计
+        for method in INSTRUMENTED_METHODS:
+            func = cls.__dict__.get(method)
+            if func is None or getattr(func, "__isabstractmethod__", False): continue
+            setattr(cls, method, instrument(method, func))
+
     def __init__(self, config: CN, type: ENGINE_TYPE):
         self.cfg = config
         self._engineType = type
+        self._compileParameters()
+        self._desc: Optional[EngineDesc] = None
+        self._inferType: Optional[INFER_TYPE] = None
         self.setup()
     
     def __del__(self):
         self.release()
+
+    def _compileParameters(self):
+        """参数描述只解析一次, 请求时按预生成的规则校验"""
+        self._parameters: List[ParamDesc] = parseParameters(self.cfg)
+        self._paramSchemas: List[_ParamSchema] = [_ParamSchema(param) for param in self._parameters]
     
     @property
     def name(self) -> str:
@@ -30,20 +117,14 @@ class BaseRunner(ABC):
     
     @property
     def inferType(self) -> INFER_TYPE:
-        if "infer_type" not in self.meta(): return INFER_TYPE.NORMAL
-        if self.meta()['infer_type'] == 'stream': 
-            return INFER_TYPE.STREAM
-        else:
-            raise RuntimeError(f"Invalid infer type: {self.meta()['infer_type']}")
+        if self._inferType is None:
+            self._inferType = parseInferType(self.meta())
+        return self._inferType
     
     def desc(self) -> EngineDesc:
-        return EngineDesc(
-            name=self.name,
-            type=self.type,
-            infer_type=self.inferType,
-            desc=self.cfg.DESC if "DESC" in self.cfg else "",
-            meta=self.meta()
-        )
+        if self._desc is None:
+            self._desc = engineDesc(self.cfg, self.type)
+        return self._desc
     
     def meta(self) -> Dict:
         if "META" not in self.cfg: return {}
@@ -54,21 +135,22 @@ class BaseRunner(ABC):
         return self.cfg.CUSTOM
 
     def parameters(self) -> List[ParamDesc]:
-        if "PARAMETERS" not in self.cfg: return []
-        params = []
-        for param in self.cfg.PARAMETERS:
-            params.append(ParamDesc.model_validate(param))
-        return params
+        return list(self._parameters)
     
     def checkParameter(self, **kwargs) -> Dict:
+        """
+        填充默认值并按参数类型转换, 校验range及choices
+        未声明的参数原样透传
+        """
         paramters = {}
-        for paramter in self.parameters():
-            if paramter.name not in kwargs:
-                if not paramter.required: 
-                    paramters[paramter.name] = paramter.default
+        for schema in self._paramSchemas:
+            value = kwargs.get(schema.name)
+            if value is None:
+                if not schema.required: 
+                    paramters[schema.name] = schema.default
                     continue
-                raise RuntimeError(f"Missing parameter: {paramter.name}")
-            paramters[paramter.name] = kwargs[paramter.name]
+                raise RuntimeError(f"Missing parameter: {schema.name}")
+            paramters[schema.name] = schema.check(value)
         # 额外参数填充
         for k, v in kwargs.items():
             if k not in paramters:
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   tencent.py
+@Author  :   一力辉
+'''
+
+# 签名方法参考: https://cloud.tencent.com/document/api/1073/37995
+
+import hmac
+import time
+import hashlib
+from functools import lru_cache
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+__all__ = ["TencentCloudApiKey", "TencentCloudSigner"]
+
+ALGORITHM = "TC3-HMAC-SHA256"
+CONTENT_TYPE = "application/json; charset=utf-8"
+SIGNED_HEADERS = "content-type;host;x-tc-action"
+
+class TencentCloudApiKey(BaseModel):
+    secret_id: str
+    secret_key: str
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+@lru_cache(maxsize=4)
+def _utcDate(day: int) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+
+@lru_cache(maxsize=256)
+def _signingKey(secret_id: str, secret_key: str, date: str, service: str) -> bytes:
+    """派生签名密钥, 同一密钥每天每个服务只计算一次"""
+    secret_date = _hmac(("TC3" + secret_key).encode("utf-8"), date)
+    secret_service = _hmac(secret_date, service)
+    return _hmac(secret_service, "tc3_request")
+
+class TencentCloudSigner():
+    """
+    腾讯云API TC3-HMAC-SHA256签名
+    规范请求串及请求头中的固定部分在初始化时生成
+    """
+    def __init__(self, service: str, host: str, version: str):
+        self._service = service
+        self._host = host
+        self._version = version
+        # action -> 规范请求串前缀
+        self._canonicalPrefix: Dict[str, str] = {}
+
+    def _canonicalRequestPrefix(self, action: str) -> str:
+        prefix = self._canonicalPrefix.get(action)
+        if prefix is None:
+            prefix = (
+                "POST\n/\n\n"
+                f"content-type:{CONTENT_TYPE}\nhost:{self._host}\nx-tc-action:{action.lower()}\n\n"
+                f"{SIGNED_HEADERS}\n"
+            )
+            self._canonicalPrefix[action] = prefix
+        return prefix
+
+    def sign(self, action: str, payload: str, apiKey: TencentCloudApiKey, timestamp: Optional[int] = None) -> Dict[str, str]:
+        """返回带签名的请求头"""
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        date = _utcDate(timestamp // 86400)
+        # ************* 步骤 1：拼接规范请求串 *************
+        canonical_request = self._canonicalRequestPrefix(action) + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        # ************* 步骤 2：拼接待签名字符串 *************
+        credential_scope = f"{date}/{self._service}/tc3_request"
+        string_to_sign = f"{ALGORITHM}\n{timestamp}\n{credential_scope}\n{hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()}"
+        # ************* 步骤 3：计算签名 *************
+        secret_signing = _signingKey(apiKey.secret_id, apiKey.secret_key, date, self._service)
+        signature = hmac.new(secret_signing, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        # ************* 步骤 4：拼接请求头 *************
+        return {
+            "Authorization": f"{ALGORITHM} Credential={apiKey.secret_id}/{credential_scope}, SignedHeaders={SIGNED_HEADERS}, Signature={signature}",
+            "Content-Type": CONTENT_TYPE,
+            "Host": self._host,
+            "X-TC-Action": action,
+            "X-TC-Timestamp": str(timestamp),
+            "X-TC-Version": self._version
+        }
@@ -5,4 +5,6 @@
 '''
 
 from .enginePool import EnginePool
-from .engineBase import BaseEngine, BaseTTSEngine
\ No newline at end of file
+from .engineBase import BaseEngine, BaseTTSEngine
+from .voiceCatalog import VoiceCatalog, VoiceInfo
+from .tts import TTSCache
\ No newline at end of file
@@ -4,10 +4,13 @@
 @Author  :   一力辉 
 '''
 
-from .tencentASR import TencentApiAsr
-from .difyASR import DifyApiAsr
-from .cozeASR import CozeApiAsr
-from .funasrStreamingASR import FunasrStreamingAsr
+from ..builder import ASREngines
 from .asrFactory import ASRFactory
 
-__all__ = ['ASRFactory']
\ No newline at end of file
+# 引擎模块在首次创建时导入
+ASREngines.registerLazy("Tencent-API", f"{__name__}.tencentASR")
+ASREngines.registerLazy("Dify", f"{__name__}.difyASR")
+ASREngines.registerLazy("Coze", f"{__name__}.cozeASR")
+ASREngines.registerLazy("funasrStreaming", f"{__name__}.funasrStreamingASR")
+
+__all__ = ['ASRFactory']
@@ -7,9 +7,9 @@
 
 from ..builder import ASREngines
 from ..engineBase import BaseASREngine
-import io, base64
+import io
 from digitalHuman.protocol import AudioMessage, TextMessage, AUDIO_TYPE
-from digitalHuman.utils import logger, httpxAsyncClient, wavToMp3, checkResponse
+from digitalHuman.utils import logger, getHttpClient, wavToMp3Async, checkResponse
 
 __all__ = ["CozeApiAsr"]
 
@@ -28,17 +28,15 @@ class CozeApiAsr(BaseASREngine):
             'Authorization': f'Bearer {API_TOKEN}'
         }
 
+        if input.type == AUDIO_TYPE.WAV:
+            input.data = await wavToMp3Async(input.data)
+            input.type = AUDIO_TYPE.MP3
+
         files = {
             'file': ('adh.mp3', input.data)
         }
 
-        if isinstance(input.data, str):
-            input.data = base64.b64decode(input.data)
-        if input.type == AUDIO_TYPE.WAV:
-            input.data = wavToMp3(input.data)
-            input.type = AUDIO_TYPE.MP3
-
-        response = await httpxAsyncClient.post(self.url, headers=headers, files=files)
+        response = await getHttpClient("coze").post(self.url, headers=headers, files=files)
         resp = checkResponse(response, "CozeApiAsr")
         result = resp["data"]["text"]
         logger.debug(f"[ASR] Engine response: {result}")
@@ -7,9 +7,9 @@
 
 from ..builder import ASREngines
 from ..engineBase import BaseASREngine
-import io, base64
+import io
 from digitalHuman.protocol import AudioMessage, TextMessage, AUDIO_TYPE
-from digitalHuman.utils import logger, httpxAsyncClient, wavToMp3
+from digitalHuman.utils import logger, getHttpClient, wavToMp3Async
 
 __all__ = ["DifyApiAsr"]
 
@@ -31,13 +31,11 @@ class DifyApiAsr(BaseASREngine):
             'user': API_USERNAME
         }
 
-        if isinstance(input.data, str):
-            input.data = base64.b64decode(input.data)
         if input.type == AUDIO_TYPE.WAV:
-            input.data = wavToMp3(input.data)
+            input.data = await wavToMp3Async(input.data)
             input.type = AUDIO_TYPE.MP3
         files = {'file': ('file', io.BytesIO(input.data), 'audio/mp3')}
-        response = await httpxAsyncClient.post(API_SERVER + "/audio-to-text", headers=headers, files=files, data=payload)
+        response = await getHttpClient("dify").post(API_SERVER + "/audio-to-text", headers=headers, files=files, data=payload)
         if response.status_code != 200:
             raise RuntimeError(f"Dify asr api error: {response.status_code}")
         result = response.json()["text"]
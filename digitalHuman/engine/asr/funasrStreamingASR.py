@@ -1,6 +1,11 @@
 import json
+import time
 import asyncio
 import websockets
+from collections import deque
+from typing import Dict, Deque, Set, Tuple
+from yacs.config import CfgNode as CN
+from websockets.protocol import State
 from fastapi import WebSocket, WebSocketDisconnect
 from digitalHuman.utils import logger
 from digitalHuman.engine.builder import ASREngines
@@ -9,9 +14,156 @@ from digitalHuman.engine.engineBase import StreamBaseEngine
 
 __all__ = ["FunasrStreamingAsr"]
 
+# 连接池默认配置
+POOL_MIN_IDLE = 1
+POOL_MAX_IDLE = 8
+POOL_IDLE_TIMEOUT = 60
+# 空闲超过该时间的连接取用前做ping检查
+POOL_HEALTH_CHECK_INTERVAL = 10
+POOL_PING_TIMEOUT = 1
+# 回收时等待funasr残留结果的静默时间及最长时间
+POOL_DRAIN_QUIET = 0.5
+POOL_DRAIN_TIMEOUT = 10
+
+
+class FunasrConnectionPool():
+    """
+    funasr websocket连接池
+    按api_url保持预先建立的连接, 会话结束后重置状态放回池中
+    """
+    def __init__(
+        self,
+        minIdle: int = POOL_MIN_IDLE,
+        maxIdle: int = POOL_MAX_IDLE,
+        idleTimeout: float = POOL_IDLE_TIMEOUT
+    ):
+        self._minIdle = minIdle
+        self._maxIdle = maxIdle
+        self._idleTimeout = idleTimeout
+        # api_url -> (连接, 放回时间)
+        self._idle: Dict[str, Deque[Tuple[websockets.ClientConnection, float]]] = {}
+        # 正在建立的连接数
+        self._connecting: Dict[str, int] = {}
+        # 保持后台任务引用, 防止被回收
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    async def _connect(api_url: str) -> websockets.ClientConnection:
+        return await websockets.connect(api_url, subprotocols=["binary"], ping_interval=None)
+
+    @staticmethod
+    async def _close(connection: websockets.ClientConnection):
+        try:
+            await connection.close()
+        except Exception as e:
+            logger.debug(f"[FunasrConnectionPool] Close connection failed: {e}")
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def idleSize(self, api_url: str) -> int:
+        return len(self._idle.get(api_url, ()))
+
+    async def _healthy(self, connection: websockets.ClientConnection, idleTime: float) -> bool:
+        if connection.state is not State.OPEN: return False
+        if idleTime < POOL_HEALTH_CHECK_INTERVAL: return True
+        try:
+            pong = await connection.ping()
+            await asyncio.wait_for(pong, timeout=POOL_PING_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    async def acquire(self, api_url: str) -> websockets.ClientConnection:
+        idle = self._idle.setdefault(api_url, deque())
+        connection = None
+        while idle:
+            candidate, releasedAt = idle.pop()
+            idleTime = time.monotonic() - releasedAt
+            if idleTime <= self._idleTimeout and await self._healthy(candidate, idleTime):
+                connection = candidate
+                break
+            self._spawn(self._close(candidate))
+        if connection is None:
+            connection = await self._connect(api_url)
+        self._fill(api_url)
+        return connection
+
+    def _fill(self, api_url: str):
+        """后台补充空闲连接至最小数量"""
+        missing = self._minIdle - self.idleSize(api_url) - self._connecting.get(api_url, 0)
+        for _ in range(missing):
+            self._connecting[api_url] = self._connecting.get(api_url, 0) + 1
+            self._spawn(self._warm(api_url))
+
+    async def _warm(self, api_url: str):
+        try:
+            connection = await self._connect(api_url)
+            self._put(api_url, connection)
+        except Exception as e:
+            logger.warning(f"[FunasrConnectionPool] Connect {api_url} failed: {e}")
+        finally:
+            self._connecting[api_url] -= 1
+
+    def _put(self, api_url: str, connection: websockets.ClientConnection):
+        idle = self._idle.setdefault(api_url, deque())
+        if connection.state is not State.OPEN or len(idle) >= self._maxIdle:
+            self._spawn(self._close(connection))
+            return
+        idle.append((connection, time.monotonic()))
+
+    def release(self, api_url: str, connection: websockets.ClientConnection, reusable: bool):
+        """归还连接, 不可复用的连接直接关闭"""
+        if reusable and connection.state is State.OPEN:
+            self._spawn(self._recycle(api_url, connection))
+        else:
+            self._spawn(self._close(connection))
+
+    async def _recycle(self, api_url: str, connection: websockets.ClientConnection):
+        """结束当前句子并丢弃残留结果, 避免串到下一个会话"""
+        try:
+            await connection.send(json.dumps({"is_speaking": False}))
+            deadline = time.monotonic() + POOL_DRAIN_TIMEOUT
+            while True:
+                if time.monotonic() > deadline:
+                    raise TimeoutError("drain timeout")
+                try:
+                    await asyncio.wait_for(connection.recv(), timeout=POOL_DRAIN_QUIET)
+                except asyncio.TimeoutError:
+                    break
+            self._put(api_url, connection)
+        except Exception as e:
+            logger.debug(f"[FunasrConnectionPool] Recycle connection failed: {e}")
+            await self._close(connection)
+
+    async def close(self):
+        connections = [connection for idle in self._idle.values() for connection, _ in idle]
+        self._idle.clear()
+        for connection in connections:
+            await self._close(connection)
+
 
 @ASREngines.register("funasrStreaming")
 class FunasrStreamingAsr(StreamBaseEngine):
+    def setup(self):
+        poolCfg = self.cfg.get("POOL", None) or CN()
+        self._pool = FunasrConnectionPool(
+            minIdle=poolCfg.get("MIN_IDLE", POOL_MIN_IDLE),
+            maxIdle=poolCfg.get("MAX_IDLE", POOL_MAX_IDLE),
+            idleTimeout=poolCfg.get("IDLE_TIMEOUT", POOL_IDLE_TIMEOUT)
+        )
+
+    def release(self):
+        # 无事件循环时(进程退出)连接随进程关闭
+        if not hasattr(self, "_pool"): return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._pool._spawn(self._pool.close())
+
     async def _reset_sentence(self, funasrWebsocket: websockets.ClientConnection):
         """重置说话识别, 防止连续识别添加标点符号"""
         message = json.dumps(
@@ -76,9 +228,10 @@ class FunasrStreamingAsr(StreamBaseEngine):
             logger.error(f"FunasrStreamingAsr task_send error: {e}")
             await WebSocketHandler.send_message(adhWebsocket, WS_SEND_ACTION_TYPE.ERROR, str(e))
 
-    async def _task_recv(self, adhWebsocket: WebSocket, funasrWebsocket: websockets.ClientConnection, mode: str):
+    async def _task_recv(self, adhWebsocket: WebSocket, funasrWebsocket: websockets.ClientConnection, mode: str) -> bool:
         """
         adh web -> adh server -> funasr server
+        正常收到ENGINE_STOP时返回True, funasr连接可复用
         """
         try:
             message = json.dumps(
@@ -97,33 +250,34 @@ class FunasrStreamingAsr(StreamBaseEngine):
             await funasrWebsocket.send(message)
             await WebSocketHandler.send_message(adhWebsocket, WS_SEND_ACTION_TYPE.ENGINE_STARTED)
             while True:
-                action, payload = await WebSocketHandler.recv_message(adhWebsocket)
-                match action:
-                    case WS_RECV_ACTION_TYPE.PING:
-                        await WebSocketHandler.send_message(adhWebsocket, WS_SEND_ACTION_TYPE.PONG.value, b"")
-                    case WS_RECV_ACTION_TYPE.ENGINE_START:
-                        raise RuntimeError("FunasrStreamingAsr has benn started")
-                    case WS_RECV_ACTION_TYPE.ENGINE_PARTIAL_INPUT:
-                        await funasrWebsocket.send(payload)
-                    case WS_RECV_ACTION_TYPE.ENGINE_FINAL_INPUT:
-                        message = json.dumps(
-                            {
-                                "is_speaking": False
-                            }
-                        )
-                        await funasrWebsocket.send(message)
-                        await funasrWebsocket.send(payload)
-                    case WS_RECV_ACTION_TYPE.ENGINE_STOP:
-                        await funasrWebsocket.close()
-                        await WebSocketHandler.send_message(adhWebsocket, WS_SEND_ACTION_TYPE.ENGINE_STOPPED)
-                        return
-                    case _:
-                        raise RuntimeError(f"FunasrStreamingAsr task_recv error: {action} not found")
+                # 音频帧直接以memoryview转发, 不做拷贝
+                for action, payload in await WebSocketHandler.recv_messages(adhWebsocket):
+                    match action:
+                        case WS_RECV_ACTION_TYPE.PING:
+                            await WebSocketHandler.send_message(adhWebsocket, WS_SEND_ACTION_TYPE.PONG.value, b"")
+                        case WS_RECV_ACTION_TYPE.ENGINE_START:
+                            raise RuntimeError("FunasrStreamingAsr has benn started")
+                        case WS_RECV_ACTION_TYPE.ENGINE_PARTIAL_INPUT:
+                            await funasrWebsocket.send(payload)
+                        case WS_RECV_ACTION_TYPE.ENGINE_FINAL_INPUT:
+                            message = json.dumps(
+                                {
+                                    "is_speaking": False
+                                }
+                            )
+                            await funasrWebsocket.send(message)
+                            await funasrWebsocket.send(payload)
+                        case WS_RECV_ACTION_TYPE.ENGINE_STOP:
+                            await WebSocketHandler.send_message(adhWebsocket, WS_SEND_ACTION_TYPE.ENGINE_STOPPED)
+                            return True
+                        case _:
+                            raise RuntimeError(f"FunasrStreamingAsr task_recv error: {action} not found")
         except WebSocketDisconnect:
             logger.debug("funasrWebsocket closed, task_recv exit")
         except Exception as e:
             logger.error(f"FunasrStreamingAsr task_recv error: {e}")
             await WebSocketHandler.send_message(adhWebsocket, WS_SEND_ACTION_TYPE.ERROR, str(e))
+        return False
 
     async def run(self, websocket: WebSocket, **kwargs) -> None:
         # 参数校验
@@ -131,10 +285,18 @@ class FunasrStreamingAsr(StreamBaseEngine):
         API_URL = paramters["api_url"]
         MODE = paramters["mode"]
         await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.ENGINE_INITIALZING)
-        # 连接服务器
-        async with websockets.connect(API_URL, subprotocols=["binary"], ping_interval=None) as funasrWebsocket:
+        # 从连接池获取funasr连接
+        funasrWebsocket = await self._pool.acquire(API_URL)
+        reusable = False
+        # funasr server -> adh server -> adh web
+        task_send = asyncio.create_task(self._task_send(websocket, funasrWebsocket))
+        try:
             # adh web -> adh server -> funasr server
-            task_recv = asyncio.create_task(self._task_recv(websocket, funasrWebsocket, MODE))
-            # funasr server -> adh server -> adh web
-            task_send = asyncio.create_task(self._task_send(websocket, funasrWebsocket))
-            await asyncio.gather(task_recv, task_send)
\ No newline at end of file
+            reusable = await self._task_recv(websocket, funasrWebsocket, MODE)
+        finally:
+            task_send.cancel()
+            try:
+                await task_send
+            except asyncio.CancelledError:
+                pass
+            self._pool.release(API_URL, funasrWebsocket, reusable)
@@ -5,10 +5,13 @@
 '''
 
 from fastapi import WebSocket
-from typing import List
+from collections import OrderedDict
+from typing import List, AsyncGenerator, Hashable, Optional
 from abc import abstractmethod
+from yacs.config import CfgNode as CN
 from digitalHuman.core import BaseRunner
-from digitalHuman.protocol import BaseMessage, TextMessage, AudioMessage, VoiceDesc
+from digitalHuman.protocol import BaseMessage, TextMessage, AudioMessage, VoiceDesc, ENGINE_TYPE
+from .voiceCatalog import VoiceCatalog, VoiceInfo
 
 __all__ = ["BaseEngine"]
 
@@ -28,13 +31,74 @@ class BaseASREngine(BaseEngine):
         raise NotImplementedError
 
 class BaseTTSEngine(BaseEngine):
-    async def voices(self, **kwargs) -> List[VoiceDesc]:
+    # 远程音色列表的刷新间隔(秒), 0表示只加载一次
+    VOICE_REFRESH_INTERVAL = 0
+    # 按请求参数区分的音色目录数量上限
+    MAX_VOICE_CATALOGS = 64
+    # 输出音频的采样率及采样位宽(字节), 流式返回时放在响应头中
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, config: CN, type: ENGINE_TYPE):
+        self._voiceCatalogs: OrderedDict[Hashable, VoiceCatalog] = OrderedDict()
+        super().__init__(config, type)
+
+    def defaultVoices(self) -> List[VoiceInfo]:
+        """内置音色列表, 远程列表加载完成前使用"""
         return []
 
+    async def loadVoices(self, **kwargs) -> Optional[List[VoiceInfo]]:
+        """
+        获取远程音色列表, 由音色目录在后台调用
+        返回None表示没有远程列表, 只使用内置音色
+        """
+        return None
+
+    def voiceKey(self, **kwargs) -> Hashable:
+        """音色列表与请求参数相关时(如各自的token), 按key区分音色目录"""
+        return None
+
+    def voiceCatalog(self, **kwargs) -> VoiceCatalog:
+        key = self.voiceKey(**kwargs)
+        catalog = self._voiceCatalogs.get(key)
+        if catalog is not None:
+            self._voiceCatalogs.move_to_end(key)
+            return catalog
+        catalog = VoiceCatalog(self.defaultVoices(), lambda: self.loadVoices(**kwargs), self.VOICE_REFRESH_INTERVAL)
+        self._voiceCatalogs[key] = catalog
+        while len(self._voiceCatalogs) > self.MAX_VOICE_CATALOGS:
+            self._voiceCatalogs.popitem(last=False)
+        return catalog
+
+    def findVoice(self, name: str, **kwargs) -> Optional[VoiceInfo]:
+        return self.voiceCatalog(**kwargs).get(name)
+
+    async def resolveVoice(self, voice: str, **kwargs) -> Optional[VoiceInfo]:
+        """
+        按名称或id查找指定的音色
+        远程列表首次加载完成前等待一次, 避免刚启动时查不到
+        """
+        catalog = self.voiceCatalog(**kwargs)
+        await catalog.ready()
+        return catalog.get(voice) or catalog.getById(voice)
+
+    async def voices(self, **kwargs) -> List[VoiceDesc]:
+        """从内存中的音色目录返回, 支持按gender/locale过滤"""
+        return self.voiceCatalog(**kwargs).list(kwargs.get("gender"), kwargs.get("locale"))
+
     @abstractmethod
     async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
         raise NotImplementedError
 
+    async def stream(self, input: TextMessage, **kwargs) -> AsyncGenerator[bytes, None]:
+        """
+        流式合成, 按块返回音频数据
+        默认整句合成后一次返回, 支持流式的引擎需重写
+        """
+        output: AudioMessage = await self.run(input, **kwargs)
+        if not output or not output.data: return
+        yield output.data
+
 class StreamBaseEngine(BaseEngine):
     @abstractmethod
     async def run(self, websocket: WebSocket, **kwargs) -> None:
@@ -9,14 +9,21 @@ from typing import List
 from collections import defaultdict
 from yacs.config import CfgNode as CN
 from digitalHuman.utils import logger
-from digitalHuman.protocol import ENGINE_TYPE
+from digitalHuman.protocol import ENGINE_TYPE, EngineDesc, ParamDesc
+from digitalHuman.core import parseParameters, engineDesc
 from .engineBase import BaseEngine
 from .asr import ASRFactory
-from .tts import TTSFactory
+from .tts import TTSFactory, TTSCache
 from .llm import LLMFactory
 
 __all__ = ["EnginePool"]
 
+ENGINE_FACTORIES = {
+    ENGINE_TYPE.ASR: ASRFactory,
+    ENGINE_TYPE.TTS: TTSFactory,
+    ENGINE_TYPE.LLM: LLMFactory,
+}
+
 class EnginePool():
     singleLock = RLock()
     _init = False
@@ -24,6 +31,11 @@ class EnginePool():
     def __init__(self):
         if not self._init:
             self._pool = defaultdict(dict)
+            # 引擎配置, 首次获取时创建实例
+            self._configs = defaultdict(dict)
+            self._lock = RLock()
+            # 配置版本, 每次setup递增, 用于失效接口缓存
+            self.revision = 0
             self._init = True
     
     # Single Instance
@@ -35,32 +47,62 @@ class EnginePool():
 
     def __del__(self):
         self._pool.clear()
+        self._configs.clear()
         self._init = False
-    
+
+    def _register(self, engineType: ENGINE_TYPE, config: CN):
+        configs = {engineCfg.NAME: engineCfg for engineCfg in config.SUPPORT_LIST}
+        # 配置变化的引擎重新创建
+        for engineName in list(self._pool[engineType].keys()):
+            if configs.get(engineName) != self._configs[engineType].get(engineName):
+                self._release(engineType, engineName)
+        self._configs[engineType] = configs
+        for engineName in configs:
+            logger.info(f"[EnginePool] {engineType} Engine {engineName} is registered.")
+        logger.info(f"[EnginePool] {engineType} Engine default is {config.DEFAULT}.")
+        # 预热: 启动时创建的引擎
+        for engineName in config.get("WARMUP", None) or []:
+            self.getEngine(engineType, engineName)
+
+    def _release(self, engineType: ENGINE_TYPE, engineName: str):
+        engine = self._pool[engineType].pop(engineName)
+        try:
+            engine.release()
+        except Exception as e:
+            logger.warning(f"[EnginePool] {engineType} Engine {engineName} release failed: {e}")
+        logger.info(f"[EnginePool] {engineType} Engine {engineName} is released.")
+
     def setup(self, config: CN):
-        # asr
-        for asrCfg in config.ASR.SUPPORT_LIST:
-            self._pool[ENGINE_TYPE.ASR][asrCfg.NAME] = ASRFactory.create(asrCfg)
-            logger.info(f"[EnginePool] ASR Engine {asrCfg.NAME} is created.")
-        logger.info(f"[EnginePool] ASR Engine default is {config.ASR.DEFAULT}.")
-        # tts
-        for ttsCfg in config.TTS.SUPPORT_LIST:
-            self._pool[ENGINE_TYPE.TTS][ttsCfg.NAME] = TTSFactory.create(ttsCfg)
-            logger.info(f"[EnginePool] TTS Engine {ttsCfg.NAME} is created.")
-        logger.info(f"[EnginePool] TTS Engine default is {config.TTS.DEFAULT}.")
-        # llm
-        for llmCfg in config.LLM.SUPPORT_LIST:
-            self._pool[ENGINE_TYPE.LLM][llmCfg.NAME] = LLMFactory.create(llmCfg)
-            logger.info(f"[EnginePool] LLM Engine {llmCfg.NAME} is created.")
-        logger.info(f"[EnginePool] LLM Engine default is {config.LLM.DEFAULT}.")
-    
+        self._register(ENGINE_TYPE.ASR, config.ASR)
+        self._register(ENGINE_TYPE.TTS, config.TTS)
+        TTSCache().setup(config.TTS.get("CACHE", None))
+        self._register(ENGINE_TYPE.LLM, config.LLM)
+        self.revision += 1
+
     def listEngine(self, engineType: ENGINE_TYPE) -> List[str]:
-        if engineType not in self._pool: return []
-        return self._pool[engineType].keys()
-            
-    def getEngine(self, engineType: ENGINE_TYPE, engineName: str) -> BaseEngine:
-        if engineType not in self._pool:
+        if engineType not in self._configs: return []
+        return self._configs[engineType].keys()
+
+    def _config(self, engineType: ENGINE_TYPE, engineName: str) -> CN:
+        if engineType not in self._configs:
             raise KeyError(f"[EnginePool] No such engine type: {engineType}")
-        if engineName not in self._pool[engineType]:
+        if engineName not in self._configs[engineType]:
             raise KeyError(f"[EnginePool] No such engine: {engineName}")
-        return self._pool[engineType][engineName]
\ No newline at end of file
+        return self._configs[engineType][engineName]
+
+    def getEngineDesc(self, engineType: ENGINE_TYPE, engineName: str) -> EngineDesc:
+        """由配置生成引擎描述, 不创建引擎实例"""
+        return engineDesc(self._config(engineType, engineName), engineType)
+
+    def getEngineParameters(self, engineType: ENGINE_TYPE, engineName: str) -> List[ParamDesc]:
+        return parseParameters(self._config(engineType, engineName))
+
+    def getEngine(self, engineType: ENGINE_TYPE, engineName: str) -> BaseEngine:
+        engine = self._pool[engineType].get(engineName)
+        if engine is not None: return engine
+        engineCfg = self._config(engineType, engineName)
+        with self._lock:
+            if engineName not in self._pool[engineType]:
+                self._pool[engineType][engineName] = ENGINE_FACTORIES[engineType].create(engineCfg)
+                logger.info(f"[EnginePool] {engineType} Engine {engineName} is created.")
+            return self._pool[engineType][engineName]
\ No newline at end of file
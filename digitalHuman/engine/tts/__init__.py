@@ -4,11 +4,15 @@
 @Author  :   一力辉 
 '''
 
-from .tencentTTS import *
-from .edgeTTS import *
-from .difyTTS import *
-from .cozeTTS import *
+from ..builder import TTSEngines
 from .ttsFactory import TTSFactory
-# from .aliNLSTTS import AliNLSTTS
+from .ttsCache import TTSCache
 
-__all__ = ['TTSFactory']
\ No newline at end of file
+# 引擎模块在首次创建时导入, 未使用的引擎不加载其依赖的SDK
+TTSEngines.registerLazy("Tencent-API", f"{__name__}.tencentTTS")
+TTSEngines.registerLazy("EdgeTTS", f"{__name__}.edgeTTS")
+TTSEngines.registerLazy("Dify", f"{__name__}.difyTTS")
+TTSEngines.registerLazy("Coze", f"{__name__}.cozeTTS")
+TTSEngines.registerLazy("AliNLSTTS", f"{__name__}.aliNLSTTS")
+
+__all__ = ['TTSFactory', 'TTSCache']
@@ -1,17 +1,23 @@
 import asyncio
 import random
 import threading
-from io import BytesIO
-from typing import Optional # Added for type hinting
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Callable, AsyncGenerator # Added for type hinting
 from digitalHuman.protocol import *
-from digitalHuman.utils import logger
+from digitalHuman.utils import logger, Gauge, registerCollector
 import nls # Alibaba NLS SDK, when need to be installed
 from ..builder import TTSEngines
-from ..engineBase import BaseEngine
+from ..engineBase import BaseTTSEngine
+from ..voiceCatalog import VoiceInfo
 from yacs.config import CfgNode as CN
 
 __all__ = ["AliNLSTTS"]
 
+# 合成线程数及单次合成超时时间(秒)
+WORKER_NUM = 4
+SYNTHESIZE_TIMEOUT = 60
+
 VOICE_LIST = [
     VoiceDesc(name="zhifeng_emo", gender=GENDER_TYPE.MALE),
     VoiceDesc(name="zhibing_emo", gender=GENDER_TYPE.MALE),
@@ -22,128 +28,206 @@ VOICE_LIST = [
     VoiceDesc(name="zhimiao_emo", gender=GENDER_TYPE.FEMALE),
 ]
 
+class NlsSession():
+    """
+    合成线程持有的合成器会话
+    SDK回调在其内部线程触发, 通过sink把音频块转交给当前请求
+    """
+    def __init__(self, config: CN, token: str, app_key: str):
+        self._config = config
+        self._completion_event = threading.Event()
+        self._error_message = ""
+        self._sink: Optional[Callable[[bytes], None]] = None
+        self._synthesizer = nls.NlsSpeechSynthesizer(
+            url=config.URL,
+            appkey=app_key,
+            token=token,
+            on_data=self.on_data,
+            on_completed=self.on_completed,
+            on_error=self.on_error,
+            on_close=self.on_close,
+            callback_args=[]
+        )
+
+    def on_error(self, message, *args):
+        logger.error(f"[{self._config.NAME}] On error: {message}, args: {args}")
+        self._error_message = str(message)
+        self._completion_event.set() # Signal completion even on error
+
+    def on_close(self, *args):
+        # 会话复用时关闭回调可能晚于下一次合成开始, 不作为完成信号, 异常断开由超时兜底
+        logger.debug(f"[{self._config.NAME}] On close: args: {args}")
+
+    def on_data(self, data, *args):
+        if data and self._sink:
+            self._sink(data)
+
+    def on_completed(self, message, *args):
+        logger.debug(f"[{self._config.NAME}] On completed: {message}")
+        self._completion_event.set()
+
+    def synthesize(self, text: str, voice: str, sink: Callable[[bytes], None]):
+        self._sink = sink
+        self._error_message = ""
+        self._completion_event.clear()
+        try:
+            logger.debug(f"[{self._config.NAME}] Starting TTS synthesis for text: {text[:50]}...")
+            self._synthesizer.start(
+                text,
+                voice=voice,
+                aformat=self._config.FORMAT.lower(), # SDK expects 'pcm', 'mp3', 'wav'
+                sample_rate=self._config.SAMPLE_RATE
+            )
+            if not self._completion_event.wait(SYNTHESIZE_TIMEOUT):
+                raise TimeoutError(f"[{self._config.NAME}] Synthesis timeout")
+            if self._error_message:
+                raise RuntimeError(f"[{self._config.NAME}] Synthesis failed: {self._error_message}")
+        finally:
+            self._sink = None
+
+    def close(self):
+        """放弃会话, 之后迟到的回调不再影响其它请求"""
+        try:
+            self._synthesizer.shutdown()
+        except Exception as e:
+            logger.debug(f"[{self._config.NAME}] Shutdown synthesizer failed: {e}")
+
+# 运行中的合成线程池, 用于导出监控指标
+_pools: "weakref.WeakSet[NlsSynthesizerPool]" = weakref.WeakSet()
+
+class NlsSynthesizerPool():
+    """
+    NLS合成专用线程池
+    不占用默认线程池, 每个线程复用自己的合成器, 音频块经线程安全队列实时返回事件循环
+    """
+    def __init__(self, config: CN, workers: int = WORKER_NUM):
+        self._config = config
+        self._workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nls-tts")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        _pools.add(self)
+
+    @property
+    def name(self) -> str:
+        return self._config.NAME
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"workers": self._workers, "queued": self._queued, "running": self._running}
+
+    def _session(self, token: str, app_key: str) -> NlsSession:
+        sessions: Dict = getattr(self._local, "sessions", None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        session = sessions.get((token, app_key))
+        if session is None:
+            # token变化后旧会话不再使用
+            sessions.clear()
+            session = sessions[(token, app_key)] = NlsSession(self._config, token, app_key)
+        return session
+
+    def _work(self, text: str, voice: str, token: str, app_key: str, sink: Callable[[bytes], None]):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            session = self._session(token, app_key)
+            try:
+                session.synthesize(text, voice, sink)
+            except BaseException:
+                # 超时或出错的会话可能还会收到上一次合成的回调, 不再复用
+                self._local.sessions.pop((token, app_key), None)
+                session.close()
+                raise
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def synthesize(self, text: str, voice: str, token: str, app_key: str) -> AsyncGenerator[bytes, None]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        sink = lambda data: loop.call_soon_threadsafe(queue.put_nowait, data)
+        with self._lock:
+            self._queued += 1
+        future = loop.run_in_executor(self._executor, self._work, text, voice, token, app_key, sink)
+        # 合成结束(包括异常)后放入结束标志
+        future.add_done_callback(lambda _: queue.put_nowait(None))
+        logger.debug(f"[{self._config.NAME}] Synthesizer pool stats: {self.stats()}")
+        while True:
+            data = await queue.get()
+            if data is None: break
+            yield data
+        await future
+
+    def shutdown(self):
+        _pools.discard(self)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def _collectMetrics() -> List[Gauge]:
+    metrics = {}
+    for pool in list(_pools):
+        for key, value in pool.stats().items():
+            if key not in metrics:
+                metrics[key] = Gauge(f"adh_nls_pool_{key}", f"NLS synthesizer pool {key}", register=False)
+            metrics[key].set(value, name=pool.name)
+    return list(metrics.values())
+
+registerCollector(_collectMetrics)
+
 @TTSEngines.register("AliNLSTTS")
-class AliNLSTTS(BaseEngine):
+class AliNLSTTS(BaseTTSEngine):
     EMOTION_LIST = ['angry', 'fear', 'happy', 'hate', 'neutral', 'sad', 'surprise']
 
     def generate_remotion_ssml_text(self, text: str) -> str:
         return f'<speak><emotion category="{random.choice(self.EMOTION_LIST)}" intensity="1.0">{text}</emotion></speak>'
     
-    async def voices(self) -> List[VoiceDesc]:
-        return VOICE_LIST
-
-    class NlsWorker:
-        def __init__(
-            self, 
-            text: str, 
-            config: CN,
-            voice: str,
-            token: str,
-            api_key: str,
-        ):
-            self._text = text
-            self._config = config
-            self._voice = voice
-            self._token = token
-            self._api_key = api_key
-            self._audio_buffer = BytesIO()
-            self._completion_event = threading.Event()
-            self._error_occurred = False
-            self._error_message = ""
-
-            # Configure NLS SDK debugging based on environment or config
-            # nls.enableTrace(True) # Enable for debugging if needed
-
-        def on_error(self, message, *args):
-            logger.error(f"[{self._config.NAME}] On error: {message}, args: {args}")
-            self._error_message = str(message)
-            self._error_occurred = True
-            self._completion_event.set() # Signal completion even on error
-
-        def on_close(self, *args):
-            logger.debug(f"[{self._config.NAME}] On close: args: {args}")
-            self._completion_event.set() # Ensure completion is signaled
-
-        def on_data(self, data, *args):
-            if data:
-                self._audio_buffer.write(data)
-
-        def on_completed(self, message, *args):
-            logger.debug(f"[{self._config.NAME}] On completed: {message}")
-            self._completion_event.set()
-
-        def synthesize(self) -> Optional[bytes]:
-            tts = nls.NlsSpeechSynthesizer(
-                url=self._config.URL,
-                appkey=self._api_key,
-                token=self._token,
-                on_data=self.on_data,
-                on_completed=self.on_completed,
-                on_error=self.on_error,
-                on_close=self.on_close,
-                callback_args=[] 
-            )
-
-            logger.debug(f"[{self._config.NAME}] Starting TTS synthesis for text: {self._text[:50]}...")
-            # The NLS SDK's start method expects parameters like voice, format, sample_rate.
-            # Make sure these are correctly passed from the config.
-            # The text input here is expected to be SSML.
-            logger.info(f"{self._text=}")
-            tts.start(
-                self._text,
-                voice=self._voice,
-                aformat=self._config.FORMAT.lower(), # SDK expects 'pcm', 'mp3', 'wav'
-                sample_rate=self._config.SAMPLE_RATE
-            )
+    def defaultVoices(self) -> List[VoiceInfo]:
+        return [VoiceInfo(id=voice.name, name=voice.name, gender=voice.gender, locale="zh-CN") for voice in VOICE_LIST]
 
-            self._completion_event.wait() # Wait for callbacks to complete
+    def setup(self):
+        self.SAMPLE_RATE = self.cfg.SAMPLE_RATE
+        self._pool = NlsSynthesizerPool(self.cfg, self.cfg.get("WORKERS", WORKER_NUM))
 
-            if self._error_occurred:
-                logger.error(f"[{self._config.NAME}] Synthesis failed: {self._error_message}")
-                return None
+    def release(self):
+        if hasattr(self, "_pool"):
+            self._pool.shutdown()
 
-            self._audio_buffer.seek(0)
-            return self._audio_buffer.getvalue()
+    def _audioType(self) -> AUDIO_TYPE:
+        config_audio_out_format = self.cfg.FORMAT.lower()
+        if config_audio_out_format == "mp3":
+            return AUDIO_TYPE.MP3
+        elif config_audio_out_format == "wav":
+            return AUDIO_TYPE.WAV
+        raise ValueError(f"Unsupported {config_audio_out_format} for ALI NLS tts")
 
-    async def run(self, input: TextMessage, **kwargs) -> Optional[AudioMessage]:
-        logger.info(f"[{self.cfg.NAME}] Received text for TTS: {input.data[:50]}...")
+    async def stream(self, input: TextMessage, **kwargs) -> AsyncGenerator[bytes, None]:
         # 参数校验
         paramters = self.checkParameter(**kwargs)
-        voice = paramters["voice"]
-        token = paramters["token"]
-        api_key = paramters["api_key"]
         if not input.data:
             logger.warning(f"[{self.cfg.NAME}] Received empty text for TTS.")
-            return None
+            return
+        async for data in self._pool.synthesize(
+            text=self.generate_remotion_ssml_text(input.data),
+            voice=paramters["voice"],
+            token=paramters["token"],
+            app_key=paramters.get("app_key") or paramters.get("api_key", "")
+        ):
+            yield data
 
-        worker = self.NlsWorker(
-            text=self.generate_remotion_ssml_text(input.data), 
-            config=self.cfg,
-            voice=voice,
-            token=token,
-            api_key=api_key
+    async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
+        logger.info(f"[{self.cfg.NAME}] Received text for TTS: {input.data[:50]}...")
+        audio_format = self._audioType()
+        # 合成失败时直接抛出, 由调用方返回错误
+        audio_content = b"".join([data async for data in self.stream(input, **kwargs)])
+        if not audio_content:
+            raise RuntimeError(f"{self.cfg.NAME} tts synthesis failed to produce audio content")
+        logger.info(f"[{self.cfg.NAME}] TTS synthesis successful. Audio size: {len(audio_content)} bytes")
+        return AudioMessage(
+            data=audio_content,
+            type=audio_format,
+            sampleRate=self.SAMPLE_RATE,
+            sampleWidth=self.SAMPLE_WIDTH
         )
-        # change to async function
-        loop = asyncio.get_event_loop()
-
-        audio_content = await loop.run_in_executor(None, worker.synthesize)
-        config_audio_out_format = self.cfg.FORMAT.lower()
-        if audio_content:
-            if config_audio_out_format == "mp3":
-                audio_format = AUDIO_TYPE.MP3
-            elif config_audio_out_format == "wav":
-                audio_format = AUDIO_TYPE.WAV
-            else:
-                raise ValueError(f"Unsupported {config_audio_out_format} for ALI NLS tts")
-
-            logger.info(f"[{self.cfg.NAME}] TTS synthesis successful. Audio size: {len(audio_content)} bytes")
-            return AudioMessage(
-                data=audio_content,
-                format=audio_format,
-                sampleRate=self.cfg.SAMPLE_RATE,
-                sampleWidth=0, # This might need adjustment based on format
-                desc="Alibaba NLS TTS"
-            )
-        else:
-            logger.error(f"[{self.cfg.NAME}] TTS synthesis failed to produce audio content.")
-            return None
\ No newline at end of file
@@ -7,52 +7,75 @@
 
 from ..builder import TTSEngines
 from ..engineBase import BaseTTSEngine
-import base64
+from ..voiceCatalog import VoiceInfo
+import hashlib
+from typing import Hashable, List, Optional
 from digitalHuman.protocol import *
-from digitalHuman.utils import logger, httpxAsyncClient, checkResponse
+from digitalHuman.utils import logger, getHttpClient, checkResponse, AsyncTTLCache
 
 __all__ = ["CozeApiTts"]
 
+# 智能体音色缓存时间及提前刷新时间(秒)
+VOICE_CACHE_TTL = 600
+VOICE_CACHE_REFRESH_BEFORE = 60
+# 音色列表刷新间隔(秒)及分页大小
+VOICE_LIST_REFRESH_INTERVAL = 3600
+VOICE_PAGE_SIZE = 100
+
 
 @TTSEngines.register("Coze")
 class CozeApiTts(BaseTTSEngine):
+    VOICE_REFRESH_INTERVAL = VOICE_LIST_REFRESH_INTERVAL
+
     def setup(self):
         self.url = "https://api.coze.cn/v1/audio/speech"
-        # TODO: 多人请求差异化
-        # self.voicesMap = {}
-
-    # async def voices(self, **kwargs) -> List[VoiceDesc]:
-    #     # 参数校验
-    #     paramters = self.checkParameter(**kwargs)
-    #     API_TOKEN = paramters["token"]
-    #     if not API_TOKEN: return []
-    #     headers = {
-    #         'Authorization': f'Bearer {API_TOKEN}',
-    #         'Content-Type': 'application/json'
-    #     }
-    #     resp = []
-    #     page_num = 1
-    #     page_size = 100
-    #     while True:
-    #         payload = {
-    #             "page_num": page_num,
-    #             "page_size": page_size
-    #         }
-    #         response = await httpxAsyncClient.get("https://api.coze.cn/v1/audio/voices", headers=headers, params=payload)
-    #         result = checkResponse(response, "CozeApiTts", "get voice list")
-    #         has_more = result['data']['has_more']
-    #         voices = result['data']['voice_list']
-    #         self.voicesMap.update((voice['name'], voice['voice_id']) for voice in voices)
-    #         for voice in voices:
-    #             resp.append(VoiceDesc(
-    #                 name=voice['name'],
-    #                 gender=GENDER_TYPE.FEMALE if 'female' in voice['speaker_id'] else GENDER_TYPE.MALE,
-    #             ))
-    #         if has_more:
-    #             page_num += 1
-    #         else:
-    #             break
-    #     return resp
+        self._voiceCache = AsyncTTLCache(ttl=VOICE_CACHE_TTL, refreshBefore=VOICE_CACHE_REFRESH_BEFORE)
+
+    def voiceKey(self, **kwargs) -> Hashable:
+        # 音色列表按token区分
+        token = kwargs.get("token")
+        return hashlib.sha256(token.encode("utf-8")).hexdigest() if token else None
+
+    async def loadVoices(self, **kwargs) -> Optional[List[VoiceInfo]]:
+        """分页获取全部音色, 由音色目录在后台调用"""
+        token = kwargs.get("token")
+        if not token: return None
+        headers = {
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json'
+        }
+        voices = []
+        page_num = 1
+        while True:
+            payload = {
+                "page_num": page_num,
+                "page_size": VOICE_PAGE_SIZE
+            }
+            response = await getHttpClient("coze").get("https://api.coze.cn/v1/audio/voices", headers=headers, params=payload)
+            result = checkResponse(response, "CozeApiTts", "get voice list")
+            for voice in result['data']['voice_list']:
+                voices.append(VoiceInfo(
+                    id=voice['voice_id'],
+                    name=voice['name'],
+                    gender=GENDER_TYPE.FEMALE if 'female' in voice.get('speaker_id', '') else GENDER_TYPE.MALE,
+                    locale=voice.get('language_code', ''),
+                ))
+            if not result['data']['has_more']: break
+            page_num += 1
+        return voices
+
+    async def _botVoiceId(self, token: str, bot_id: str) -> str:
+        """获取智能体配置的音色, 按(token, bot_id)缓存"""
+        async def fetch() -> str:
+            headers = {
+                'Authorization': f'Bearer {token}',
+                'Content-Type': 'application/json'
+            }
+            response = await getHttpClient("coze").get(f"https://api.coze.cn/v1/bots/{bot_id}", headers=headers)
+            resp = checkResponse(response, "CozeApiTts", "get bot info")
+            return resp['data']['voice_info_list'][0]['voice_id']
+        key = (hashlib.sha256(token.encode("utf-8")).hexdigest(), bot_id)
+        return await self._voiceCache.get(key, fetch)
 
     async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
         # 参数校验
@@ -65,10 +88,14 @@ class CozeApiTts(BaseTTSEngine):
             'Content-Type': 'application/json'
         }
 
-        # 获取智能体配置信息
-        response = await httpxAsyncClient.get(f"https://api.coze.cn/v1/bots/{bot_id}", headers=headers)
-        resp = checkResponse(response, "CozeApiTts", "get bot info")
-        voice_id = resp['data']['voice_info_list'][0]['voice_id']
+        # 指定音色时从音色目录查找, 否则使用智能体配置的音色
+        if paramters.get("voice"):
+            voice = await self.resolveVoice(paramters["voice"], token=token)
+            if voice is None:
+                raise RuntimeError(f"CozeAPI tts voice not found: {paramters['voice']}")
+            voice_id = voice.id
+        else:
+            voice_id = await self._botVoiceId(token, bot_id)
 
         payload = {
             'input': input.data,
@@ -79,12 +106,12 @@ class CozeApiTts(BaseTTSEngine):
         }
 
         logger.debug(f"[TTS] Engine input: {input.data}")
-        response = await httpxAsyncClient.post(self.url, json=payload, headers=headers)
+        response = await getHttpClient("coze").post(self.url, json=payload, headers=headers)
         if response.status_code != 200:
             raise RuntimeError(f"CozeAPI tts api error: {response.text}")
 
         message = AudioMessage(
-            data=base64.b64encode(response.content).decode('utf-8'),
+            data=response.content,
             sampleRate=16000,
             sampleWidth=2,
         )
@@ -7,9 +7,8 @@
 
 from ..builder import TTSEngines
 from ..engineBase import BaseTTSEngine
-import base64
 from digitalHuman.protocol import *
-from digitalHuman.utils import logger, httpxAsyncClient, mp3ToWav
+from digitalHuman.utils import logger, getHttpClient, mp3ToWav
 
 __all__ = ["DifyApiTts"]
 
@@ -33,7 +32,7 @@ class DifyApiTts(BaseTTSEngine):
         }
 
         logger.debug(f"[TTS] Engine input: {input.data}")
-        response = await httpxAsyncClient.post(API_SERVER + "/text-to-audio", json=payload, headers=headers)
+        response = await getHttpClient("dify").post(API_SERVER + "/text-to-audio", json=payload, headers=headers)
         if response.status_code != 200:
             raise RuntimeError(f"DifyAPI tts api error: {response.status_code}")
 
@@ -42,8 +41,8 @@ class DifyApiTts(BaseTTSEngine):
         # resp = httpx.post(API_URL + "/text-to-audio", json=payload, headers=headers)
         # await asyncio.sleep(0)
         message = AudioMessage(
-            # data=base64.b64encode(mp3ToWav(response.content)).decode('utf-8'),
-            data=base64.b64encode(response.content).decode('utf-8'),
+            # data=mp3ToWav(response.content),
+            data=response.content,
             sampleRate=16000,
             sampleWidth=2,
         )
@@ -7,9 +7,10 @@
 
 from ..builder import TTSEngines
 from ..engineBase import BaseTTSEngine
+from ..voiceCatalog import VoiceInfo
 import edge_tts
-import base64
-from typing import List
+from contextlib import aclosing
+from typing import List, AsyncGenerator
 from digitalHuman.protocol import *
 from digitalHuman.utils import logger, mp3ToWav
 
@@ -78,10 +79,22 @@ VOICE_LIST = [
     VoiceDesc(name="en-US-RogerNeural", gender=GENDER_TYPE.MALE),
     VoiceDesc(name="en-US-SteffanNeural", gender=GENDER_TYPE.MALE)
 ]
+
+# 远程音色列表刷新间隔(秒)
+VOICE_REFRESH_INTERVAL = 24 * 3600
+
+def _voiceInfo(name: str, gender: GENDER_TYPE, locale: str = "") -> VoiceInfo:
+    # ShortName格式: zh-CN-XiaoxiaoNeural
+    return VoiceInfo(id=name, name=name, gender=gender, locale=locale or "-".join(name.split("-")[:2]))
+
 @TTSEngines.register("EdgeTTS")
 class EdgeApiTts(BaseTTSEngine):
-    async def voices(self, **kwargs) -> List[VoiceDesc]:
-        return VOICE_LIST
+    VOICE_REFRESH_INTERVAL = VOICE_REFRESH_INTERVAL
+
+    def defaultVoices(self) -> List[VoiceInfo]:
+        return [_voiceInfo(voice.name, voice.gender) for voice in VOICE_LIST]
+
+    async def loadVoices(self, **kwargs) -> List[VoiceInfo]:
         """
         结构体
         [{
@@ -97,45 +110,48 @@ class EdgeApiTts(BaseTTSEngine):
         """
         voices = await edge_tts.list_voices()
         # 过滤 zh / en
-        voices = [voice for voice in voices if voice['ShortName'].startswith('zh') or voice['ShortName'].startswith('en')]
-        test = [VoiceDesc(name=voice['ShortName'], gender=GENDER_TYPE.FEMALE if voice['Gender'] == 'Female' else GENDER_TYPE.MALE) for voice in voices]
-        for t in test:
-            print(f'VoiceDesc(name="{t.name}", gender={"GENDER_TYPE.FEMALE" if t.gender == GENDER_TYPE.FEMALE else "GENDER_TYPE.MALE"}),')
-        return [VoiceDesc(name=voice['ShortName'], gender=GENDER_TYPE.FEMALE if voice['Gender'] == 'Female' else GENDER_TYPE.MALE) for voice in voices]
+        return [
+            _voiceInfo(voice['ShortName'], GENDER_TYPE.FEMALE if voice['Gender'] == 'Female' else GENDER_TYPE.MALE, voice.get('Locale', ""))
+            for voice in voices if voice['ShortName'].startswith('zh') or voice['ShortName'].startswith('en')
+        ]
 
-    async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
-        # 参数填充
-        for paramter in self.parameters():
-            if paramter.name == "voice":
-                voice = paramter.default if paramter.name not in kwargs else kwargs[paramter.name]
-            if paramter.name == "rate":
-                rate = paramter.default if paramter.name not in kwargs else kwargs[paramter.name]
-            if paramter.name == "volume":
-                volume = paramter.default if paramter.name not in kwargs else kwargs[paramter.name]
-            if paramter.name == "pitch":
-                pitch = paramter.default if paramter.name not in kwargs else kwargs[paramter.name]
+    def _communicate(self, input: TextMessage, **kwargs) -> edge_tts.Communicate:
+        # 参数校验
+        paramters = self.checkParameter(**kwargs)
+        voice = paramters["voice"]
+        rate = paramters["rate"]
+        volume = paramters["volume"]
+        pitch = paramters["pitch"]
         if not voice:
             raise KeyError("LitAPI tts voice is required")
         logger.debug(f"[TTS] Engine input[{voice}]: {input.data}")
         rate = "+" + str(rate) + "%" if rate >= 0 else "" + str(rate) + "%"
         volume = "+" + str(volume) + "%" if volume >= 0 else "" + str(volume) + "%"
         pitch = "+" + str(pitch) + "Hz" if pitch >= 0 else "" + str(pitch) + "HZ"
-        communicate = edge_tts.Communicate(
+        return edge_tts.Communicate(
             text=input.data, 
             voice=voice,
             rate=rate,
             volume=volume,
             pitch=pitch
         )
-        data = b''
-        async for message in communicate.stream():
-            if message["type"] == "audio":
-                data += message["data"]
+
+    async def stream(self, input: TextMessage, **kwargs) -> AsyncGenerator[bytes, None]:
+        communicate = self._communicate(input, **kwargs)
+        # 调用方提前结束时关闭与edge服务的连接
+        async with aclosing(communicate.stream()) as messages:
+            async for message in messages:
+                if message["type"] == "audio":
+                    yield message["data"]
+
+    async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
+        chunks = [chunk async for chunk in self.stream(input, **kwargs)]
+        data = b''.join(chunks)
         # mp3 -> wav
         # data = mp3ToWav(data)
         message = AudioMessage(
-            data=base64.b64encode(data).decode('utf-8'),
-            sampleRate=16000,
-            sampleWidth=2,
+            data=data,
+            sampleRate=self.SAMPLE_RATE,
+            sampleWidth=self.SAMPLE_WIDTH,
         )
         return message
\ No newline at end of file
@@ -7,15 +7,16 @@
 
 from ..builder import TTSEngines
 from ..engineBase import BaseTTSEngine
-import hashlib
-import hmac
-import time
+from ..voiceCatalog import VoiceInfo
 import json
+import base64
+import asyncio
 from uuid import uuid4
-from datetime import datetime, timezone
-from typing import Tuple, Dict
+from typing import Tuple, Dict, AsyncGenerator
+from yacs.config import CfgNode as CN
 from digitalHuman.protocol import *
-from digitalHuman.utils import logger, httpxAsyncClient
+from digitalHuman.utils import logger, getHttpClient, splitText, AsyncRateLimiter
+from digitalHuman.core import TencentCloudApiKey, TencentCloudSigner
 from pydantic import BaseModel
 from typing import List, Optional
 from decimal import Decimal
@@ -25,6 +26,9 @@ __all__ = ["TencentApiTts"]
 
 
 MAX_INPUT_LENGTH = 150
+# 长文本分段合成的默认并发数及每秒请求数
+SEGMENT_CONCURRENCY = 4
+SEGMENT_RATE_LIMIT = 20
 
 # neutral(中性)、sad(悲伤)、happy(高兴)、angry(生气)、fear(恐惧)、sajiao(撒娇)、amaze(震惊)、disgusted(厌恶)、peaceful(平静)
 # 中性、悲伤、高兴、生气、恐惧、撒娇、震惊、厌恶、平静
@@ -74,23 +78,17 @@ VOICE_LIST = [
     TencentVoiceDesc(id=601014, name="爱小简", gender=GENDER_TYPE.MALE, language="中文", multi_emotional=True),
 ]
 
-class TencentCloudApiKey(BaseModel):
-    secret_id: str
-    secret_key: str
-
-def findVoice(name: str) -> Optional[TencentVoiceDesc]:
-    for voice in VOICE_LIST:
-        if voice.name == name:
-            return voice
-    return None
-
-def sign(key, msg: str):
-    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+# 音色语言 -> locale
+VOICE_LOCALES = {"中文": "zh-CN", "英文": "en-US"}
 
 @TTSEngines.register("Tencent-API")
 class TencentApiTts(BaseTTSEngine): 
     def setup(self):
         self._url = "https://tts.tencentcloudapi.com"
+        self._signer = TencentCloudSigner(service="tts", host="tts.tencentcloudapi.com", version="2019-08-23")
+        segmentCfg = self.cfg.get("SEGMENT", None) or CN()
+        self._semaphore = asyncio.Semaphore(segmentCfg.get("CONCURRENCY", SEGMENT_CONCURRENCY))
+        self._rateLimiter = AsyncRateLimiter(segmentCfg.get("RATE_LIMIT", SEGMENT_RATE_LIMIT))
     
     def _buildRequest(
         self, 
@@ -101,20 +99,13 @@ class TencentApiTts(BaseTTSEngine):
         speed: float, 
         emotionCategory: str = TencentVoiceEmotion.NEUTRAL
     ) -> Tuple[Dict, str]:
-        service = "tts"
-        host = "tts.tencentcloudapi.com"
-        version = "2019-08-23"
-        action = "TextToVoice"
-        algorithm = "TC3-HMAC-SHA256"
-        timestamp = int(time.time())
-        date = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
-        tencentVoice = findVoice(voice)
+        tencentVoice = self.findVoice(voice)
         if not tencentVoice:
             raise ValueError("voice not found")
         params = {
             "Text": input.data,
             "SessionId": str(uuid4()),
-            "VoiceType": tencentVoice.id,
+            "VoiceType": int(tencentVoice.id),
             # "Codec": "wav",
             "Codec": "mp3",
             "Volume": volume,
@@ -122,74 +113,58 @@ class TencentApiTts(BaseTTSEngine):
             "EmotionCategory": emotionCategory
         }
         payload = json.dumps(params)
-        # ************* 步骤 1：拼接规范请求串 *************
-        http_request_method = "POST"
-        canonical_uri = "/"
-        canonical_querystring = ""
-        ct = "application/json; charset=utf-8"
-        canonical_headers = "content-type:%s\nhost:%s\nx-tc-action:%s\n" % (ct, host, action.lower())
-        signed_headers = "content-type;host;x-tc-action"
-        hashed_request_payload = hashlib.sha256(payload.encode("utf-8")).hexdigest()
-        canonical_request = (http_request_method + "\n" +
-                            canonical_uri + "\n" +
-                            canonical_querystring + "\n" +
-                            canonical_headers + "\n" +
-                            signed_headers + "\n" +
-                            hashed_request_payload)
-
-        # ************* 步骤 2：拼接待签名字符串 *************
-        credential_scope = date + "/" + service + "/" + "tc3_request"
-        hashed_canonical_request = hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
-        string_to_sign = (algorithm + "\n" +
-                        str(timestamp) + "\n" +
-                        credential_scope + "\n" +
-                        hashed_canonical_request)
-
-        # ************* 步骤 3：计算签名 *************
-        secret_date = sign(("TC3" + tencentApiKey.secret_key).encode("utf-8"), date)
-        secret_service = sign(secret_date, service)
-        secret_signing = sign(secret_service, "tc3_request")
-        signature = hmac.new(secret_signing, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
-
-        # ************* 步骤 4：拼接 Authorization *************
-        authorization = (algorithm + " " +
-                        "Credential=" + tencentApiKey.secret_id + "/" + credential_scope + ", " +
-                        "SignedHeaders=" + signed_headers + ", " +
-                        "Signature=" + signature)
-
-        # ************* 步骤 5：构造并发起请求 *************
-        headers = {
-            "Authorization": authorization,
-            "Content-Type": "application/json; charset=utf-8",
-            "Host": host,
-            "X-TC-Action": action,
-            "X-TC-Timestamp": str(timestamp),
-            "X-TC-Version": version
-        }
-
+        headers = self._signer.sign("TextToVoice", payload, tencentApiKey)
         return (headers, payload)
 
-    async def voices(self, **kwargs) -> List[VoiceDesc]:
-        return [VoiceDesc(name=v.name, gender=v.gender) for v in VOICE_LIST]
+    def defaultVoices(self) -> List[VoiceInfo]:
+        return [
+            VoiceInfo(id=str(v.id), name=v.name, gender=v.gender, locale=VOICE_LOCALES.get(v.language, v.language))
+            for v in VOICE_LIST
+        ]
     
-    async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
-        # 参数校验
-        paramters = self.checkParameter(**kwargs)
-        voice = paramters["voice"]
-        speed = paramters["speed"]
-        volume = paramters["volume"]
-        SECRECT_ID = paramters["secret_id"]
-        SECRECT_KEY = paramters["secret_key"]
-        tencentCloudApiKey = TencentCloudApiKey(secret_id=SECRECT_ID, secret_key=SECRECT_KEY)
-        headers, payload = self._buildRequest(input, tencentCloudApiKey, voice, volume, speed) 
-        logger.debug(f"[TTS] Engine input: {input.data}")
-        response = await httpxAsyncClient.post(self._url, headers=headers, data=payload)
+    async def _synthesize(self, text: str, tencentApiKey: TencentCloudApiKey, voice: str, volume: float, speed: float) -> bytes:
+        headers, payload = self._buildRequest(TextMessage(data=text), tencentApiKey, voice, volume, speed)
+        async with self._semaphore:
+            await self._rateLimiter.acquire()
+            response = await getHttpClient("tencent").post(self._url, headers=headers, data=payload)
         if response.status_code != 200:
             raise RuntimeError(f"Builtin tts api error: {response.status_code}")
-        audio = response.json()["Response"]["Audio"]
+        result = response.json()["Response"]
+        if "Error" in result:
+            raise RuntimeError(f"Builtin tts api error: {result['Error'].get('Message', '')}")
+        return base64.b64decode(result["Audio"])
+
+    async def _segments(self, input: TextMessage, **kwargs) -> AsyncGenerator[bytes, None]:
+        """超长文本按标点分段并行合成, 按原文顺序返回各段音频"""
+        paramters = self.checkParameter(**kwargs)
+        tencentCloudApiKey = TencentCloudApiKey(secret_id=paramters["secret_id"], secret_key=paramters["secret_key"])
+        logger.debug(f"[TTS] Engine input: {input.data}")
+        segments = splitText(input.data, MAX_INPUT_LENGTH)
+        tasks = [
+            asyncio.create_task(self._synthesize(segment, tencentCloudApiKey, paramters["voice"], paramters["volume"], paramters["speed"]))
+            for segment in segments
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # 已失败的分段不再单独报错
+                    task.exception()
+
+    async def stream(self, input: TextMessage, **kwargs) -> AsyncGenerator[bytes, None]:
+        async for audio in self._segments(input, **kwargs):
+            yield audio
+
+    async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
+        # mp3分段直接拼接
+        audio = b"".join([audio async for audio in self._segments(input, **kwargs)])
         message = AudioMessage(
             data=audio,
-            sampleRate=16000,
-            sampleWidth=2,
+            sampleRate=self.SAMPLE_RATE,
+            sampleWidth=self.SAMPLE_WIDTH,
         )
         return message
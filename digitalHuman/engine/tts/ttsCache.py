@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   ttsCache.py
+@Author  :   一力辉
+'''
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+from threading import RLock
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from yacs.config import CfgNode as CN
+from digitalHuman.protocol import TextMessage, AudioMessage
+from digitalHuman.utils import logger, Gauge, registerCollector
+from digitalHuman.utils.env import OUTPUT_PATH
+from ..engineBase import BaseTTSEngine
+
+__all__ = ["TTSCache"]
+
+CACHE_PATH = os.path.join(OUTPUT_PATH, "tts_cache")
+# 默认配置
+MEMORY_MAX_BYTES = 64 * 1024 * 1024
+DISK_MAX_BYTES = 1024 * 1024 * 1024
+TTL = 7 * 24 * 3600
+
+def normalizeText(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+class TTSCache():
+    """
+    TTS音频缓存
+    key由(引擎名, 参数, 归一化文本)计算, 内存LRU + 磁盘两级缓存
+    """
+    singleLock = RLock()
+    _init = False
+
+    def __init__(self):
+        if not self._init:
+            self._enable = False
+            self._memory: OrderedDict[str, Tuple[float, AudioMessage]] = OrderedDict()
+            self._memoryBytes = 0
+            self._memoryMaxBytes = MEMORY_MAX_BYTES
+            # 磁盘索引: key -> (写入时间, 大小)
+            self._disk: OrderedDict[str, Tuple[float, int]] = OrderedDict()
+            self._diskBytes = 0
+            self._diskMaxBytes = DISK_MAX_BYTES
+            self._ttl = TTL
+            self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+            # 未命中时正在合成的key, 并发的相同请求只合成一次(single-flight)
+            self._inflight: Dict[str, asyncio.Task] = {}
+            self._lock = RLock()
+            self._init = True
+
+    # Single Instance
+    def __new__(cls, *args, **kwargs):
+        with TTSCache.singleLock:
+            if not hasattr(cls, '_instance'):
+                TTSCache._instance = super().__new__(cls)
+        return TTSCache._instance
+
+    def setup(self, config: Optional[CN]):
+        if not config or not config.get("ENABLE", False):
+            logger.info(f"[TTSCache] TTS cache is disabled.")
+            return
+        self._memoryMaxBytes = config.get("MEMORY_MAX_BYTES", MEMORY_MAX_BYTES)
+        self._diskMaxBytes = config.get("DISK_MAX_BYTES", DISK_MAX_BYTES)
+        self._ttl = config.get("TTL", TTL)
+        self._enable = True
+        if self._diskMaxBytes > 0:
+            os.makedirs(CACHE_PATH, exist_ok=True)
+            self._loadDiskIndex()
+        logger.info(f"[TTSCache] TTS cache is enabled, memory: {self._memoryMaxBytes} bytes, disk: {self._diskMaxBytes} bytes, ttl: {self._ttl}s.")
+
+    @property
+    def enable(self) -> bool:
+        return self._enable
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memoryBytes,
+                "disk_items": len(self._disk),
+                "disk_bytes": self._diskBytes,
+            }
+
+    @staticmethod
+    def key(engine: str, text: str, paramters: Dict) -> str:
+        content = json.dumps([engine, normalizeText(text), paramters], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    async def run(self, engine: BaseTTSEngine, input: TextMessage, **kwargs) -> AudioMessage:
+        """命中缓存直接返回, 否则调用引擎合成并写入缓存"""
+        if not self._enable or not input.data:
+            return await engine.run(input=input, **kwargs)
+        # user等非引擎参数不参与计算
+        paramters = {k: v for k, v in engine.checkParameter(**kwargs).items() if k != "user"}
+        key = self.key(engine.name, input.data, paramters)
+        output = self._getMemory(key)
+        if output is not None:
+            self._count("memory_hits")
+            return output
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, engine, input, **kwargs))
+            self._inflight[key] = task
+        # 等待方被取消时不影响共享的合成任务
+        output = await asyncio.shield(task)
+        # 各等待方使用独立的副本
+        return output.model_copy() if output is not None else output
+
+    async def _load(self, key: str, engine: BaseTTSEngine, input: TextMessage, **kwargs) -> AudioMessage:
+        """依次查询磁盘缓存及调用引擎合成"""
+        try:
+            output = await asyncio.to_thread(self._getDisk, key)
+            if output is not None:
+                self._count("disk_hits")
+                self._putMemory(key, output)
+                return output
+            self._count("misses")
+            output: AudioMessage = await engine.run(input=input, **kwargs)
+            if output and output.data:
+                self._putMemory(key, output)
+                await asyncio.to_thread(self._putDisk, key, output)
+            return output
+        finally:
+            self._inflight.pop(key, None)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _expired(self, created: float) -> bool:
+        return self._ttl > 0 and time.time() - created > self._ttl
+
+    # ======================= 内存 =======================
+    def _getMemory(self, key: str) -> Optional[AudioMessage]:
+        with self._lock:
+            if key not in self._memory: return None
+            created, output = self._memory[key]
+            if self._expired(created):
+                self._popMemory(key)
+                return None
+            self._memory.move_to_end(key)
+            return output.model_copy()
+
+    def _putMemory(self, key: str, output: AudioMessage):
+        size = len(output.data)
+        if size > self._memoryMaxBytes: return
+        with self._lock:
+            if key in self._memory: self._popMemory(key)
+            self._memory[key] = (time.time(), output.model_copy())
+            self._memoryBytes += size
+            while self._memoryBytes > self._memoryMaxBytes:
+                self._popMemory(next(iter(self._memory)))
+
+    def _popMemory(self, key: str):
+        _, output = self._memory.pop(key)
+        self._memoryBytes -= len(output.data)
+
+    # ======================= 磁盘 =======================
+    def _loadDiskIndex(self):
+        entries = []
+        for name in os.listdir(CACHE_PATH):
+            if not name.endswith(".json"): continue
+            key = name[:-len(".json")]
+            audioFile = os.path.join(CACHE_PATH, key)
+            if not os.path.exists(audioFile): continue
+            stat = os.stat(audioFile)
+            entries.append((stat.st_mtime, key, stat.st_size))
+        with self._lock:
+            for created, key, size in sorted(entries):
+                self._disk[key] = (created, size)
+                self._diskBytes += size
+            self._evictDisk()
+
+    def _getDisk(self, key: str) -> Optional[AudioMessage]:
+        if self._diskMaxBytes <= 0: return None
+        with self._lock:
+            if key not in self._disk and not self._indexDisk(key): return None
+            created, _ = self._disk[key]
+            if self._expired(created):
+                self._popDisk(key)
+                return None
+            self._disk.move_to_end(key)
+        try:
+            with open(os.path.join(CACHE_PATH, key + ".json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(CACHE_PATH, key), "rb") as f:
+                data = f.read()
+        except Exception as e:
+            logger.warning(f"[TTSCache] Read disk cache {key} failed: {e}")
+            with self._lock:
+                if key in self._disk: self._popDisk(key)
+            return None
+        # 旧版本缓存记录了引擎返回的编码, 现统一为原始音频
+        meta.pop("encoding", None)
+        return AudioMessage(data=data, **meta)
+
+    def _indexDisk(self, key: str) -> bool:
+        """索引外的缓存文件可能由其它worker进程写入"""
+        audioFile = os.path.join(CACHE_PATH, key)
+        if not os.path.exists(audioFile + ".json"): return False
+        try:
+            stat = os.stat(audioFile)
+        except FileNotFoundError:
+            return False
+        self._disk[key] = (stat.st_mtime, stat.st_size)
+        self._diskBytes += stat.st_size
+        return True
+
+    def _putDisk(self, key: str, output: AudioMessage):
+        if self._diskMaxBytes <= 0: return
+        data = output.data
+        meta = {"type": str(output.type), "sampleRate": output.sampleRate, "sampleWidth": output.sampleWidth}
+        if len(data) > self._diskMaxBytes: return
+        try:
+            with open(os.path.join(CACHE_PATH, key), "wb") as f:
+                f.write(data)
+            with open(os.path.join(CACHE_PATH, key + ".json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except Exception as e:
+            logger.warning(f"[TTSCache] Write disk cache {key} failed: {e}")
+            return
+        with self._lock:
+            if key in self._disk: self._popDisk(key, remove=False)
+            self._disk[key] = (time.time(), len(data))
+            self._diskBytes += len(data)
+            self._evictDisk()
+
+    def _popDisk(self, key: str, remove: bool = True):
+        _, size = self._disk.pop(key)
+        self._diskBytes -= size
+        if not remove: return
+        for path in (os.path.join(CACHE_PATH, key), os.path.join(CACHE_PATH, key + ".json")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evictDisk(self):
+        while self._disk and self._diskBytes > self._diskMaxBytes:
+            self._popDisk(next(iter(self._disk)))
+        while self._disk:
+            key = next(iter(self._disk))
+            if not self._expired(self._disk[key][0]): break
+            self._popDisk(key)
+
+def _collectMetrics() -> List[Gauge]:
+    cache = TTSCache()
+    if not cache.enable: return []
+    metrics = []
+    for key, value in cache.stats().items():
+        gauge = Gauge(f"adh_tts_cache_{key}", f"TTS cache {key}", register=False)
+        gauge.set(value)
+        metrics.append(gauge)
+    return metrics
+
+registerCollector(_collectMetrics)
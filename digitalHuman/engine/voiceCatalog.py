@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   voiceCatalog.py
+@Author  :   一力辉
+'''
+
+import time
+import asyncio
+from collections import defaultdict
+from pydantic import BaseModel
+from typing import Awaitable, Callable, Dict, List, Optional
+from digitalHuman.protocol import VoiceDesc, GENDER_TYPE
+from digitalHuman.utils import logger
+
+__all__ = ["VoiceInfo", "VoiceCatalog"]
+
+# 加载失败后的重试间隔(秒)
+VOICE_RETRY_INTERVAL = 60
+
+class VoiceInfo(BaseModel):
+    id: str
+    name: str
+    gender: GENDER_TYPE
+    locale: str = ""
+
+    def desc(self) -> VoiceDesc:
+        return VoiceDesc(name=self.name, gender=self.gender)
+
+class VoiceCatalog():
+    """
+    引擎音色目录
+    音色列表保存在内存中并按名称/id/性别/语言建立索引, 查询不访问网络
+    远程列表在后台加载, interval大于0时过期后在后台刷新, 刷新期间及失败时沿用旧列表
+    """
+    def __init__(
+        self,
+        voices: Optional[List[VoiceInfo]] = None,
+        loader: Optional[Callable[[], Awaitable[Optional[List[VoiceInfo]]]]] = None,
+        interval: float = 0
+    ):
+        self._loader = loader
+        self._interval = interval
+        # 下次加载时间, None表示不再加载
+        self._nextLoad: Optional[float] = 0 if loader else None
+        # 后台加载任务, 同时保持引用防止被回收
+        self._task: Optional[asyncio.Task] = None
+        # 是否已完成首次远程加载(无论成功与否)
+        self._loaded = loader is None
+        self.update(voices or [])
+
+    def __len__(self) -> int:
+        return len(self._voices)
+
+    def update(self, voices: List[VoiceInfo]):
+        """重建索引后整体替换, 读取方不会看到中间状态"""
+        byName: Dict[str, VoiceInfo] = {}
+        byId: Dict[str, VoiceInfo] = {}
+        byGender: Dict[GENDER_TYPE, List[VoiceInfo]] = defaultdict(list)
+        byLocale: Dict[str, List[VoiceInfo]] = defaultdict(list)
+        for voice in voices:
+            # 同名音色保留第一个
+            byName.setdefault(voice.name, voice)
+            byId.setdefault(voice.id, voice)
+            byGender[voice.gender].append(voice)
+            byLocale[voice.locale].append(voice)
+        self._voices = list(voices)
+        self._descs = [voice.desc() for voice in voices]
+        self._byName, self._byId = byName, byId
+        self._byGender, self._byLocale = dict(byGender), dict(byLocale)
+
+    def get(self, name: str) -> Optional[VoiceInfo]:
+        self.refresh()
+        return self._byName.get(name)
+
+    def getById(self, id: str) -> Optional[VoiceInfo]:
+        self.refresh()
+        return self._byId.get(id)
+
+    def list(self, gender: Optional[str] = None, locale: Optional[str] = None) -> List[VoiceDesc]:
+        self.refresh()
+        if not gender and not locale: return list(self._descs)
+        return [voice.desc() for voice in self.filter(gender, locale)]
+
+    def filter(self, gender: Optional[str] = None, locale: Optional[str] = None) -> List[VoiceInfo]:
+        self.refresh()
+        if gender and locale:
+            return [voice for voice in self._byGender.get(str(gender).upper(), []) if voice.locale == locale]
+        if gender: return list(self._byGender.get(str(gender).upper(), []))
+        if locale: return list(self._byLocale.get(locale, []))
+        return list(self._voices)
+
+    def refresh(self):
+        """到期时在后台加载, 不等待结果; 无运行中的事件循环时跳过"""
+        if self._nextLoad is None or time.monotonic() < self._nextLoad: return
+        if self._task is not None and not self._task.done(): return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self.load())
+
+    async def ready(self):
+        """等待首次远程加载完成, 之后不再等待; 用于必须查到结果的场景"""
+        if self._loaded: return
+        self.refresh()
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def load(self):
+        """加载远程音色列表, 失败时保留旧列表并稍后重试"""
+        if self._loader is None: return
+        try:
+            voices = await self._loader()
+        except Exception as e:
+            logger.warning(f"[VoiceCatalog] Load voices failed: {e}")
+            self._nextLoad = time.monotonic() + VOICE_RETRY_INTERVAL
+            return
+        finally:
+            self._loaded = True
+        # 没有远程列表
+        if voices is None:
+            self._nextLoad = None
+            return
+        self.update(voices)
+        self._nextLoad = time.monotonic() + self._interval if self._interval > 0 else None
+        logger.debug(f"[VoiceCatalog] {len(voices)} voices loaded")
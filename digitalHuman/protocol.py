@@ -4,12 +4,14 @@
 @Author  :   一力辉 
 '''
 
+import base64
 import struct
 from enum import Enum
+from functools import lru_cache
 from uuid import uuid4
 from typing import Optional, Union, List, Dict, Tuple
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from fastapi import WebSocket
 
 # ======================= 枚举类型 =======================
@@ -37,6 +39,7 @@ class EVENT_TYPE(StrEnum):
     TEXT = 'TEXT'
     THINK = 'THINK'
     TASK = 'TASK'
+    AUDIO = 'AUDIO'
     DONE = 'DONE'
     ERROR = 'ERROR'
 
@@ -75,10 +78,30 @@ class BaseMessage(BaseModel):
        return f'Message({self.model_dump()})'
 
 class AudioMessage(BaseMessage):
-    data: Optional[Union[str, bytes]] = None
+    """
+    音频消息, data统一为原始音频字节
+    传入字符串时视为base64编码并解码, 需要文本时使用base64属性
+    """
+    data: Optional[bytes] = None
     type: AUDIO_TYPE = AUDIO_TYPE.WAV
     sampleRate: int = 16000
     sampleWidth: int = 2
+    # (data, base64字符串), data被替换后重新计算
+    _base64: Optional[Tuple[bytes, str]] = PrivateAttr(default=None)
+
+    @field_validator("data", mode="before")
+    @classmethod
+    def _decodeData(cls, data):
+        if isinstance(data, str): return base64.b64decode(data)
+        if isinstance(data, (bytearray, memoryview)): return bytes(data)
+        return data
+
+    @property
+    def base64(self) -> str:
+        if not self.data: return ""
+        if self._base64 is None or self._base64[0] is not self.data:
+            self._base64 = (self.data, base64.b64encode(self.data).decode("utf-8"))
+        return self._base64[1]
 
 class TextMessage(BaseMessage):
     data: Optional[str] = None
@@ -147,6 +170,9 @@ def eventStreamConversationId(conversation_id: str) -> str:
 def eventStreamMessageId(message_id: str) -> str:
     return eventStreamResponse(EVENT_TYPE.MESSAGE_ID, message_id)
 
+def eventStreamAudio(data: str) -> str:
+    return eventStreamResponse(EVENT_TYPE.AUDIO, data)
+
 def eventStreamDone() -> str:
     return f"event: {EVENT_TYPE.DONE}\ndata: Done\n\n"
 
@@ -156,6 +182,16 @@ def eventStreamError(error: str):
 def isEventStreamResponse(message: str) -> bool:
     return message.startswith("event:")
 
+def parseEventStreamResponse(message: str) -> Tuple[str, str]:
+    """解析eventStreamResponse构造的消息, 返回(event, data)"""
+    event, data = "", ""
+    for line in message.strip("\n").split("\n"):
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data = line[len("data: "):].replace("\\n", "\n")
+    return event, data
+
 
 # ========================== websocket =============================
 # 协议常量定义
@@ -182,6 +218,9 @@ class WS_SEND_ACTION_TYPE(StrEnum):
     ENGINE_STOPPED = "ENGINE_STOPPED"  # 关闭引擎
     ERROR = "ERROR"  # 错误响应
 
+_PROTOCOL_HEADER = struct.Struct(PROTOCOL_HEADER_FORMAT)
+
+@lru_cache(maxsize=64)
 def _format_action(action_name: str) -> bytes:
     """格式化action名称为18字节，右侧用空格填充"""
     if len(action_name) > ACTION_HEADER_SIZE:
@@ -190,37 +229,62 @@ def _format_action(action_name: str) -> bytes:
         )
     return action_name.ljust(ACTION_HEADER_SIZE).encode("utf-8")
 
+@lru_cache(maxsize=64)
+def _parse_action(action: bytes) -> str:
+    return action.decode("utf-8").strip()
+
+def struct_messages(frames: List[Tuple[str, str | bytes]]) -> bytes:
+    """构造发送消息, 多帧合并为一条websocket消息"""
+    parts = []
+    for action, message in frames:
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        # 打包协议头部: action(18字节) + payload_size(4字节)
+        parts.append(_PROTOCOL_HEADER.pack(_format_action(action), len(message)))
+        parts.append(message)
+    # payload只在拼接时拷贝一次
+    return b"".join(parts)
+
 def struct_message(action: str, message: str | bytes) -> bytes:
     """构造发送消息"""
-    if isinstance(message, str):
-        message = message.encode("utf-8")
-    action_bytes = _format_action(action)
-    payload_size = len(message)
-    # 打包协议头部: action(18字节) + payload_size(4字节)
-    header = struct.pack(PROTOCOL_HEADER_FORMAT, action_bytes, payload_size)
-    return header + message
+    return struct_messages([(action, message)])
 
-def parse_message(message: bytes) -> Tuple[str, bytes]:
-    """解析接收到的消息"""
-    if len(message) < PROTOCOL_HEADER_SIZE:
+def _unpack_frame(view: memoryview, offset: int) -> Tuple[str, memoryview, int]:
+    """从offset处解析一帧, 返回(action, payload视图, 下一帧offset)"""
+    if len(view) - offset < PROTOCOL_HEADER_SIZE:
         raise ValueError(
-            f"Message too short: {len(message)} bytes, expected at least {PROTOCOL_HEADER_SIZE}"
+            f"Message too short: {len(view) - offset} bytes, expected at least {PROTOCOL_HEADER_SIZE}"
         )
-    # 解析协议头部: action(18字节) + payload_size(4字节)
-    action, payload_size = struct.unpack(
-        PROTOCOL_HEADER_FORMAT, message[:PROTOCOL_HEADER_SIZE]
-    )
-
-    expected_total_size = PROTOCOL_HEADER_SIZE + payload_size
-    if len(message) != expected_total_size:
+    action, payload_size = _PROTOCOL_HEADER.unpack_from(view, offset)
+    begin = offset + PROTOCOL_HEADER_SIZE
+    end = begin + payload_size
+    if end > len(view):
         raise ValueError(
-            f"Message size mismatch: got {len(message)} bytes, expected {expected_total_size}"
+            f"Message size mismatch: got {len(view) - offset} bytes, expected {PROTOCOL_HEADER_SIZE + payload_size}"
         )
+    return _parse_action(action), view[begin:end], end
+
+def parse_messages(message: bytes) -> List[Tuple[str, memoryview]]:
+    """解析消息(支持单条消息包含多帧), payload为原消息的memoryview, 不做拷贝"""
+    view = memoryview(message)
+    frames = []
+    offset = 0
+    while True:
+        action, payload, offset = _unpack_frame(view, offset)
+        frames.append((action, payload))
+        if offset == len(view): break
+    return frames
 
-    # 提取payload
-    payload = message[PROTOCOL_HEADER_SIZE : PROTOCOL_HEADER_SIZE + payload_size] if payload_size > 0 else b""
-
-    return (action.decode("utf-8").strip(), payload)
+def parse_message(message: bytes) -> Tuple[str, bytes]:
+    """解析接收消息"""
+    view = memoryview(message)
+    action, payload, end = _unpack_frame(view, 0)
+    # 验证消息长度
+    if end != len(view):
+        raise ValueError(
+            f"Message size mismatch: got {len(message)} bytes, expected {end}"
+        )
+    return (action, payload.tobytes())
 
 class WebSocketHandler(): 
     """
@@ -246,6 +310,17 @@ class WebSocketHandler():
         await ws.send_bytes(data)
         # logger.debug(f"Sent action: {action}, payload size: {len(data) - PROTOCOL_HEADER_SIZE} bytes")
     
+    @staticmethod
+    async def send_messages(ws: WebSocket, frames: List[Tuple[str, str | bytes]]) -> None:
+        """多帧合并为一条WebSocket消息发送"""
+        await ws.send_bytes(struct_messages(frames))
+
+    @staticmethod
+    async def recv_messages(ws: WebSocket) -> List[Tuple[str, memoryview]]:
+        """接收WebSocket消息, 返回消息内的所有帧(payload为memoryview)"""
+        message = await ws.receive_bytes()
+        return parse_messages(message)
+
     @staticmethod
     async def recv_message(ws: WebSocket) -> Tuple[str, bytes]:
         """接收WebSocket消息"""
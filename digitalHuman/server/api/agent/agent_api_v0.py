@@ -4,7 +4,7 @@
 @Author  :   一力辉 
 '''
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 from digitalHuman.utils import config
 from digitalHuman.agent import AgentPool
@@ -19,46 +19,28 @@ agentPool = AgentPool()
 
 # ========================= 获取agent支持列表 ===========================
 @router.get("/engine", response_model=EngineListResp, summary="Get Agent Engine List")
-def api_get_agent_list():
+def api_get_agent_list(request: Request):
     """
     获取agent支持引擎列表
     """
-    response = Response()
-    try:
-        response.data = get_agent_list()
-    except Exception as e:
-        response.data = []
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineListResp), status_code=200)
+    return agentCatalog.response(request, "list")
 
 # ========================= 获取agent默认引擎 ===========================
 @router.get("/engine/default", response_model=EngineDefaultResp, summary="Get Default Agent Engine")
-def api_get_agent_default():
+def api_get_agent_default(request: Request):
     """
     获取默认agent引擎
     """
-    response = Response()
-    try:
-        response.data = get_agent_default()
-    except Exception as e:
-        response.data = ""
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineDefaultResp), status_code=200)
+    return agentCatalog.response(request, "default")
 
 
 # ========================= 获取agent引擎参数列表 ===========================
 @router.get("/engine/{engine}", response_model=EngineParam, summary="Get Agent Engine Param")
-def api_get_agent_param(engine: str):
+def api_get_agent_param(request: Request, engine: str):
     """
     获取agent引擎配置参数列表
     """
-    response = Response()
-    try:
-        response.data = get_agent_param(engine)
-    except Exception as e:
-        response.data = []
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineParam), status_code=200)
+    return agentCatalog.response(request, "param", engine)
 
 # ========================= 创建agent会话 ===========================
 @router.post("/engine/{engine}", response_model=ConversationIdResp, summary="Create Agent Conversation")
@@ -74,6 +56,33 @@ async def api_create_agent_conversation(engine: str, item: ConversationInput):
         response.error(str(e))
     return JSONResponse(content=response.validate(ConversationIdResp), status_code=200)
 
+# ========================= 获取流式请求耗时 ===========================
+@router.get("/trace", response_model=TraceListResp, summary="Get Recent Agent Stream Traces")
+def api_get_agent_traces(limit: int = 20):
+    """
+    获取最近的agent流式请求耗时记录, 按时间倒序
+    """
+    response = Response()
+    try:
+        response.data = get_agent_traces(limit)
+    except Exception as e:
+        response.data = []
+        response.error(str(e))
+    return JSONResponse(content=response.validate(TraceListResp), status_code=200)
+
+@router.get("/trace/{request_id}", response_model=TraceResp, summary="Get Agent Stream Trace")
+def api_get_agent_trace(request_id: str):
+    """
+    按request-id获取agent流式请求耗时: 上游建连、首个THINK/TEXT事件、chunk间隔及DONE
+    """
+    response = Response()
+    try:
+        response.data = get_agent_trace(request_id)
+    except Exception as e:
+        response.data = {}
+        response.error(str(e))
+    return JSONResponse(content=response.validate(TraceResp), status_code=200)
+
 # ========================= 执行agent引擎 ===========================
 @router.post("/engine", summary="AI Agent Inference")
 async def api_agent_infer(items: AgentEngineInput, header: HeaderInfo):
@@ -81,8 +90,24 @@ async def api_agent_infer(items: AgentEngineInput, header: HeaderInfo):
         items.engine = config.SERVER.AGENTS.DEFAULT
     response = Response()
     try:
-        streamContent = agent_infer_stream(header, items)
-        return StreamingResponse(streamContent, media_type="text/event-stream")
+        streamContent = trace_stream(header, items.engine, agent_infer_stream(header, items))
+        return StreamingResponse(streamContent, media_type="text/event-stream", headers={"request-id": header.request_id})
+    except Exception as e:
+        response.error(str(e))
+        return StreamingResponse(streamInteralError("Interal Error"), media_type="text/event-stream")
+
+# ========================= 执行agent引擎并合成语音 ===========================
+@router.post("/speech", summary="AI Agent Inference With Speech")
+async def api_agent_speech_infer(items: AgentSpeechEngineInput, header: HeaderInfo):
+    """
+    执行agent引擎, 服务端断句后直接进行tts, 音频以AUDIO事件返回
+    """
+    if items.engine.lower() == "default":
+        items.engine = config.SERVER.AGENTS.DEFAULT
+    response = Response()
+    try:
+        streamContent = trace_stream(header, items.engine, agent_speech_infer_stream(header, items))
+        return StreamingResponse(streamContent, media_type="text/event-stream", headers={"request-id": header.request_id})
     except Exception as e:
         response.error(str(e))
-        return StreamingResponse(streamInteralError("Interal Error"), media_type="text/event-stream")
\ No newline at end of file
+        return StreamingResponse(streamInteralError("Interal Error"), media_type="text/event-stream")
@@ -5,7 +5,7 @@
 '''
 
 import json
-from fastapi import APIRouter, UploadFile, Form
+from fastapi import APIRouter, Request, UploadFile, Form
 from fastapi.responses import JSONResponse
 from digitalHuman.server.reponse import Response
 from digitalHuman.server.header import HeaderInfo
@@ -17,46 +17,28 @@ enginePool = EnginePool()
 
 # ========================= 获取asr支持列表 ===========================
 @router.get("/engine", response_model=EngineListResp, summary="Get ASR Engine List")
-def api_get_asr_list():
+def api_get_asr_list(request: Request):
     """
     获取asr支持引擎列表
     """
-    response = Response()
-    try:
-        response.data = get_asr_list()
-    except Exception as e:
-        response.data = []
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineListResp), status_code=200)
+    return asrCatalog.response(request, "list")
 
 # ========================= 获取asr默认引擎 ===========================
 @router.get("/engine/default", response_model=EngineDefaultResp, summary="Get Default ASR Engine")
-def api_get_asr_default():
+def api_get_asr_default(request: Request):
     """
     获取默认asr引擎
     """
-    response = Response()
-    try:
-        response.data = get_asr_default()
-    except Exception as e:
-        response.data = ""
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineDefaultResp), status_code=200)
+    return asrCatalog.response(request, "default")
 
 
 # ========================= 获取asr引擎参数列表 ===========================
 @router.get("/engine/{engine}", response_model=EngineParam, summary="Get ASR Engine param")
-def api_get_asr_param(engine: str):
+def api_get_asr_param(request: Request, engine: str):
     """
     获取asr引擎配置参数列表
     """
-    response = Response()
-    try:
-        response.data = get_asr_param(engine)
-    except Exception as e:
-        response.data = []
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineParam), status_code=200)
+    return asrCatalog.response(request, "param", engine)
 
 
 # ========================= 执行asr引擎 ===========================
@@ -5,8 +5,11 @@
 '''
 
 from fastapi import APIRouter, WebSocket
+from fastapi.responses import JSONResponse, PlainTextResponse
 from digitalHuman.server.ws import WebsocketManager
-from digitalHuman.utils import logger
+from digitalHuman.server.reponse import Response
+from digitalHuman.server.models import StatsResp
+from digitalHuman.utils import logger, httpClientStats, renderMetrics, METRICS_CONTENT_TYPE
 
 
 router = APIRouter(prefix="/common/v0")
@@ -28,3 +31,25 @@ async def websocket_heartbeat(websocket: WebSocket):
     except Exception as e:
         logger.error(f"[SERVER] websocket_heartbeat: {str(e)}")
         wsManager.disconnect(websocket)
+
+# ========================= http连接池状态 ===========================
+@router.get("/stats/http", response_model=StatsResp, summary="Get HTTP Client Pool Stats")
+def api_get_http_stats():
+    """
+    获取访问上游服务的http连接池使用情况
+    """
+    response = Response()
+    try:
+        response.data = httpClientStats()
+    except Exception as e:
+        response.data = {}
+        response.error(str(e))
+    return JSONResponse(content=response.validate(StatsResp), status_code=200)
+
+# ========================= 监控指标 ===========================
+@router.get("/metrics", response_class=PlainTextResponse, summary="Get Metrics")
+def api_get_metrics():
+    """
+    Prometheus文本格式的监控指标
+    """
+    return PlainTextResponse(content=renderMetrics(), media_type=METRICS_CONTENT_TYPE)
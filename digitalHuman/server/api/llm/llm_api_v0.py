@@ -4,7 +4,7 @@
 @Author  :   一力辉 
 '''
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 from digitalHuman.protocol import TextMessage
 from digitalHuman.engine import EnginePool
@@ -18,46 +18,28 @@ enginePool = EnginePool()
 
 # ========================= 获取asr支持列表 ===========================
 @router.get("/engine", response_model=EngineListResp, summary="Get LLM Engine List")
-def api_get_llm_list():
+def api_get_llm_list(request: Request):
     """
     获取asr支持引擎列表
     """
-    response = Response()
-    try:
-        response.data = get_llm_list()
-    except Exception as e:
-        response.data = []
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineListResp), status_code=200)
+    return llmCatalog.response(request, "list")
 
 # ========================= 获取asr默认引擎 ===========================
 @router.get("/engine/default", response_model=EngineDefaultResp, summary="Get Default LLM Engine")
-def api_get_asr_default():
+def api_get_asr_default(request: Request):
     """
     获取默认asr引擎
     """
-    response = Response()
-    try:
-        response.data = get_llm_default()
-    except Exception as e:
-        response.data = ""
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineDefaultResp), status_code=200)
+    return llmCatalog.response(request, "default")
 
 
 # ========================= 获取asr引擎参数列表 ===========================
 @router.get("/engine/{engine}", response_model=EngineParam, summary="Get LLM Engine param")
-def api_get_asr_param(engine: str):
+def api_get_asr_param(request: Request, engine: str):
     """
     获取asr引擎配置参数列表
     """
-    response = Response()
-    try:
-        response.data = get_llm_param(engine)
-    except Exception as e:
-        response.data = []
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineParam), status_code=200)
+    return llmCatalog.response(request, "param", engine)
 
 
 # ========================= 执行asr引擎 ===========================
@@ -5,9 +5,10 @@
 '''
 
 import json
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
-from digitalHuman.utils import config, logger
+from contextlib import aclosing
+from fastapi import APIRouter, WebSocket, Request
+from fastapi.responses import JSONResponse, StreamingResponse, Response as HttpResponse
+from digitalHuman.utils import config, logger, audioMimeType
 from digitalHuman.protocol import AudioMessage
 from digitalHuman.engine import EnginePool
 from digitalHuman.server.reponse import Response
@@ -20,31 +21,19 @@ enginePool = EnginePool()
 
 # ========================= 获取tts支持列表 ===========================
 @router.get("/engine", response_model=EngineListResp, summary="Get TTS Engine List")
-def api_get_tts_list():
+def api_get_tts_list(request: Request):
     """
     获取tts支持引擎列表
     """
-    response = Response()
-    try:
-        response.data = get_tts_list()
-    except Exception as e:
-        response.data = []
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineListResp), status_code=200)
+    return ttsCatalog.response(request, "list")
 
 # ========================= 获取tts默认引擎 ===========================
 @router.get("/engine/default", response_model=EngineDefaultResp, summary="Get Default TTS Engine")
-def api_get_tts_default():
+def api_get_tts_default(request: Request):
     """
     获取默认tts引擎
     """
-    response = Response()
-    try:
-        response.data = get_tts_default()
-    except Exception as e:
-        response.data = ""
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineDefaultResp), status_code=200)
+    return ttsCatalog.response(request, "default")
 
 # ========================= 获取tts引擎声音列表 ===========================
 @router.get("/engine/{engine}/voice", response_model=VoiceListResp, summary="Get TTS Engine Voice List")
@@ -64,34 +53,68 @@ async def api_get_tts_voice(engine: str, config: str = '{}'):
 
 # ========================= 获取tts引擎参数列表 ===========================
 @router.get("/engine/{engine}", response_model=EngineParam, summary="Get TTS Engine Param")
-def api_get_tts_param(engine: str):
+def api_get_tts_param(request: Request, engine: str):
     """
     获取tts引擎配置参数列表
     """
-    response = Response()
-    try:
-        response.data = get_tts_param(engine)
-    except Exception as e:
-        response.data = []
-        response.error(str(e))
-    return JSONResponse(content=response.validate(EngineParam), status_code=200)
+    return ttsCatalog.response(request, "param", engine)
 
 
 # ========================= 执行tts引擎 ===========================
 @router.post("/engine", response_model=TTSEngineOutput, summary="Text To Speech Inference")
-async def api_tts_infer(item: TTSEngineInput, header: HeaderInfo):
+async def api_tts_infer(item: TTSEngineInput, header: HeaderInfo, request: Request):
     """
     执行tts引擎
+    请求头Accept为audio/*时直接返回音频, 同/engine/audio
     """
+    if request.headers.get("accept", "").startswith("audio/"):
+        return await api_tts_infer_audio(item, header)
     if item.engine.lower() == "default":
         item.engine = config.SERVER.ENGINES.TTS.DEFAULT
     response = Response()
     try:
         output: AudioMessage = await tts_infer(header, item)
-        response.data = output.data
+        response.data = output.base64
         response.sampleRate = output.sampleRate
         response.sampleWidth = output.sampleWidth
     except Exception as e:
         response.data = None
         response.error(str(e))
-    return JSONResponse(content=response.validate(TTSEngineOutput), status_code=200)
\ No newline at end of file
+    return JSONResponse(content=response.validate(TTSEngineOutput), status_code=200)
+
+@router.post("/engine/audio", summary="Text To Speech Inference With Binary Audio")
+async def api_tts_infer_audio(item: TTSEngineInput, header: HeaderInfo, stream: bool = False):
+    """
+    执行tts引擎, 直接返回音频数据, 采样率等信息放在响应头中
+    stream为True时引擎边合成边返回(chunked)
+    """
+    response = Response()
+    try:
+        if stream:
+            engine, chunks = tts_infer_stream_audio(header, item)
+            # 首块用于判断音频类型, 同时合成失败时能返回错误
+            first = await anext(chunks, b"")
+            async def body():
+                # 客户端断开时及时关闭引擎的上游连接
+                async with aclosing(chunks):
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+            headers = {"X-Sample-Rate": str(engine.SAMPLE_RATE), "X-Sample-Width": str(engine.SAMPLE_WIDTH)}
+            return StreamingResponse(body(), media_type=audioMimeType(first), headers=headers)
+        output: AudioMessage = await tts_infer(header, item)
+        data = audio_bytes(output)
+        headers = {"X-Sample-Rate": str(output.sampleRate), "X-Sample-Width": str(output.sampleWidth)}
+        return HttpResponse(content=data, media_type=audioMimeType(data, output.type), headers=headers)
+    except Exception as e:
+        response.data = None
+        response.error(str(e))
+    return JSONResponse(content=response.validate(TTSEngineOutput), status_code=500)
+
+# 流式
+@router.websocket("/engine/stream")
+async def api_tts_infer_stream(header: HeaderInfo, websocket: WebSocket):
+    """
+    流式tts引擎
+    """
+    await tts_stream_infer(header, websocket)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   catalog.py
+@Author  :   一力辉
+'''
+
+import hashlib
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response as HttpResponse
+from digitalHuman.protocol import EngineDesc, ParamDesc
+from digitalHuman.utils import logger
+from digitalHuman.server.reponse import Response
+from digitalHuman.server.models import EngineListResp, EngineDefaultResp, EngineParam
+
+__all__ = ["CatalogCache", "EngineCatalog", "setupCatalogs", "etagMatch"]
+
+# 浏览器每次使用前向服务端校验etag
+CATALOG_CACHE_CONTROL = "no-cache"
+
+def etagMatch(ifNoneMatch: Optional[str], etag: str) -> bool:
+    """If-None-Match使用弱比较, 支持多个值及*"""
+    if not ifNoneMatch: return False
+    for value in ifNoneMatch.split(","):
+        value = value.strip()
+        if value == "*": return True
+        if value.startswith("W/"): value = value[2:]
+        if value == etag: return True
+    return False
+
+class CatalogCache():
+    """
+    引擎列表、默认引擎及参数列表等目录接口的序列化缓存
+    按pool的配置版本失效, 版本不变时直接返回预先序列化的响应体
+    """
+    def __init__(self):
+        # key -> (配置版本, 响应体, etag)
+        self._entries: Dict[Hashable, Tuple[int, bytes, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, revision: int, build: Callable[[], Any]) -> Tuple[bytes, str]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == revision:
+            return entry[1], entry[2]
+        # 与JSONResponse相同的序列化方式
+        body = JSONResponse(content=build()).body
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self._entries[key] = (revision, body, etag)
+        return body, etag
+
+    def clear(self):
+        self._entries.clear()
+
+# 已注册的目录, pool初始化后统一预先生成
+_catalogs: List["EngineCatalog"] = []
+
+class EngineCatalog():
+    """
+    一类引擎的目录接口: 引擎列表(list)、默认引擎(default)及引擎参数列表(param)
+    """
+    # 接口类型 -> (响应模型, 失败时的数据)
+    KINDS: Dict[str, Tuple[Type[BaseModel], Any]] = {
+        "list": (EngineListResp, []),
+        "default": (EngineDefaultResp, ""),
+        "param": (EngineParam, []),
+    }
+
+    def __init__(
+        self,
+        name: str,
+        revision: Callable[[], int],
+        names: Callable[[], Iterable[str]],
+        getList: Callable[[], List[EngineDesc]],
+        getDefault: Callable[[], EngineDesc],
+        getParam: Callable[[str], List[ParamDesc]]
+    ):
+        self.name = name
+        self._revision = revision
+        self._names = names
+        self._fetch = {"list": getList, "default": getDefault, "param": getParam}
+        self._cache = CatalogCache()
+        _catalogs.append(self)
+
+    def _build(self, kind: str, args: Tuple) -> Any:
+        response = Response()
+        response.data = self._fetch[kind](*args)
+        return response.validate(self.KINDS[kind][0])
+
+    def get(self, kind: str, *args) -> Tuple[bytes, str]:
+        return self._cache.get((kind, *args), self._revision(), lambda: self._build(kind, args))
+
+    def setup(self):
+        """预先生成所有目录, 单个失败不影响其它"""
+        for kind, args in [("list", ()), ("default", ())] + [("param", (name,)) for name in self._names()]:
+            try:
+                self.get(kind, *args)
+            except Exception as e:
+                logger.warning(f"[Catalog] {self.name} {kind}{list(args)} is not cached: {e}")
+
+    def response(self, request: Request, kind: str, *args) -> HttpResponse:
+        """
+        返回缓存的响应体, 命中If-None-Match时返回304
+        获取失败时不缓存, 按原有格式返回错误
+        """
+        try:
+            body, etag = self.get(kind, *args)
+        except Exception as e:
+            response = Response()
+            response.data = self.KINDS[kind][1]
+            response.error(str(e))
+            return JSONResponse(content=response.validate(self.KINDS[kind][0]), status_code=200)
+        headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+        if etagMatch(request.headers.get("if-none-match"), etag):
+            return HttpResponse(status_code=304, headers=headers)
+        return HttpResponse(content=body, media_type="application/json", headers=headers)
+
+def setupCatalogs():
+    for catalog in _catalogs:
+        catalog.setup()
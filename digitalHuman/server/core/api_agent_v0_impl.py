@@ -5,24 +5,37 @@
 '''
 
 
+import json
+import asyncio
 from typing import List, Dict
 from digitalHuman.agent import AgentPool
-from digitalHuman.utils import config
+from digitalHuman.engine import EnginePool, BaseTTSEngine, TTSCache
+from digitalHuman.utils import config, logger, SentenceSplitter, StreamTraceStore
 from digitalHuman.protocol import *
-from digitalHuman.server.models import AgentEngineInput
+from digitalHuman.server.catalog import EngineCatalog
+from digitalHuman.server.models import AgentEngineInput, AgentSpeechEngineInput
 
 agentPool = AgentPool()
+enginePool = EnginePool()
+ttsCache = TTSCache()
+traceConfig = config.SERVER.get("TRACE", None) or {}
+traceStore = StreamTraceStore(traceConfig.get("MAX_TRACES", 1000), traceConfig.get("MAX_GAPS", 512)) if traceConfig.get("ENABLE", True) else None
+
+# 单个请求同时进行的tts数量
+SPEECH_TTS_CONCURRENCY = 3
 
 def get_agent_list() -> List[EngineDesc]:
     agents = agentPool.list()
-    return [agentPool.get(agent).desc() for agent in agents]
+    return [agentPool.getDesc(agent) for agent in agents]
 
 def get_agent_default() -> EngineDesc:
-    return agentPool.get(config.SERVER.AGENTS.DEFAULT).desc()
+    return agentPool.getDesc(config.SERVER.AGENTS.DEFAULT)
 
 def get_agent_param(name: str) -> List[ParamDesc]:
-    engine = agentPool.get(name)
-    return engine.parameters()
+    return agentPool.getParameters(name)
+
+# 目录接口缓存, agent池重新setup后失效
+agentCatalog = EngineCatalog("agent", lambda: agentPool.revision, agentPool.list, get_agent_list, get_agent_default, get_agent_param)
 
 async def create_agent_conversation(name: str, param: Dict) -> str:
     engine = agentPool.get(name)
@@ -32,4 +45,108 @@ async def create_agent_conversation(name: str, param: Dict) -> str:
 def agent_infer_stream(user: UserDesc, items: AgentEngineInput):
     input = TextMessage(data=items.data)
     streamContent = agentPool.get(items.engine).run(input=input, user=user, streaming=True, conversation_id=items.conversation_id, **items.config)
-    return streamContent
\ No newline at end of file
+    return streamContent
+
+def trace_stream(user: UserDesc, engine: str, streamContent):
+    """
+    按request-id记录流式输出耗时, 未携带request-id时生成并回填
+    """
+    if traceStore is None: return streamContent
+    trace = traceStore.start(user.request_id, engine)
+    user.request_id = trace.requestId
+    return traceStore.trace(trace, streamContent)
+
+def get_agent_trace(request_id: str) -> Dict:
+    if traceStore is None: raise RuntimeError("Trace is disabled")
+    trace = traceStore.get(request_id)
+    if trace is None: raise RuntimeError(f"Trace not found: {request_id}")
+    return trace.toDict()
+
+def get_agent_traces(limit: int) -> List[Dict]:
+    if traceStore is None: raise RuntimeError("Trace is disabled")
+    return [trace.toDict() for trace in traceStore.recent(limit)]
+
+def agent_speech_infer_stream(user: UserDesc, items: AgentSpeechEngineInput):
+    """
+    agent流式输出边断句边tts
+    agent的事件原样透传, 合成的音频按断句顺序以AUDIO事件返回
+    引擎在返回流之前获取, 引擎不存在时由调用方在响应开始前处理
+    """
+    if items.tts.engine.lower() == "default":
+        items.tts.engine = config.SERVER.ENGINES.TTS.DEFAULT
+    agentPool.get(items.engine)
+    ttsEngine = enginePool.getEngine(ENGINE_TYPE.TTS, items.tts.engine)
+    return _speech_stream(user, items, ttsEngine)
+
+async def _speech_stream(user: UserDesc, items: AgentSpeechEngineInput, ttsEngine: BaseTTSEngine):
+    outputQueue: asyncio.Queue = asyncio.Queue()
+    # 按断句顺序存放tts任务, None为结束标志
+    ttsQueue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(SPEECH_TTS_CONCURRENCY)
+
+    async def synthesize(text: str) -> AudioMessage:
+        async with semaphore:
+            return await ttsCache.run(ttsEngine, input=TextMessage(data=text), user=user, **items.tts.config)
+
+    def schedule(sentences: List[str]):
+        for sentence in sentences:
+            ttsQueue.put_nowait((sentence, asyncio.create_task(synthesize(sentence))))
+
+    async def textProducer():
+        splitter = SentenceSplitter()
+        try:
+            async for message in agent_infer_stream(user, items):
+                event, data = parseEventStreamResponse(message)
+                # DONE等待音频全部返回后再发送
+                if event == EVENT_TYPE.DONE: continue
+                await outputQueue.put(message)
+                if event == EVENT_TYPE.TEXT:
+                    schedule(splitter.feed(data))
+            schedule(splitter.flush())
+        finally:
+            ttsQueue.put_nowait(None)
+
+    async def audioProducer():
+        index = 0
+        while True:
+            item = await ttsQueue.get()
+            if item is None: break
+            sentence, task = item
+            try:
+                audio: AudioMessage = await task
+            except Exception as e:
+                logger.error(f"[SERVER] agent_speech_infer_stream tts error: {e}", exc_info=True)
+                await outputQueue.put(eventStreamError(str(e)))
+                continue
+            await outputQueue.put(eventStreamAudio(json.dumps({
+                "index": index,
+                "text": sentence,
+                "data": audio.base64,
+                "type": str(audio.type),
+                "sampleRate": audio.sampleRate,
+                "sampleWidth": audio.sampleWidth
+            }, ensure_ascii=False)))
+            index += 1
+
+    async def pipeline():
+        try:
+            await asyncio.gather(textProducer(), audioProducer())
+        except Exception as e:
+            logger.error(f"[SERVER] agent_speech_infer_stream error: {e}", exc_info=True)
+            await outputQueue.put(eventStreamError(str(e)))
+        finally:
+            await outputQueue.put(None)
+
+    pipelineTask = asyncio.create_task(pipeline())
+    try:
+        while True:
+            message = await outputQueue.get()
+            if message is None: break
+            yield message
+        yield eventStreamDone()
+    finally:
+        # 客户端断开时取消未完成的任务
+        pipelineTask.cancel()
+        while not ttsQueue.empty():
+            item = ttsQueue.get_nowait()
+            if item is not None: item[1].cancel()
@@ -7,8 +7,9 @@
 import json
 from typing import List
 from digitalHuman.engine import EnginePool
-from digitalHuman.utils import config
+from digitalHuman.utils import config, logger, trimSilence
 from digitalHuman.protocol import *
+from digitalHuman.server.catalog import EngineCatalog
 from digitalHuman.server.models import *
 from digitalHuman.server.ws import *
 
@@ -16,14 +17,16 @@ enginePool = EnginePool()
 
 def get_asr_list() -> List[EngineDesc]:
     engines = enginePool.listEngine(ENGINE_TYPE.ASR)
-    return [enginePool.getEngine(ENGINE_TYPE.ASR, engine).desc() for engine in engines]
+    return [enginePool.getEngineDesc(ENGINE_TYPE.ASR, engine) for engine in engines]
 
 def get_asr_default() -> EngineDesc:
-    return enginePool.getEngine(ENGINE_TYPE.ASR, config.SERVER.ENGINES.ASR.DEFAULT).desc()
+    return enginePool.getEngineDesc(ENGINE_TYPE.ASR, config.SERVER.ENGINES.ASR.DEFAULT)
 
 def get_asr_param(name: str) -> List[ParamDesc]:
-    engine = enginePool.getEngine(ENGINE_TYPE.ASR, name)
-    return engine.parameters()
+    return enginePool.getEngineParameters(ENGINE_TYPE.ASR, name)
+
+# 目录接口缓存, 引擎池重新setup后失效
+asrCatalog = EngineCatalog("asr", lambda: enginePool.revision, lambda: enginePool.listEngine(ENGINE_TYPE.ASR), get_asr_list, get_asr_default, get_asr_param)
 
 async def asr_infer(user: UserDesc, items: ASREngineInput) -> TextMessage:
     if items.engine.lower() == "default":
@@ -32,6 +35,20 @@ async def asr_infer(user: UserDesc, items: ASREngineInput) -> TextMessage:
     engine = enginePool.getEngine(ENGINE_TYPE.ASR, items.engine)
     if engine.inferType != INFER_TYPE.NORMAL:
         raise Exception("ASR engine {} not support infer type {}".format(items.engine, engine.inferType))
+    vadCfg = config.SERVER.ENGINES.ASR.get("VAD", None)
+    if vadCfg and vadCfg.ENABLE and input.type == AUDIO_TYPE.WAV and input.data:
+        trimmed, duration, trimmedDuration = trimSilence(
+            input.data,
+            thresholdDb=vadCfg.get("THRESHOLD_DB", -40),
+            paddingMs=vadCfg.get("PADDING_MS", 200)
+        )
+        logger.debug(f"[SERVER] asr_infer vad duration: {duration:.2f}s, trimmed: {trimmedDuration:.2f}s")
+        if trimmed is None:
+            if vadCfg.get("DROP_SILENT", True):
+                # 全部静音不调用引擎
+                return TextMessage(data="")
+        else:
+            input.data = trimmed
     output: TextMessage = await engine.run(input=input, user=user, **items.config)
     return output
 
@@ -9,17 +9,20 @@ from typing import List
 from digitalHuman.engine import EnginePool
 from digitalHuman.utils import config
 from digitalHuman.protocol import ParamDesc, EngineDesc, ENGINE_TYPE, UserDesc, AudioMessage, TextMessage
+from digitalHuman.server.catalog import EngineCatalog
 from digitalHuman.server.models import LLMEngineInput
 
 enginePool = EnginePool()
 
 def get_llm_list() -> List[EngineDesc]:
     engines = enginePool.listEngine(ENGINE_TYPE.LLM)
-    return [enginePool.getEngine(ENGINE_TYPE.LLM, engine).desc() for engine in engines]
+    return [enginePool.getEngineDesc(ENGINE_TYPE.LLM, engine) for engine in engines]
 
 def get_llm_default() -> EngineDesc:
-    return enginePool.getEngine(ENGINE_TYPE.LLM, config.SERVER.ENGINES.LLM.DEFAULT).desc()
+    return enginePool.getEngineDesc(ENGINE_TYPE.LLM, config.SERVER.ENGINES.LLM.DEFAULT)
 
 def get_llm_param(name: str) -> List[ParamDesc]:
-    engine = enginePool.getEngine(ENGINE_TYPE.LLM, name)
-    return engine.parameters()
\ No newline at end of file
+    return enginePool.getEngineParameters(ENGINE_TYPE.LLM, name)
+
+# 目录接口缓存, 引擎池重新setup后失效
+llmCatalog = EngineCatalog("llm", lambda: enginePool.revision, lambda: enginePool.listEngine(ENGINE_TYPE.LLM), get_llm_list, get_llm_default, get_llm_param)
\ No newline at end of file
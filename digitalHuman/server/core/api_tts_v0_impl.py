@@ -5,20 +5,24 @@
 '''
 
 
-from typing import List, Dict
-from digitalHuman.engine import EnginePool, BaseTTSEngine
-from digitalHuman.utils import config
-from digitalHuman.protocol import ParamDesc, EngineDesc, ENGINE_TYPE, UserDesc, AudioMessage, TextMessage, VoiceDesc
-from digitalHuman.server.models import TTSEngineInput
+from contextlib import aclosing
+from typing import List, Dict, AsyncGenerator, Tuple
+from fastapi import WebSocket, WebSocketDisconnect
+from digitalHuman.engine import EnginePool, BaseTTSEngine, TTSCache
+from digitalHuman.utils import config, logger
+from digitalHuman.protocol import *
+from digitalHuman.server.catalog import EngineCatalog
+from digitalHuman.server.models import TTSEngineInput, EngineInput
 
 enginePool = EnginePool()
+ttsCache = TTSCache()
 
 def get_tts_list() -> List[EngineDesc]:
     engines = enginePool.listEngine(ENGINE_TYPE.TTS)
-    return [enginePool.getEngine(ENGINE_TYPE.TTS, engine).desc() for engine in engines]
+    return [enginePool.getEngineDesc(ENGINE_TYPE.TTS, engine) for engine in engines]
 
 def get_tts_default() -> EngineDesc:
-    return enginePool.getEngine(ENGINE_TYPE.TTS, config.SERVER.ENGINES.TTS.DEFAULT).desc()
+    return enginePool.getEngineDesc(ENGINE_TYPE.TTS, config.SERVER.ENGINES.TTS.DEFAULT)
 
 async def get_tts_voice(name: str, **kwargs) -> List[VoiceDesc]:
     engine: BaseTTSEngine = enginePool.getEngine(ENGINE_TYPE.TTS, name)
@@ -26,13 +30,81 @@ async def get_tts_voice(name: str, **kwargs) -> List[VoiceDesc]:
     return voices
 
 def get_tts_param(name: str) -> List[ParamDesc]:
-    engine = enginePool.getEngine(ENGINE_TYPE.TTS, name)
-    return engine.parameters()
+    return enginePool.getEngineParameters(ENGINE_TYPE.TTS, name)
+
+# 目录接口缓存, 引擎池重新setup后失效
+ttsCatalog = EngineCatalog("tts", lambda: enginePool.revision, lambda: enginePool.listEngine(ENGINE_TYPE.TTS), get_tts_list, get_tts_default, get_tts_param)
 
 async def tts_infer(user: UserDesc, item: TTSEngineInput) -> AudioMessage:
     if item.engine.lower() == "default":
         item.engine = config.SERVER.ENGINES.TTS.DEFAULT
     input = TextMessage(data=item.data)
     engine = enginePool.getEngine(ENGINE_TYPE.TTS, item.engine)
-    output: AudioMessage = await engine.run(input=input, user=user, **item.config)
-    return output
\ No newline at end of file
+    output: AudioMessage = await ttsCache.run(engine, input=input, user=user, **item.config)
+    return output
+
+def audio_bytes(output: AudioMessage) -> bytes:
+    if not output or not output.data: return b""
+    return output.data
+
+def tts_infer_stream_audio(user: UserDesc, item: TTSEngineInput) -> Tuple[BaseTTSEngine, AsyncGenerator[bytes, None]]:
+    """引擎流式合成, 返回引擎及按块返回原始音频的生成器"""
+    if item.engine.lower() == "default":
+        item.engine = config.SERVER.ENGINES.TTS.DEFAULT
+    engine: BaseTTSEngine = enginePool.getEngine(ENGINE_TYPE.TTS, item.engine)
+    return engine, engine.stream(input=TextMessage(data=item.data), user=user, **item.config)
+
+async def tts_stream_infer(user: UserDesc, websocket: WebSocket):
+    try:
+        await _tts_stream_session(user, websocket)
+    except WebSocketDisconnect:
+        # 客户端断开属于正常结束
+        logger.debug("[SERVER] tts_stream_infer client disconnected")
+
+async def _tts_stream_session(user: UserDesc, websocket: WebSocket):
+    await websocket.accept()
+    client_waitting = True
+    while client_waitting:
+        action, payload = await WebSocketHandler.recv_message(websocket)
+        match action:
+            case WS_RECV_ACTION_TYPE.PING:
+                await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.PONG, b'')
+            case WS_RECV_ACTION_TYPE.ENGINE_START:
+                # 解析payload
+                items = EngineInput.model_validate_json(payload)
+                client_waitting = False
+            case _:
+                await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.ERROR, 'First action must be ENGINE_START | PING')
+                return
+    if items.engine.lower() == "default":
+        items.engine = config.SERVER.ENGINES.TTS.DEFAULT
+    engine: BaseTTSEngine = enginePool.getEngine(ENGINE_TYPE.TTS, items.engine)
+    await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.ENGINE_STARTED)
+    # PARTIAL_INPUT 累积文本, FINAL_INPUT 触发合成
+    text = ""
+    while True:
+        action, payload = await WebSocketHandler.recv_message(websocket)
+        match action:
+            case WS_RECV_ACTION_TYPE.PING:
+                await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.PONG, b'')
+            case WS_RECV_ACTION_TYPE.ENGINE_PARTIAL_INPUT:
+                text += payload.decode("utf-8")
+            case WS_RECV_ACTION_TYPE.ENGINE_FINAL_INPUT:
+                text += payload.decode("utf-8")
+                try:
+                    # 客户端断开时及时关闭引擎的上游连接
+                    async with aclosing(engine.stream(input=TextMessage(data=text), user=user, **items.config)) as stream:
+                        async for chunk in stream:
+                            await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.ENGINE_PARTIAL_OUTPUT, chunk)
+                    await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.ENGINE_FINAL_OUTPUT, b'')
+                except WebSocketDisconnect:
+                    raise
+                except Exception as e:
+                    logger.error(f"[SERVER] tts_stream_infer error: {e}", exc_info=True)
+                    await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.ERROR, str(e))
+                text = ""
+            case WS_RECV_ACTION_TYPE.ENGINE_STOP:
+                await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.ENGINE_STOPPED)
+                return
+            case _:
+                await WebSocketHandler.send_message(websocket, WS_SEND_ACTION_TYPE.ERROR, f'Unsupported action: {action}')
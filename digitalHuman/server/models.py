@@ -4,7 +4,7 @@
 @Author  :   一力辉
 '''
 
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Optional
 from pydantic import BaseModel
 from digitalHuman.server.reponse import BaseResponse
 from digitalHuman.protocol import *
@@ -26,6 +26,9 @@ class EngineInput(BaseModel):
 class AgentEngineInput(EngineInput):
     conversation_id: str = ""
 
+class AgentSpeechEngineInput(AgentEngineInput):
+    tts: EngineInput = EngineInput()
+
 class ASREngineInput(EngineInput, AudioMessage):
     pass
 
@@ -38,8 +41,12 @@ class VoiceListResp(BaseResponse):
 class TTSEngineInput(EngineInput):
     pass
 
-class TTSEngineOutput(BaseResponse, AudioMessage):
-    pass
+class TTSEngineOutput(BaseResponse):
+    # 音频以base64编码返回
+    data: Optional[str] = None
+    type: AUDIO_TYPE = AUDIO_TYPE.WAV
+    sampleRate: int = 16000
+    sampleWidth: int = 2
 
 class LLMEngineInput(EngineInput):
     pass
@@ -48,4 +55,13 @@ class ConversationInput(BaseModel):
     data: Dict = {}
 
 class ConversationIdResp(BaseResponse):
-    data: str
\ No newline at end of file
+    data: str
+
+class StatsResp(BaseResponse):
+    data: Dict = {}
+
+class TraceResp(BaseResponse):
+    data: Dict = {}
+
+class TraceListResp(BaseResponse):
+    data: List[Dict] = []
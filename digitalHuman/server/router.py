@@ -4,6 +4,7 @@
 @Author  :   一力辉 
 '''
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from digitalHuman.server.api.common.common_api_v0 import router as commonRouter
@@ -11,15 +12,34 @@ from digitalHuman.server.api.asr.asr_api_v0 import router as asrRouter
 from digitalHuman.server.api.tts.tts_api_v0 import router as ttsRouter
 from digitalHuman.server.api.llm.llm_api_v0 import router as llmRouter
 from digitalHuman.server.api.agent.agent_api_v0 import router as agentRouter
-from digitalHuman.utils import config
+from digitalHuman.server.catalog import setupCatalogs
+from digitalHuman.core import OpenaiLLM
+from digitalHuman.engine import EnginePool
+from digitalHuman.agent import AgentPool
+from digitalHuman.utils import config, getHttpClient, closeHttpClients
 
 
 __all__ = ["app"]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 每个worker进程启动时初始化引擎池
+    EnginePool().setup(config.SERVER.ENGINES)
+    AgentPool().setup(config.SERVER.AGENTS)
+    # 预先生成引擎目录接口的响应
+    setupCatalogs()
+    # 每次启动创建新的默认客户端, 上次关闭的客户端不再使用
+    getHttpClient()
+    yield
+    # 释放长连接
+    await OpenaiLLM.close()
+    await closeHttpClients()
+
 app = FastAPI(
     title=config.COMMON.NAME, 
     description=f"This is a cool set of apis for {config.COMMON.NAME}",
-    version=config.COMMON.VERSION
+    version=config.COMMON.VERSION,
+    lifespan=lifespan
 )
 
 app.add_middleware(
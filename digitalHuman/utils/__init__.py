@@ -10,11 +10,13 @@ from .registry import *
 from .audio import *
 from .func import *
 from .streamParser import *
+from .sentenceSplitter import *
+from .asyncCache import *
+from .rateLimiter import *
+from .metrics import *
+from .tracing import *
 
-# https://www.cnblogs.com/nanshaobit/p/16060370.html
-import httpx
-RETRIES = 3
-asyncTransport = httpx.AsyncHTTPTransport(retries=RETRIES, verify=False)
-httpxAsyncClient = httpx.AsyncClient(timeout=None, transport=asyncTransport)
-syncTransport = httpx.HTTPTransport(retries=RETRIES, verify=False)
-httpxSyncClient = httpx.Client(timeout=None, transport=syncTransport)
\ No newline at end of file
+from .httpClient import *
+
+# 异步客户端统一通过getHttpClient()获取, 服务关闭后可重新创建, 不导出模块级实例
+httpxSyncClient = getHttpSyncClient()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   asyncCache.py
+@Author  :   一力辉
+'''
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set
+from digitalHuman.utils import logger
+
+__all__ = ['AsyncTTLCache']
+
+class AsyncTTLCache():
+    """
+    异步TTL缓存
+    同一个key并发未命中时只加载一次(single-flight), 临近过期时后台刷新
+    """
+    def __init__(self, ttl: float, refreshBefore: float = 0, maxSize: int = 1024):
+        self._ttl = ttl
+        self._refreshBefore = refreshBefore
+        self._maxSize = maxSize
+        # key -> (value, 过期时间)
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # 保持后台刷新任务引用, 防止被回收
+        self._refreshing: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now < entry[1]:
+            self._entries.move_to_end(key)
+            if now >= entry[1] - self._refreshBefore and key not in self._inflight:
+                task = self._load(key, loader)
+                self._refreshing.add(task)
+                task.add_done_callback(self._onRefreshed)
+            return entry[0]
+        # 等待方被取消时不影响共享的加载任务
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, loader))
+            self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self._entries[key] = (value, time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxSize:
+                self._entries.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _onRefreshed(self, task: asyncio.Task):
+        self._refreshing.discard(task)
+        # 刷新失败保留旧值直至过期
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"[AsyncTTLCache] Refresh failed: {task.exception()}")
@@ -5,23 +5,271 @@
 '''
 
 
+import os
+import wave
+import struct
+import asyncio
+import lameenc
+import numpy as np
 from io import BytesIO
-from pydub import AudioSegment
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from .configParser import config
 
-__all__ = ["mp3ToWav", "wavToMp3"]
+__all__ = [
+    "mp3ToWav", "wavToMp3", "wavToMp3Async", "wavToPcm", "pcmToWav", "convertPcm", "pcmToMp3",
+    "wavHeader", "WavStreamDecoder", "Mp3StreamEncoder", "detectSpeech", "trimSilence", "audioMimeType"
+]
+
+# VAD默认配置
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DB = -40
+VAD_PADDING_MS = 200
+# mp3编码配置
+MP3_BIT_RATE = 64
+MP3_QUALITY = 5
+# lame支持的输入采样率
+_MP3_SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+
+# mp3编码默认最大线程数
+MP3_MAX_WORKERS = 4
+
+def _mp3Workers() -> int:
+    workers = config.SERVER.get("MP3_WORKERS", 0)
+    return workers if workers and workers > 0 else min(MP3_MAX_WORKERS, os.cpu_count() or 1)
+
+# mp3编码常驻工作线程, 不占用事件循环
+_mp3Executor = ThreadPoolExecutor(max_workers=_mp3Workers(), thread_name_prefix="mp3-encoder")
+
+_AUDIO_MIME_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+
+def audioMimeType(data: bytes, audioType: str = "") -> str:
+    """根据文件头判断音频类型, 无法识别时使用audioType"""
+    if data[:4] == b"RIFF": return "audio/wav"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0): return "audio/mpeg"
+    return _AUDIO_MIME_TYPES.get(str(audioType), "application/octet-stream")
 
 def mp3ToWav(mp3Bytes: bytes) -> bytes:
+    # mp3解码仍依赖ffmpeg
     mp3Data = BytesIO(mp3Bytes)
+    # pydub依赖ffmpeg, 用到时再导入
+    from pydub import AudioSegment
     audio = AudioSegment.from_mp3(mp3Data)
     wavData = BytesIO()
     audio.export(wavData, format="wav")
     wavBytes = wavData.getvalue()
     return wavBytes
 
+def wavToPcm(wavBytes: bytes) -> Tuple[bytes, int, int, int]:
+    """解析wav, 返回(pcm, 采样率, 位宽, 声道数)"""
+    with wave.open(BytesIO(wavBytes), "rb") as reader:
+        params = reader.getparams()
+        pcm = reader.readframes(params.nframes)
+    return pcm, params.framerate, params.sampwidth, params.nchannels
+
+def wavHeader(sampleRate: int = 16000, sampleWidth: int = 2, channels: int = 1, dataSize: int = 0xFFFFFFFF - 36) -> bytes:
+    """wav头部, 流式输出时数据长度未知可使用默认的最大值"""
+    blockAlign = sampleWidth * channels
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", dataSize + 36, b"WAVE", b"fmt ", 16, 1, channels,
+        sampleRate, sampleRate * blockAlign, blockAlign, sampleWidth * 8, b"data", dataSize
+    )
+
+def pcmToWav(pcm: bytes, sampleRate: int = 16000, sampleWidth: int = 2, channels: int = 1) -> bytes:
+    return wavHeader(sampleRate, sampleWidth, channels, len(pcm)) + pcm
+
+def convertPcm(
+    pcm: bytes,
+    sampleRate: int,
+    sampleWidth: int,
+    channels: int = 1,
+    targetRate: Optional[int] = None,
+    targetChannels: Optional[int] = None
+) -> bytes:
+    """pcm转为16bit, 按需混合声道及重采样(线性插值)"""
+    targetRate = targetRate or sampleRate
+    targetChannels = targetChannels or channels
+    if sampleWidth == 2 and targetRate == sampleRate and targetChannels == channels:
+        return pcm
+    if targetChannels not in (1, channels):
+        raise ValueError(f"Unsupported channel conversion: {channels} -> {targetChannels}")
+    samples = _pcmToFloat(pcm, sampleWidth, channels, mix=targetChannels == 1)
+    if samples is None:
+        raise ValueError(f"Unsupported sample width: {sampleWidth}")
+    if targetRate != sampleRate and len(samples) > 0:
+        frames = len(samples)
+        targetFrames = max(1, int(round(frames * targetRate / sampleRate)))
+        position = np.arange(targetFrames) * (sampleRate / targetRate)
+        index = np.arange(frames)
+        if samples.ndim == 1:
+            samples = np.interp(position, index, samples)
+        else:
+            samples = np.stack([np.interp(position, index, samples[:, i]) for i in range(samples.shape[1])], axis=1)
+    return (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+
+class Mp3StreamEncoder():
+    """
+    流式mp3编码(进程内lame)
+    按块输入pcm, 每次返回已编码的mp3数据, 结束时调用flush
+    """
+    def __init__(self, sampleRate: int = 16000, sampleWidth: int = 2, channels: int = 1, bitRate: int = MP3_BIT_RATE):
+        self._sampleRate = sampleRate
+        self._sampleWidth = sampleWidth
+        self._channels = channels
+        # lame只支持16bit, 单/双声道及标准采样率, 其它位宽(8/24/32bit)先转为16bit
+        self._targetChannels = channels if channels <= 2 else 1
+        self._targetRate = sampleRate if sampleRate in _MP3_SAMPLE_RATES else 16000
+        self._encoder = lameenc.Encoder()
+        self._encoder.set_bit_rate(bitRate)
+        self._encoder.set_in_sample_rate(self._targetRate)
+        self._encoder.set_channels(self._targetChannels)
+        self._encoder.set_quality(MP3_QUALITY)
+        self._remain = b""
+
+    def encode(self, pcm: bytes) -> bytes:
+        # 保证按完整采样帧输入
+        frameBytes = self._sampleWidth * self._channels
+        if self._remain:
+            pcm = self._remain + pcm
+        size = len(pcm) - len(pcm) % frameBytes
+        self._remain = pcm[size:]
+        if size == 0: return b""
+        pcm = convertPcm(pcm[:size], self._sampleRate, self._sampleWidth, self._channels, self._targetRate, self._targetChannels)
+        return bytes(self._encoder.encode(pcm))
+
+    def flush(self) -> bytes:
+        return bytes(self._encoder.flush())
+
+def pcmToMp3(pcm: bytes, sampleRate: int = 16000, sampleWidth: int = 2, channels: int = 1, bitRate: int = MP3_BIT_RATE) -> bytes:
+    encoder = Mp3StreamEncoder(sampleRate, sampleWidth, channels, bitRate)
+    return encoder.encode(pcm) + encoder.flush()
+
 def wavToMp3(wavBytes: bytes) -> bytes:
-    wavData = BytesIO(wavBytes)
-    audio = AudioSegment.from_wav(wavData)
-    mp3Data = BytesIO()
-    audio.export(mp3Data, format="mp3")
-    mp3Bytes = mp3Data.getvalue()
-    return mp3Bytes
\ No newline at end of file
+    pcm, sampleRate, sampleWidth, channels = wavToPcm(wavBytes)
+    return pcmToMp3(pcm, sampleRate, sampleWidth, channels)
+
+async def wavToMp3Async(wavBytes: bytes) -> bytes:
+    """在mp3编码工作线程中执行wavToMp3"""
+    return await asyncio.get_running_loop().run_in_executor(_mp3Executor, wavToMp3, wavBytes)
+
+class WavStreamDecoder():
+    """
+    流式wav解析
+    按块输入wav数据, 解析到data块后返回其中的pcm
+    """
+    def __init__(self):
+        self._buffer = b""
+        self.sampleRate: Optional[int] = None
+        self.sampleWidth: Optional[int] = None
+        self.channels: Optional[int] = None
+        self._ready = False
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self._ready: return chunk
+        self._buffer += chunk
+        if len(self._buffer) < 12: return b""
+        if self._buffer[:4] != b"RIFF" or self._buffer[8:12] != b"WAVE":
+            raise ValueError("Invalid wav stream")
+        offset = 12
+        while len(self._buffer) >= offset + 8:
+            chunkId, chunkSize = struct.unpack_from("<4sI", self._buffer, offset)
+            if chunkId == b"data":
+                if self.sampleRate is None:
+                    raise ValueError("Invalid wav stream: fmt chunk not found")
+                self._ready = True
+                pcm = self._buffer[offset + 8:]
+                self._buffer = b""
+                return pcm
+            if len(self._buffer) < offset + 8 + chunkSize:
+                break
+            if chunkId == b"fmt ":
+                _, self.channels, self.sampleRate, _, _, bits = struct.unpack_from("<HHIIHH", self._buffer, offset + 8)
+                self.sampleWidth = bits // 8
+            # 块按偶数字节对齐
+            offset += 8 + chunkSize + (chunkSize & 1)
+        return b""
+
+def _pcmToFloat(pcm: bytes, sampleWidth: int, channels: int = 1, mix: bool = True) -> Optional[np.ndarray]:
+    """pcm转为[-1, 1]的浮点采样, mix时混合为单声道, 否则多声道返回(帧数, 声道数), 不支持的位宽返回None"""
+    if sampleWidth == 1:
+        # 8bit为无符号
+        samples = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sampleWidth == 3:
+        # 24bit补齐为32bit后按int32解析, 保留符号位
+        count = len(pcm) // 3
+        padded = np.zeros((count, 4), dtype=np.uint8)
+        padded[:, 1:] = np.frombuffer(pcm, dtype=np.uint8, count=count * 3).reshape(-1, 3)
+        samples = padded.view("<i4").ravel().astype(np.float32) / float(1 << 31)
+    elif sampleWidth in (2, 4):
+        dtype = np.int16 if sampleWidth == 2 else np.int32
+        count = len(pcm) // sampleWidth
+        samples = np.frombuffer(pcm, dtype=dtype, count=count).astype(np.float32) / float(1 << (sampleWidth * 8 - 1))
+    else:
+        return None
+    if channels > 1:
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels)
+        if mix: samples = samples.mean(axis=1)
+    return samples
+
+def detectSpeech(
+    pcm: bytes,
+    sampleRate: int,
+    sampleWidth: int,
+    channels: int = 1,
+    thresholdDb: float = VAD_THRESHOLD_DB,
+    frameMs: int = VAD_FRAME_MS,
+    paddingMs: int = VAD_PADDING_MS
+) -> Optional[Tuple[int, int]]:
+    """
+    基于帧能量的语音检测
+    返回语音所在区间[start, end)(按采样帧计, 含前后padding), 全部静音返回None
+    """
+    samples = _pcmToFloat(pcm, sampleWidth, channels)
+    if samples is None: return (0, len(pcm) // (sampleWidth * channels))
+    total = len(samples)
+    if total == 0: return None
+    frameSize = max(1, sampleRate * frameMs // 1000)
+    # 末尾不足一帧的补零
+    frames = np.pad(samples, (0, -total % frameSize)).reshape(-1, frameSize)
+    energy = 10 * np.log10(np.mean(np.square(frames), axis=1) + 1e-10)
+    voiced = np.flatnonzero(energy > thresholdDb)
+    if voiced.size == 0: return None
+    padding = sampleRate * paddingMs // 1000
+    start = max(0, int(voiced[0]) * frameSize - padding)
+    end = min(total, (int(voiced[-1]) + 1) * frameSize + padding)
+    return (start, end)
+
+def trimSilence(
+    wavBytes: bytes,
+    thresholdDb: float = VAD_THRESHOLD_DB,
+    frameMs: int = VAD_FRAME_MS,
+    paddingMs: int = VAD_PADDING_MS
+) -> Tuple[Optional[bytes], float, float]:
+    """
+    裁剪wav首尾静音
+    返回(裁剪后的wav, 原始时长, 裁剪掉的时长), 全部静音时wav为None
+    非pcm编码的wav原样返回
+    """
+    try:
+        with wave.open(BytesIO(wavBytes), "rb") as reader:
+            params = reader.getparams()
+            pcm = reader.readframes(params.nframes)
+    except (wave.Error, EOFError):
+        return wavBytes, 0.0, 0.0
+    frameBytes = params.sampwidth * params.nchannels
+    nframes = len(pcm) // frameBytes
+    duration = nframes / params.framerate
+    speech = detectSpeech(pcm, params.framerate, params.sampwidth, params.nchannels, thresholdDb, frameMs, paddingMs)
+    if speech is None: return None, duration, duration
+    start, end = speech
+    if start == 0 and end == nframes: return wavBytes, duration, 0.0
+    wavData = BytesIO()
+    with wave.open(wavData, "wb") as writer:
+        writer.setparams(params)
+        writer.writeframes(memoryview(pcm)[start * frameBytes : end * frameBytes])
+    return wavData.getvalue(), duration, (nframes - (end - start)) / params.framerate
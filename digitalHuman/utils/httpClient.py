@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   httpClient.py
+@Author  :   一力辉
+'''
+
+# https://www.cnblogs.com/nanshaobit/p/16060370.html
+import httpx
+from typing import Dict, List, Optional
+from yacs.config import CfgNode as CN
+from digitalHuman.utils.configParser import config
+from digitalHuman.utils.logger import logger
+from digitalHuman.utils.metrics import Gauge, registerCollector
+from digitalHuman.utils.tracing import markUpstream
+
+__all__ = ['getHttpClient', 'getHttpSyncClient', 'httpClientStats', 'closeHttpClients']
+
+DEFAULT_PROFILE = "DEFAULT"
+# 未配置时的默认值
+PROFILE_DEFAULTS = {
+    "MAX_CONNECTIONS": 100,
+    "MAX_KEEPALIVE_CONNECTIONS": 20,
+    "KEEPALIVE_EXPIRY": 30,
+    "CONNECT_TIMEOUT": 10,
+    "READ_TIMEOUT": 120,
+    "WRITE_TIMEOUT": 60,
+    "POOL_TIMEOUT": 30,
+    "HTTP2": False,
+    "RETRIES": 3,
+    "VERIFY": False,
+}
+
+class _ClientStats():
+    __slots__ = ("requests", "errors", "active")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+
+class _MeteredStream(httpx.AsyncByteStream):
+    """响应体读取完成或关闭时释放活跃计数"""
+    def __init__(self, stream: httpx.AsyncByteStream, stats: _ClientStats):
+        self._stream = stream
+        self._stats = stats
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            self._stats.active -= 1
+        await self._stream.aclose()
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """统计请求数、错误数及进行中的请求"""
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: _ClientStats):
+        self._transport = transport
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._stats.requests += 1
+        self._stats.active += 1
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            self._stats.errors += 1
+            self._stats.active -= 1
+            raise
+        # 流式请求的上游建连耗时
+        markUpstream()
+        response.stream = _MeteredStream(response.stream, self._stats)
+        return response
+
+    def connections(self) -> Dict[str, int]:
+        pool = getattr(self._transport, "_pool", None)
+        connections = getattr(pool, "connections", [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"connections": len(connections), "idle_connections": idle}
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+def _timeout(value: float) -> Optional[float]:
+    return value if value and value > 0 else None
+
+def _profile(name: str) -> Dict:
+    """profile配置继承DEFAULT, 未配置的项使用默认值"""
+    profiles = config.SERVER.get("HTTP_CLIENTS", None) or CN()
+    settings = dict(PROFILE_DEFAULTS)
+    settings.update(profiles.get(DEFAULT_PROFILE, None) or {})
+    settings.update(profiles.get(name, None) or {})
+    if settings["HTTP2"]:
+        try:
+            import h2
+        except ImportError:
+            logger.warning(f"[HttpClient] HTTP/2 requires h2 (pip install httpx[http2]), profile {name} falls back to HTTP/1.1")
+            settings["HTTP2"] = False
+    return settings
+
+def _limits(settings: Dict) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings["MAX_CONNECTIONS"],
+        max_keepalive_connections=settings["MAX_KEEPALIVE_CONNECTIONS"],
+        keepalive_expiry=_timeout(settings["KEEPALIVE_EXPIRY"])
+    )
+
+def _timeouts(settings: Dict) -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=_timeout(settings["CONNECT_TIMEOUT"]),
+        read=_timeout(settings["READ_TIMEOUT"]),
+        write=_timeout(settings["WRITE_TIMEOUT"]),
+        pool=_timeout(settings["POOL_TIMEOUT"])
+    )
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_transports: Dict[str, _MeteredTransport] = {}
+_stats: Dict[str, _ClientStats] = {}
+_limitsConfig: Dict[str, httpx.Limits] = {}
+
+def getHttpClient(profile: str = DEFAULT_PROFILE) -> httpx.AsyncClient:
+    """
+    按上游profile获取共享的异步客户端
+    profile对应配置SERVER.HTTP_CLIENTS下的同名项(不区分大小写)
+    """
+    name = profile.upper()
+    client = _clients.get(name)
+    if client is not None: return client
+    settings = _profile(name)
+    limits = _limits(settings)
+    # retries仅对建立连接失败生效
+    transport = httpx.AsyncHTTPTransport(
+        retries=settings["RETRIES"],
+        verify=settings["VERIFY"],
+        http2=settings["HTTP2"],
+        limits=limits
+    )
+    _stats[name] = _ClientStats()
+    _transports[name] = _MeteredTransport(transport, _stats[name])
+    _limitsConfig[name] = limits
+    client = httpx.AsyncClient(timeout=_timeouts(settings), transport=_transports[name])
+    _clients[name] = client
+    return client
+
+def getHttpSyncClient() -> httpx.Client:
+    settings = _profile(DEFAULT_PROFILE)
+    transport = httpx.HTTPTransport(retries=settings["RETRIES"], verify=settings["VERIFY"], limits=_limits(settings))
+    return httpx.Client(timeout=_timeouts(settings), transport=transport)
+
+def httpClientStats() -> Dict[str, Dict]:
+    """各profile连接池使用情况"""
+    result = {}
+    for name, transport in _transports.items():
+        stats = _stats[name]
+        result[name.lower()] = {
+            "requests": stats.requests,
+            "errors": stats.errors,
+            "active": stats.active,
+            "max_connections": _limitsConfig[name].max_connections,
+            **transport.connections()
+        }
+    return result
+
+def _collectMetrics() -> List[Gauge]:
+    metrics = {}
+    for profile, stats in httpClientStats().items():
+        for key, value in stats.items():
+            if key not in metrics:
+                metrics[key] = Gauge(f"adh_http_client_{key}", f"HTTP client pool {key}", register=False)
+            metrics[key].set(value, profile=profile)
+    return list(metrics.values())
+
+registerCollector(_collectMetrics)
+
+async def closeHttpClients():
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
+    _transports.clear()
+    _stats.clear()
+    _limitsConfig.clear()
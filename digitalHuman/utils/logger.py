@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
 '''
 @File    :   logger.py
-@Author  :   一力辉 
+@Author  :   一力辉
 '''
 
 import os
+import json
+import time
+import queue
+import atexit
 import logging
 import warnings
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from typing import Dict, Tuple
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from .env import LOG_PATH
 from .configParser import config
 
@@ -18,17 +23,98 @@ LOGGER_FOLDER = os.path.join(LOG_PATH, datetime.now().strftime("%Y%m%d%H%M%S"))
 LOGGER_MAX_BYTES = 1024 * 1024 * 100
 LOGGER_BACKUP_COUNT = 3
 LOGGER_FORMAT = "[%(levelname)s]%(asctime)s File '%(filename)s',line %(lineno)s: %(message)s"
+LOGGER_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+# 默认配置
+LOGGER_QUEUE_SIZE = 10000
+LOGGER_SAMPLE_RATE = 5
 
 def checkLoggerPath():
     if not os.path.exists(LOGGER_FOLDER):
         os.makedirs(LOGGER_FOLDER, exist_ok=True)
 
+def parseLevel(level: str) -> int:
+    if level not in LOGGER_LEVELS:
+        warnings.warn(f"Unknown logging level: {level}, set logging level to DEBUG!")
+        return logging.DEBUG
+    return getattr(logging, level)
+
+class JsonFormatter(logging.Formatter):
+    """结构化日志, 每行一个json对象"""
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.module,
+            "file": record.filename,
+            "line": record.lineno,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+class ModuleLevelFilter(logging.Filter):
+    """按模块(文件名)设置日志等级, 未配置的模块使用默认等级"""
+    def __init__(self, level: int, moduleLevels: Dict[str, int]):
+        super().__init__()
+        self._level = level
+        self._moduleLevels = moduleLevels
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self._moduleLevels.get(record.module, self._level)
+
+class SampleFilter(logging.Filter):
+    """
+    带extra={"sample": key}的日志按key限流, 每秒最多rate条
+    被丢弃的条数附加在下一条输出的日志中
+    """
+    def __init__(self, rate: float):
+        super().__init__()
+        self._rate = rate
+        # key -> (窗口开始时间, 窗口内条数, 丢弃条数)
+        self._windows: Dict[str, Tuple[float, int, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample", None)
+        if key is None or self._rate <= 0: return True
+        now = time.monotonic()
+        start, count, dropped = self._windows.get(key, (now, 0, 0))
+        if now - start >= 1:
+            start, count = now, 0
+        if count >= self._rate:
+            self._windows[key] = (start, count, dropped + 1)
+            return False
+        self._windows[key] = (start, count + 1, 0)
+        if dropped:
+            record.msg = f"{record.msg} (sampled, {dropped} suppressed)"
+        return True
+
+class DroppingQueueHandler(QueueHandler):
+    """队列满时丢弃日志, 不阻塞事件循环"""
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
 def getLogger(loggerName: str):
     checkLoggerPath()
     loggerFile = os.path.join(LOGGER_FOLDER, loggerName + "_log.txt")
+    logConfig = config.COMMON.get("LOG", None) or {}
 
+    # 设置日志等级, 模块等级可低于全局等级
+    level = parseLevel(config.COMMON.LOG_LEVEL)
+    moduleLevels = {module: parseLevel(value) for module, value in (logConfig.get("MODULE_LEVELS", None) or {}).items()}
     logger = logging.getLogger(loggerName)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(min([level, *moduleLevels.values()]))
+    logger.addFilter(ModuleLevelFilter(level, moduleLevels))
+    logger.addFilter(SampleFilter(logConfig.get("SAMPLE_RATE", LOGGER_SAMPLE_RATE)))
 
     # 日志记录
     fileHandler = RotatingFileHandler(
@@ -37,36 +123,27 @@ def getLogger(loggerName: str):
         backupCount=LOGGER_BACKUP_COUNT,
         encoding="utf-8"
     )
-    fileHandler.setLevel(logging.DEBUG)
-    fileFormatter = logging.Formatter(LOGGER_FORMAT)
-    fileHandler.setFormatter(fileFormatter)
+    if logConfig.get("JSON", False):
+        fileHandler.setFormatter(JsonFormatter())
+    else:
+        fileHandler.setFormatter(logging.Formatter(LOGGER_FORMAT))
 
     # 终端显示
     streamHander = logging.StreamHandler()
     formatter = logging.Formatter(LOGGER_FORMAT)
     streamHander.setFormatter(formatter)
-    
-    # 设置日志等级
-    if config.COMMON.LOG_LEVEL == "DEBUG":
-        fileHandler.setLevel(logging.DEBUG)
-        streamHander.setLevel(logging.DEBUG)
-    elif config.COMMON.LOG_LEVEL == "INFO":
-        fileHandler.setLevel(logging.INFO)
-        streamHander.setLevel(logging.INFO)
-    elif config.COMMON.LOG_LEVEL == "WARNING":
-        fileHandler.setLevel(logging.WARNING)
-        streamHander.setLevel(logging.WARNING)
-    elif config.COMMON.LOG_LEVEL == "ERROR":
-        fileHandler.setLevel(logging.ERROR)
-        streamHander.setLevel(logging.ERROR)
-    else:
-        warnings.warn(f"Unknown logging level: {config.COMMON.LOG_LEVEL}, set logging level to DEBUG!")
-        fileHandler.setLevel(logging.DEBUG)
-        streamHander.setLevel(logging.DEBUG)
 
-    logger.addHandler(fileHandler)
-    logger.addHandler(streamHander)
+    if not logConfig.get("ASYNC", True):
+        logger.addHandler(fileHandler)
+        logger.addHandler(streamHander)
+        return logger
 
+    # 异步写入: 调用方只入队, 由后台线程写文件和终端
+    queueHandler = DroppingQueueHandler(queue.Queue(logConfig.get("QUEUE_SIZE", LOGGER_QUEUE_SIZE)))
+    listener = QueueListener(queueHandler.queue, fileHandler, streamHander)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(queueHandler)
     return logger
 
-logger = getLogger("system")
\ No newline at end of file
+logger = getLogger("system")
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   metrics.py
+@Author  :   一力辉
+'''
+
+# 输出格式参考: https://prometheus.io/docs/instrumenting/exposition_formats/
+
+import bisect
+from typing import Callable, Dict, List, Tuple
+
+__all__ = ['Counter', 'Histogram', 'Gauge', 'registerCollector', 'renderMetrics', 'METRICS_CONTENT_TYPE']
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 指标注册表: 名称 -> 指标
+_metrics: Dict[str, "_Metric"] = {}
+# 采集时调用的回调, 返回Gauge列表, 用于导出其它模块的统计
+_collectors: List[Callable[[], List["Gauge"]]] = []
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _formatLabels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    items = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra: items.append(extra)
+    return "{" + ",".join(items) + "}" if items else ""
+
+def _formatValue(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class _Metric():
+    type = ""
+
+    def __init__(self, name: str, description: str, register: bool = True):
+        self.name = name
+        self.description = description
+        self._values: Dict[Tuple[Tuple[str, str], ...], object] = {}
+        if register:
+            if name in _metrics:
+                raise ValueError(f"Metric {name} already registered")
+            _metrics[name] = self
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted(labels.items()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_formatLabels(key)} {_formatValue(value)}" for key, value in self._values.items()]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+class _HistogramValue():
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, register: bool = True):
+        super().__init__(name, description, register)
+        self._buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        histogram = self._values.get(key)
+        if histogram is None:
+            histogram = self._values[key] = _HistogramValue(len(self._buckets))
+        index = bisect.bisect_left(self._buckets, value)
+        if index < len(self._buckets):
+            histogram.buckets[index] += 1
+        histogram.sum += value
+        histogram.count += 1
+
+    def get(self, **labels) -> Tuple[int, float]:
+        """返回(次数, 总和)"""
+        histogram = self._values.get(self._key(labels))
+        return (histogram.count, histogram.sum) if histogram else (0, 0.0)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, histogram in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self._buckets, histogram.buckets):
+                cumulative += count
+                le = 'le="%s"' % _formatValue(bound)
+                lines.append(f"{self.name}_bucket{_formatLabels(key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_formatLabels(key, le)} {histogram.count}")
+            lines.append(f"{self.name}_sum{_formatLabels(key)} {_formatValue(histogram.sum)}")
+            lines.append(f"{self.name}_count{_formatLabels(key)} {histogram.count}")
+        return lines
+
+def registerCollector(collector: Callable[[], List[Gauge]]):
+    _collectors.append(collector)
+
+def renderMetrics() -> str:
+    lines = []
+    for metric in _metrics.values():
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for metric in collector():
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   rateLimiter.py
+@Author  :   一力辉
+'''
+
+import time
+import asyncio
+
+__all__ = ['AsyncRateLimiter']
+
+class AsyncRateLimiter():
+    """
+    令牌桶限流
+    rate为每秒允许的请求数, 小于等于0表示不限流
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self._rate <= 0: return
+        # 等待方按先后顺序获取令牌
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._tokens = 1
+                self._last = time.monotonic()
+            self._tokens -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args):
+        pass
@@ -4,6 +4,9 @@
 @Author  :   一力辉 
 '''
 
+import importlib
+from threading import RLock
+
 __all__ = ['Registry']
 
 def _register_generic(module_dict, module_name, module):
@@ -13,21 +16,38 @@ def _register_generic(module_dict, module_name, module):
 class Registry(dict):
     def __init__(self, *args, **kwargs):
         super(Registry, self).__init__(*args, **kwargs)
+        # 延迟注册: 名称 -> 模块路径, 首次获取时导入模块完成注册
+        self._lazy = {}
+        self._lock = RLock()
+
+    def registerLazy(self, module_name: str, module_path: str):
+        assert module_name not in self and module_name not in self._lazy
+        self._lazy[module_name] = module_path
+
+    def get(self, module_name, default=None):
+        if module_name not in self and module_name in self._lazy:
+            with self._lock:
+                if module_name in self._lazy:
+                    importlib.import_module(self._lazy[module_name])
+                    self._lazy.pop(module_name, None)
+        return super(Registry, self).get(module_name, default)
 
     def register(self, module_name=None, module=None):
         # used as function call
         if module is not None:
             name = module_name if module_name else module.__name__
+            self._lazy.pop(name, None)
             _register_generic(self, name, module)
             return
 
         # used as decorator
         def register_fn(fn):
             name = module_name if module_name else fn.__name__
+            self._lazy.pop(name, None)
             _register_generic(self, name, fn)
             return fn
 
         return register_fn
 
     def list(self):
-        return list(self.keys())
\ No newline at end of file
+        return list(self.keys()) + [name for name in self._lazy if name not in self]
\ No newline at end of file
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   sentenceSplitter.py
+@Author  :   一力辉
+'''
+
+from typing import List
+
+__all__ = ['SentenceSplitter', 'splitText']
+
+# 与前端保持一致的断句符号及最小句长
+SENTENCE_PUNC = ('；', '！', '？', '。', '?', '!', ';', '\n')
+SENTENCE_LENGTH_MIN = 6
+# 长文本切分时的句中断开符号
+CLAUSE_PUNC = ('，', '、', '：', ',', ':', ' ')
+
+class SentenceSplitter():
+    """
+    流式断句器
+    逐块输入文本, 遇到断句符号且句长满足要求时输出完整句子
+    """
+    def __init__(self, punc: tuple = SENTENCE_PUNC, minLength: int = SENTENCE_LENGTH_MIN):
+        self._punc = frozenset(punc)
+        self._minLength = minLength
+        self._buffer = ""
+        # 已扫描位置, 避免重复扫描
+        self._scanIndex = 0
+
+    def feed(self, text: str) -> List[str]:
+        sentences = []
+        if not text: return sentences
+        self._buffer += text
+        begin = 0
+        for index in range(self._scanIndex, len(self._buffer)):
+            if self._buffer[index] not in self._punc: continue
+            if index - begin <= self._minLength: continue
+            sentence = self._buffer[begin:index + 1].strip()
+            if sentence: sentences.append(sentence)
+            begin = index + 1
+        self._buffer = self._buffer[begin:]
+        self._scanIndex = len(self._buffer)
+        return sentences
+
+    def flush(self) -> List[str]:
+        sentence = self._buffer.strip()
+        self._buffer = ""
+        self._scanIndex = 0
+        return [sentence] if sentence else []
+
+def splitText(text: str, maxLength: int) -> List[str]:
+    """
+    长文本切分, 每段不超过maxLength
+    优先在句末标点处断开, 其次句中标点, 都没有时按长度截断
+    """
+    segments = []
+    text = text.strip()
+    while len(text) > maxLength:
+        window = text[:maxLength]
+        cut = max(window.rfind(p) for p in SENTENCE_PUNC)
+        if cut <= 0: cut = max(window.rfind(p) for p in CLAUSE_PUNC)
+        cut = cut + 1 if cut > 0 else maxLength
+        segment = text[:cut].strip()
+        if segment: segments.append(segment)
+        text = text[cut:].strip()
+    if text: segments.append(text)
+    return segments
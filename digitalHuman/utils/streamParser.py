@@ -4,53 +4,90 @@
 @Author  :   一力辉
 '''
 
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 from digitalHuman.protocol import *
 
-__all__ = ['resonableStreamingParser']
+__all__ = ['StreamingTagParser', 'resonableStreamingParser']
 
-async def resonableStreamingParser(generator: AsyncGenerator[str, None]):
-    chunkBuffer: str = ""
-    thinkFlag = False
+# 标签名 -> 标签内文本对应的事件类型
+DEFAULT_TAGS = {"think": EVENT_TYPE.THINK}
+
+class StreamingTagParser():
+    """
+    流式标签解析(状态机)
+    每个字符只扫描一次, 仅缓存可能是标签前缀的末尾片段
+    标签外文本为TEXT, 标签内文本为标签对应的事件类型, 标签不支持嵌套
+    """
+    def __init__(self, tags: Optional[Dict[str, EVENT_TYPE]] = None):
+        tags = tags or DEFAULT_TAGS
+        self._openTags = {f"<{name}>": event for name, event in tags.items()}
+        # 当前所在的开始标签(None为标签外) -> 可能出现的标签
+        # 按开始标签区分, 多个标签对应同一事件类型时各自匹配自己的结束标签
+        self._candidates: Dict[Optional[str], Tuple[str, ...]] = {None: tuple(self._openTags.keys())}
+        for name in tags:
+            self._candidates[f"<{name}>"] = (f"</{name}>",)
+        self._tag: Optional[str] = None
+        self._state = EVENT_TYPE.TEXT
+        self._pending = ""
+
+    @property
+    def state(self) -> EVENT_TYPE:
+        return self._state
+
+    @staticmethod
+    def _emit(results: List[Tuple[EVENT_TYPE, str]], event: EVENT_TYPE, text: str):
+        if not text: return
+        # 合并相邻的同类型片段
+        if results and results[-1][0] == event:
+            results[-1] = (event, results[-1][1] + text)
+        else:
+            results.append((event, text))
+
+    def feed(self, chunk: str) -> List[Tuple[EVENT_TYPE, str]]:
+        # 快速路径: 不含标签起始符直接输出
+        if not self._pending and "<" not in chunk:
+            return [(self._state, chunk)] if chunk else []
+        results = []
+        data = self._pending + chunk if self._pending else chunk
+        self._pending = ""
+        pos = 0
+        while True:
+            index = data.find("<", pos)
+            if index < 0:
+                self._emit(results, self._state, data[pos:])
+                break
+            self._emit(results, self._state, data[pos:index])
+            candidates = self._candidates[self._tag]
+            tag = next((tag for tag in candidates if data.startswith(tag, index)), None)
+            if tag is not None:
+                # 标签外匹配到开始标签, 标签内匹配到结束标签
+                self._tag = tag if self._tag is None else None
+                self._state = self._openTags[tag] if self._tag else EVENT_TYPE.TEXT
+                pos = index + len(tag)
+                continue
+            rest = data[index:]
+            if any(tag.startswith(rest) for tag in candidates):
+                # 可能是被截断的标签, 等待后续输入
+                self._pending = rest
+                break
+            self._emit(results, self._state, "<")
+            pos = index + 1
+        return results
+
+    def flush(self) -> List[Tuple[EVENT_TYPE, str]]:
+        results = []
+        self._emit(results, self._state, self._pending)
+        self._pending = ""
+        return results
+
+async def resonableStreamingParser(generator: AsyncGenerator[str, None], tags: Optional[Dict[str, EVENT_TYPE]] = None):
+    parser = StreamingTagParser(tags)
     async for eventType, chunk in generator:
         # 只有text做解析
-        if eventType != EVENT_TYPE.TEXT: 
+        if eventType != EVENT_TYPE.TEXT:
             yield eventStreamResponse(eventType, chunk)
             continue
-        chunkBuffer += chunk
-        # 缓存10个字符
-        if len(chunkBuffer) < 10:
-            continue
-        if not thinkFlag and '<think>' in chunkBuffer:
-            # 开始标志位判断
-            thinkFlag = True
-            textContent, thinkContent = chunkBuffer.split('<think>')
-            if thinkContent: yield eventStreamThink(thinkContent)
-            if textContent: yield eventStreamText(textContent)
-            chunkBuffer = ""
-            continue
-        if thinkFlag and '</think>' in chunkBuffer:
-            # 结束标志位判断
-            thinkFlag = False
-            thinkContent, textContent = chunkBuffer.split('</think>')
-            if thinkContent: yield eventStreamThink(thinkContent)
-            if textContent: yield eventStreamText(textContent)
-            chunkBuffer = ""
-            continue
-        chunkBuffer, content = chunkBuffer[-10:], chunkBuffer[:-10]
-        if thinkFlag:
-            yield eventStreamThink(content)
-        else:
-            yield eventStreamText(content)
-    if chunkBuffer:
-        if thinkFlag:
-            # 结束标志位判断
-            if '</think>' in chunkBuffer:
-                thinkFlag = False
-                thinkContent, textContent = content.split('</think>')
-                yield eventStreamThink(thinkContent)
-                yield eventStreamText(textContent)
-            else:
-                yield eventStreamThink(chunkBuffer)
-        else:
-            yield eventStreamText(chunkBuffer)
\ No newline at end of file
+        for event, text in parser.feed(chunk):
+            yield eventStreamResponse(event, text)
+    for event, text in parser.flush():
+        yield eventStreamResponse(event, text)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   tracing.py
+@Author  :   一力辉
+'''
+
+import time
+from uuid import uuid4
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import AsyncGenerator, Dict, List, Optional
+from digitalHuman.protocol import EVENT_TYPE
+
+__all__ = ['StreamTrace', 'StreamTraceStore', 'markUpstream']
+
+# 默认配置
+MAX_TRACES = 1000
+MAX_GAPS = 512
+
+# 当前请求的trace, 上游http客户端收到响应头时打点
+_currentTrace: ContextVar[Optional["StreamTrace"]] = ContextVar("currentStreamTrace", default=None)
+
+def markUpstream():
+    trace = _currentTrace.get()
+    if trace is not None: trace.markUpstream()
+
+def _eventType(chunk: str) -> str:
+    """只解析首行的事件类型, 避免扫描音频等大段数据"""
+    if not isinstance(chunk, str) or not chunk.startswith("event:"): return ""
+    end = chunk.find("\n")
+    return chunk[len("event:"):end if end >= 0 else len(chunk)].strip()
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+class StreamTrace():
+    """
+    单个流式请求的耗时记录
+    各时间点均为相对请求开始的毫秒数
+    """
+    def __init__(self, requestId: str, engine: str, maxGaps: int = MAX_GAPS):
+        self.requestId = requestId
+        self.engine = engine
+        self.startTime = time.time()
+        self.status = "streaming"
+        self.error = ""
+        self._start = time.perf_counter()
+        self._maxGaps = maxGaps
+        self._upstream: Optional[float] = None
+        # 事件类型 -> 首次出现时间
+        self._firstEvents: Dict[str, float] = {}
+        self._done: Optional[float] = None
+        self._end: Optional[float] = None
+        self._lastChunk: Optional[float] = None
+        self._chunks = 0
+        self._gaps: List[float] = []
+        self._gapSum = 0.0
+        self._gapMax = 0.0
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def markUpstream(self):
+        if self._upstream is None: self._upstream = self._elapsed()
+
+    def markChunk(self, event: str):
+        now = self._elapsed()
+        if event and event not in self._firstEvents:
+            self._firstEvents[event] = now
+        if event == EVENT_TYPE.DONE and self._done is None:
+            self._done = now
+        if self._lastChunk is not None:
+            gap = now - self._lastChunk
+            self._gapSum += gap
+            self._gapMax = max(self._gapMax, gap)
+            # 超出上限只保留统计值
+            if len(self._gaps) < self._maxGaps: self._gaps.append(gap)
+        self._lastChunk = now
+        self._chunks += 1
+
+    @property
+    def failed(self) -> bool:
+        return EVENT_TYPE.ERROR in self._firstEvents
+
+    def finish(self, status: str, error: str = ""):
+        self._end = self._elapsed()
+        self.status = status
+        self.error = error
+
+    def toDict(self) -> Dict:
+        gapCount = max(self._chunks - 1, 0)
+        return {
+            "request_id": self.requestId,
+            "engine": self.engine,
+            "start_time": self.startTime,
+            "status": self.status,
+            "error": self.error,
+            "upstream_connect_ms": _ms(self._upstream),
+            "first_think_ms": _ms(self._firstEvents.get(EVENT_TYPE.THINK)),
+            "first_text_ms": _ms(self._firstEvents.get(EVENT_TYPE.TEXT)),
+            "first_event_ms": {event: _ms(value) for event, value in self._firstEvents.items()},
+            "done_ms": _ms(self._done),
+            "total_ms": _ms(self._end),
+            "chunks": self._chunks,
+            "gap_avg_ms": _ms(self._gapSum / gapCount) if gapCount else None,
+            "gap_max_ms": _ms(self._gapMax) if gapCount else None,
+            "gaps_ms": [_ms(gap) for gap in self._gaps]
+        }
+
+class StreamTraceStore():
+    """
+    流式请求trace的环形缓冲, 按request-id索引, 超出容量时淘汰最早的记录
+    """
+    def __init__(self, maxTraces: int = MAX_TRACES, maxGaps: int = MAX_GAPS):
+        self._maxTraces = maxTraces
+        self._maxGaps = maxGaps
+        self._traces: OrderedDict[str, StreamTrace] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def start(self, requestId: str, engine: str) -> StreamTrace:
+        # 未携带request-id或重复时生成新的id
+        if not requestId or requestId in self._traces:
+            requestId = requestId + "-" + uuid4().hex if requestId else uuid4().hex
+        trace = StreamTrace(requestId, engine, self._maxGaps)
+        self._traces[requestId] = trace
+        while len(self._traces) > self._maxTraces:
+            self._traces.popitem(last=False)
+        return trace
+
+    def get(self, requestId: str) -> Optional[StreamTrace]:
+        return self._traces.get(requestId)
+
+    def recent(self, limit: int = 20) -> List[StreamTrace]:
+        traces = list(self._traces.values())[-limit:] if limit > 0 else []
+        return traces[::-1]
+
+    async def trace(self, trace: StreamTrace, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """透传流式输出并记录各事件的时间"""
+        _currentTrace.set(trace)
+        try:
+            async for chunk in stream:
+                trace.markChunk(_eventType(chunk))
+                yield chunk
+            trace.finish("error" if trace.failed else "done")
+        except Exception as e:
+            trace.finish("error", str(e))
+            raise
+        except BaseException:
+            # 客户端断开
+            trace.finish("cancelled")
+            raise
+        finally:
+            _currentTrace.set(None)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   bench_stream_parser.py
+@Author  :   一力辉
+'''
+
+# 流式标签解析性能测试: python test/benchmark/bench_stream_parser.py
+
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import time
+import random
+import asyncio
+from digitalHuman.utils import resonableStreamingParser, StreamingTagParser
+from digitalHuman.protocol import EVENT_TYPE
+
+def syntheticTokens(count: int, seed: int = 0):
+    """模拟大模型输出: 先思考后回答, 标签可能被切分在多个token中"""
+    random.seed(seed)
+    words = ["你好", "今天", "天气", "不错", "，", "。", "hello", " world", "<", "b>", "1 < 2"]
+    think = ["<th", "ink>"] + [random.choice(words) for _ in range(count // 2)] + ["</", "think>"]
+    answer = [random.choice(words) for _ in range(count - len(think))]
+    return think + answer
+
+async def bench(tokens):
+    async def generator():
+        for token in tokens:
+            yield (EVENT_TYPE.TEXT, token)
+    start = time.perf_counter()
+    outputs = 0
+    async for _ in resonableStreamingParser(generator()):
+        outputs += 1
+    return time.perf_counter() - start, outputs
+
+def benchParser(tokens):
+    parser = StreamingTagParser()
+    start = time.perf_counter()
+    for token in tokens:
+        parser.feed(token)
+    parser.flush()
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    for count in [1000, 10000, 100000]:
+        tokens = syntheticTokens(count)
+        cost = benchParser(tokens)
+        print(f"[parser] tokens: {len(tokens):>7d}, cost: {cost * 1000:8.2f} ms, {len(tokens) / cost:12.0f} tokens/s")
+        cost, outputs = asyncio.run(bench(tokens))
+        print(f"[stream] tokens: {len(tokens):>7d}, events: {outputs:>7d}, cost: {cost * 1000:8.2f} ms, {len(tokens) / cost:12.0f} tokens/s")
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   bench_tencent_signer.py
+@Author  :   一力辉
+'''
+
+# 腾讯云TC3签名性能测试: python test/benchmark/bench_tencent_signer.py
+
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import hmac
+import json
+import time
+import hashlib
+from datetime import datetime, timezone
+from digitalHuman.core import TencentCloudApiKey, TencentCloudSigner
+
+def sign(key, msg: str):
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+def legacySign(payload: str, tencentApiKey: TencentCloudApiKey):
+    """原引擎内逐次计算的签名流程"""
+    service = "tts"
+    host = "tts.tencentcloudapi.com"
+    version = "2019-08-23"
+    action = "TextToVoice"
+    algorithm = "TC3-HMAC-SHA256"
+    timestamp = int(time.time())
+    date = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+    ct = "application/json; charset=utf-8"
+    canonical_headers = "content-type:%s\nhost:%s\nx-tc-action:%s\n" % (ct, host, action.lower())
+    signed_headers = "content-type;host;x-tc-action"
+    hashed_request_payload = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    canonical_request = ("POST" + "\n" + "/" + "\n" + "" + "\n" + canonical_headers + "\n" + signed_headers + "\n" + hashed_request_payload)
+    credential_scope = date + "/" + service + "/" + "tc3_request"
+    hashed_canonical_request = hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+    string_to_sign = (algorithm + "\n" + str(timestamp) + "\n" + credential_scope + "\n" + hashed_canonical_request)
+    secret_date = sign(("TC3" + tencentApiKey.secret_key).encode("utf-8"), date)
+    secret_service = sign(secret_date, service)
+    secret_signing = sign(secret_service, "tc3_request")
+    signature = hmac.new(secret_signing, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+    authorization = (algorithm + " " + "Credential=" + tencentApiKey.secret_id + "/" + credential_scope + ", " +
+                    "SignedHeaders=" + signed_headers + ", " + "Signature=" + signature)
+    return {
+        "Authorization": authorization,
+        "Content-Type": "application/json; charset=utf-8",
+        "Host": host,
+        "X-TC-Action": action,
+        "X-TC-Timestamp": str(timestamp),
+        "X-TC-Version": version
+    }
+
+def bench(func, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    apiKey = TencentCloudApiKey(secret_id="AKIDbenchmark", secret_key="benchmark")
+    payload = json.dumps({"Text": "今天天气不错，我们出去玩吧！", "VoiceType": 501000, "Codec": "mp3"})
+    signer = TencentCloudSigner(service="tts", host="tts.tencentcloudapi.com", version="2019-08-23")
+    count = 100000
+    legacy = bench(lambda: legacySign(payload, apiKey), count)
+    print(f"[legacy] signatures: {count}, cost: {legacy * 1000:8.2f} ms, {count / legacy:10.0f} signatures/s")
+    cached = bench(lambda: signer.sign("TextToVoice", payload, apiKey), count)
+    print(f"[signer] signatures: {count}, cost: {cached * 1000:8.2f} ms, {count / cached:10.0f} signatures/s")
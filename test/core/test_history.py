@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_history.py
+@Author  :   一力辉
+'''
+
+import os
+from digitalHuman.protocol import RoleMessage, ROLE_TYPE
+from digitalHuman.core import MemoryHistoryStore, SqliteHistoryStore
+
+
+def turn(query: str, answer: str):
+    return [RoleMessage(role=ROLE_TYPE.USER, content=query), RoleMessage(role=ROLE_TYPE.ASSISTANT, content=answer)]
+
+
+class Test_HistoryStore():
+    def test_token_budget(self):
+        store = MemoryHistoryStore(maxTokens=20)
+        assert store.append("c1", turn("你好", "你好呀")) == []
+        dropped = store.append("c1", turn("今天天气怎么样", "今天天气晴朗适合出门"))
+        assert [message.content for message in dropped] == ["你好", "你好呀"]
+        summary, messages = store.get("c1")
+        assert summary == ""
+        assert messages[0].role == ROLE_TYPE.USER
+        assert len(messages) == 2
+        store.setSummary("c1", "打过招呼")
+        assert store.get("c1")[0] == "打过招呼"
+
+    def test_evict_conversations(self):
+        store = MemoryHistoryStore(maxConversations=2)
+        for i in range(3):
+            store.append(f"c{i}", turn("q", "a"))
+        assert len(store) == 2
+        assert store.get("c0") == ("", [])
+
+    def test_sqlite_restore(self, tmp_path):
+        path = os.path.join(tmp_path, "history.db")
+        store = SqliteHistoryStore(path, maxTokens=20)
+        store.append("c1", turn("你好", "你好呀"))
+        store.append("c1", turn("今天天气怎么样", "今天天气晴朗适合出门"))
+        store.setSummary("c1", "打过招呼")
+        store.close()
+        store = SqliteHistoryStore(path, maxTokens=20)
+        summary, messages = store.get("c1")
+        assert summary == "打过招呼"
+        assert [message.content for message in messages] == ["今天天气怎么样", "今天天气晴朗适合出门"]
+        store.close()
+
+    def test_sqlite_shared(self, tmp_path):
+        # 模拟两个worker进程共用一个sqlite文件
+        path = os.path.join(tmp_path, "history.db")
+        worker1 = SqliteHistoryStore(path, shared=True)
+        worker2 = SqliteHistoryStore(path, shared=True)
+        worker1.append("c1", turn("你好", "你好呀"))
+        assert len(worker2.get("c1")[1]) == 2
+        worker2.append("c1", turn("在吗", "在的"))
+        assert [message.content for message in worker1.get("c1")[1]] == ["你好", "你好呀", "在吗", "在的"]
+        worker1.close()
+        worker2.close()
+
+    async def test_sqlite_async(self, tmp_path):
+        store = SqliteHistoryStore(os.path.join(tmp_path, "history.db"))
+        # sqlite读写在专用线程中执行
+        assert await store.aappend("c1", turn("你好", "你好呀")) == []
+        await store.asetSummary("c1", "打过招呼")
+        summary, messages = await store.aget("c1")
+        assert summary == "打过招呼" and len(messages) == 2
+        store.close()
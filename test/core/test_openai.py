@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_openai.py
+@Author  :   一力辉
+'''
+
+import json
+import httpx
+import pytest
+from openai import AsyncOpenAI
+from digitalHuman.protocol import RoleMessage, ROLE_TYPE, eventStreamText
+from digitalHuman.utils.tracing import StreamTraceStore
+from digitalHuman.core import openai as openaiModule
+from digitalHuman.core import OpenaiLLM
+from digitalHuman.core.openai import OpenaiClientPool
+
+
+def _sse(*contents: str) -> bytes:
+    lines = []
+    for content in contents:
+        chunk = {
+            "id": "1", "object": "chat.completion.chunk", "created": 0, "model": "fake",
+            "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}]
+        }
+        lines.append("data: " + json.dumps(chunk) + "\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+@pytest.fixture
+def fakeOpenai(monkeypatch):
+    """AsyncOpenAI使用本地MockTransport, 不访问网络"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=_sse("你", "好"), headers={"content-type": "text/event-stream"})
+    def client(base_url: str, api_key: str) -> AsyncOpenAI:
+        return AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(openaiModule, "AsyncOpenAI", client)
+
+
+async def _chat(base_url: str = "http://fake/v1", api_key: str = "key"):
+    messages = [RoleMessage(role=ROLE_TYPE.USER, content="你好")]
+    async for chunk in OpenaiLLM.chat(base_url=base_url, api_key=api_key, model="fake", messages=messages):
+        yield eventStreamText(chunk.choices[0].delta.content)
+
+
+class Test_OpenaiClientPool():
+    async def test_reuse(self):
+        pool = OpenaiClientPool()
+        async with pool.acquire("http://a/v1", "k1") as first: pass
+        async with pool.acquire("http://a/v1", "k1") as second: pass
+        # 相同(base_url, api_key)复用同一客户端
+        assert first is second
+        async with pool.acquire("http://a/v1", "k2") as other: pass
+        async with pool.acquire("http://b/v1", "k1") as another: pass
+        assert other is not first and another is not first
+        assert len(pool) == 3
+        await pool.close()
+
+    async def test_close(self):
+        pool = OpenaiClientPool()
+        async with pool.acquire("http://a/v1", "k1") as client: pass
+        await pool.close()
+        assert len(pool) == 0
+        assert client.is_closed()
+        # 关闭后重新创建
+        async with pool.acquire("http://a/v1", "k1") as fresh:
+            assert fresh is not client and not fresh.is_closed()
+        await pool.close()
+
+    async def test_evict(self):
+        pool = OpenaiClientPool(maxSize=1, idleTimeout=60)
+        async with pool.acquire("http://a/v1", "k1") as first:
+            # 使用中的客户端不回收
+            async with pool.acquire("http://b/v1", "k1") as second: pass
+            assert len(pool) == 1 and not first.is_closed()
+            assert second.is_closed()
+        async with pool.acquire("http://b/v1", "k1") as third: pass
+        # 超出上限时回收最久未使用的
+        assert first.is_closed() and not third.is_closed()
+        assert len(pool) == 1
+        await pool.close()
+
+
+class Test_OpenaiLLM():
+    async def test_upstream_trace(self, fakeOpenai):
+        store = StreamTraceStore()
+        trace = store.start("openai", "agent")
+        chunks = [chunk async for chunk in store.trace(trace, _chat())]
+        assert len(chunks) == 2
+        data = trace.toDict()
+        # AsyncOpenAI不经过共享http客户端, 同样记录上游建连耗时
+        assert data["upstream_connect_ms"] is not None
+        assert data["upstream_connect_ms"] <= data["first_text_ms"]
+        await OpenaiLLM.close()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_runner.py
+@Author  :   一力辉
+'''
+
+import pytest
+from yacs.config import CfgNode as CN
+from digitalHuman.core import BaseRunner
+from digitalHuman.protocol import ENGINE_TYPE, INFER_TYPE
+
+
+class _Runner(BaseRunner):
+    async def run(self, input, **kwargs):
+        return None
+
+
+def _runner() -> _Runner:
+    config = CN({
+        "NAME": "runner",
+        "META": {"infer_type": "stream"},
+        "PARAMETERS": [
+            {"name": "token", "description": "", "type": "string", "required": True, "default": ""},
+            {"name": "speed", "description": "", "type": "float", "required": False, "range": [-2, 6], "default": 0.0},
+            {"name": "count", "description": "", "type": "int", "required": False, "default": 1},
+            {"name": "enable", "description": "", "type": "bool", "required": False, "default": False},
+            {"name": "mode", "description": "", "type": "string", "required": False, "choices": ["2pass"], "default": "2pass"},
+            {"name": "voice", "description": "", "type": "string", "required": False, "choices": ["Getting from voice api..."], "default": "a"},
+        ]
+    })
+    return _Runner(config, ENGINE_TYPE.TTS)
+
+
+class Test_BaseRunner():
+    def test_check_parameter(self):
+        runner = _runner()
+        paramters = runner.checkParameter(token="t", speed="1.5", count="3", enable="true", extra=1)
+        assert paramters == {"token": "t", "speed": 1.5, "count": 3, "enable": True, "mode": "2pass", "voice": "a", "extra": 1}
+        # voice的选项由接口动态获取, 不校验
+        assert runner.checkParameter(token="t", voice="b")["voice"] == "b"
+        with pytest.raises(RuntimeError, match="Missing"):
+            runner.checkParameter(speed=1)
+        with pytest.raises(RuntimeError, match="range"):
+            runner.checkParameter(token="t", speed=7)
+        with pytest.raises(RuntimeError, match="Invalid parameter"):
+            runner.checkParameter(token="t", count="abc")
+        with pytest.raises(RuntimeError, match="choice"):
+            runner.checkParameter(token="t", mode="online")
+
+    def test_cached_desc(self):
+        runner = _runner()
+        assert runner.inferType == INFER_TYPE.STREAM
+        assert runner.desc() is runner.desc()
+        assert [param.name for param in runner.parameters()] == ["token", "speed", "count", "enable", "mode", "voice"]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_tencent.py
+@Author  :   一力辉
+'''
+
+import json
+from digitalHuman.core import TencentCloudApiKey, TencentCloudSigner
+
+API_KEY = TencentCloudApiKey(secret_id="AKIDtest", secret_key="secret")
+
+
+class Test_TencentCloudSigner():
+    def test_sign(self):
+        signer = TencentCloudSigner(service="tts", host="tts.tencentcloudapi.com", version="2019-08-23")
+        payload = json.dumps({"Text": "你好"})
+        headers = signer.sign("TextToVoice", payload, API_KEY, timestamp=1700000000)
+        # 与逐步计算的签名结果一致
+        assert headers["Authorization"] == (
+            "TC3-HMAC-SHA256 Credential=AKIDtest/2023-11-14/tts/tc3_request, "
+            "SignedHeaders=content-type;host;x-tc-action, "
+            "Signature=de32370df3b36cc93f407f8ce3f6692f4e34cbf74c05eaea452a1d2a0a12ea4e"
+        )
+        assert headers["X-TC-Action"] == "TextToVoice"
+        assert headers["X-TC-Timestamp"] == "1700000000"
+        assert headers["X-TC-Version"] == "2019-08-23"
+        assert headers["Host"] == "tts.tencentcloudapi.com"
+
+    def test_date_and_key_change(self):
+        signer = TencentCloudSigner(service="asr", host="asr.tencentcloudapi.com", version="2019-06-14")
+        payload = "{}"
+        today = signer.sign("SentenceRecognition", payload, API_KEY, timestamp=1700000000)
+        tomorrow = signer.sign("SentenceRecognition", payload, API_KEY, timestamp=1700000000 + 86400)
+        assert "2023-11-15/asr" in tomorrow["Authorization"]
+        assert today["Authorization"] != tomorrow["Authorization"].replace("2023-11-15", "2023-11-14")
+        rotated = TencentCloudApiKey(secret_id="AKIDtest", secret_key="rotated")
+        assert signer.sign("SentenceRecognition", payload, rotated, timestamp=1700000000)["Authorization"] != today["Authorization"]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_funasr_pool.py
+@Author  :   一力辉
+'''
+
+import json
+import asyncio
+import websockets
+from digitalHuman.engine.asr import funasrStreamingASR
+from digitalHuman.engine.asr.funasrStreamingASR import FunasrConnectionPool
+
+
+async def _funasr_server(websocket):
+    # 收到结束说话时返回一条残留结果
+    async for message in websocket:
+        if isinstance(message, str) and json.loads(message).get("is_speaking") is False:
+            await websocket.send(json.dumps({"mode": "2pass-offline", "text": "残留"}))
+
+
+class Test_FunasrConnectionPool():
+    async def test_recycle(self, monkeypatch):
+        monkeypatch.setattr(funasrStreamingASR, "POOL_DRAIN_QUIET", 0.05)
+        async with websockets.serve(_funasr_server, "127.0.0.1", 0) as server:
+            url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            pool = FunasrConnectionPool(minIdle=1, maxIdle=2)
+            connection = await pool.acquire(url)
+            # 后台预热空闲连接
+            await asyncio.sleep(0.1)
+            assert pool.idleSize(url) == 1
+            pool.release(url, connection, reusable=True)
+            await asyncio.sleep(0.3)
+            assert pool.idleSize(url) == 2
+            # 最近归还的连接优先复用, 残留结果已被丢弃
+            assert await pool.acquire(url) is connection
+            try:
+                message = await asyncio.wait_for(connection.recv(), timeout=0.1)
+            except asyncio.TimeoutError:
+                message = None
+            assert message is None
+            pool.release(url, connection, reusable=False)
+            await asyncio.sleep(0.1)
+            assert connection.state is websockets.protocol.State.CLOSED
+            await pool.close()
+            assert pool.idleSize(url) == 0
+
+    async def test_skip_closed(self):
+        async with websockets.serve(_funasr_server, "127.0.0.1", 0) as server:
+            url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            pool = FunasrConnectionPool(minIdle=0, maxIdle=2)
+            connection = await pool.acquire(url)
+            pool._put(url, connection)
+            await connection.close()
+            newConnection = await pool.acquire(url)
+            assert newConnection is not connection
+            assert newConnection.state is websockets.protocol.State.OPEN
+            await newConnection.close()
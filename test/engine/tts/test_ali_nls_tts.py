@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_ali_nls_tts.py
+@Author  :   一力辉
+'''
+
+import os
+import sys
+import types
+import importlib
+import pytest
+from yacs.config import CfgNode as CN
+from digitalHuman.utils import renderMetrics
+from digitalHuman.utils.env import CONFIG_ROOT_PATH
+from digitalHuman.protocol import ENGINE_TYPE, AUDIO_TYPE, TextMessage
+
+
+class _FakeSynthesizer():
+    """模拟NLS SDK: start时在合成线程内回调, text为timeout时不回调"""
+    instances = []
+
+    def __init__(self, on_data, on_completed, on_error, **kwargs):
+        self.on_data = on_data
+        self.on_completed = on_completed
+        self.on_error = on_error
+        self.closed = False
+        _FakeSynthesizer.instances.append(self)
+
+    def start(self, text, **kwargs):
+        if text == "timeout": return
+        if text == "error":
+            self.on_error("fake error")
+            return
+        for chunk in text.split(","):
+            self.on_data(chunk.encode("utf-8"))
+        self.on_completed("done")
+
+    def shutdown(self):
+        self.closed = True
+
+
+@pytest.fixture
+def nlsModule(monkeypatch):
+    fake = types.ModuleType("nls")
+    fake.NlsSpeechSynthesizer = _FakeSynthesizer
+    monkeypatch.setitem(sys.modules, "nls", fake)
+    module = importlib.import_module("digitalHuman.engine.tts.aliNLSTTS")
+    monkeypatch.setattr(module, "nls", fake)
+    monkeypatch.setattr(module, "SYNTHESIZE_TIMEOUT", 0.1)
+    _FakeSynthesizer.instances = []
+    return module
+
+
+def _pool(module, workers: int = 1):
+    config = CN({"NAME": "AliNLSTTS", "URL": "ws://test", "FORMAT": "mp3", "SAMPLE_RATE": 16000})
+    return module.NlsSynthesizerPool(config, workers)
+
+
+async def _collect(pool, text: str, token: str = "token") -> bytes:
+    return b"|".join([data async for data in pool.synthesize(text, "voice", token, "app")])
+
+
+class Test_NlsSynthesizerPool():
+    async def test_order_and_reuse(self, nlsModule):
+        pool = _pool(nlsModule)
+        assert await _collect(pool, "1,2,3") == b"1|2|3"
+        assert await _collect(pool, "4,5") == b"4|5"
+        # 同一线程复用合成器
+        assert len(_FakeSynthesizer.instances) == 1
+        assert pool.stats() == {"workers": 1, "queued": 0, "running": 0}
+        # token变化时重新创建
+        await _collect(pool, "6", token="other")
+        assert len(_FakeSynthesizer.instances) == 2
+        pool.shutdown()
+
+    async def test_timeout_drops_session(self, nlsModule):
+        pool = _pool(nlsModule)
+        with pytest.raises(TimeoutError):
+            await _collect(pool, "timeout")
+        stale = _FakeSynthesizer.instances[0]
+        assert stale.closed
+        assert await _collect(pool, "1,2") == b"1|2"
+        assert len(_FakeSynthesizer.instances) == 2
+        # 被放弃的会话迟到的回调不影响后续请求
+        stale.on_data(b"late")
+        stale.on_completed("late")
+        assert await _collect(pool, "3") == b"3"
+        assert pool.stats()["running"] == 0
+        pool.shutdown()
+
+    async def test_error_drops_session(self, nlsModule):
+        pool = _pool(nlsModule)
+        with pytest.raises(RuntimeError, match="fake error"):
+            await _collect(pool, "error")
+        assert await _collect(pool, "1") == b"1"
+        assert len(_FakeSynthesizer.instances) == 2
+        pool.shutdown()
+
+    async def test_metrics(self, nlsModule):
+        pool = _pool(nlsModule, workers=2)
+        text = renderMetrics()
+        assert 'adh_nls_pool_workers{name="AliNLSTTS"} 2' in text
+        assert 'adh_nls_pool_queued{name="AliNLSTTS"} 0' in text
+        assert 'adh_nls_pool_running{name="AliNLSTTS"} 0' in text
+        # 关闭后不再导出
+        pool.shutdown()
+        assert "adh_nls_pool_workers" not in renderMetrics()
+
+
+class Test_AliNLSTTS():
+    async def test_run(self, nlsModule, monkeypatch):
+        with open(os.path.join(CONFIG_ROOT_PATH, "engines", "tts", "aliNLS.yaml"), encoding="utf-8") as f:
+            engine = nlsModule.AliNLSTTS(CN.load_cfg(f), ENGINE_TYPE.TTS)
+        chunks = []
+        async def synthesize(**kwargs):
+            for chunk in chunks: yield chunk
+        monkeypatch.setattr(engine._pool, "synthesize", synthesize)
+        chunks[:] = [b"RIFF", b"data"]
+        output = await engine.run(TextMessage(data="你好"), token="t")
+        assert output.data == b"RIFFdata"
+        assert (output.type, output.sampleRate, output.sampleWidth) == (AUDIO_TYPE.WAV, 16000, 2)
+        # 没有音频时抛出错误而不是返回None
+        chunks[:] = []
+        with pytest.raises(RuntimeError, match="audio content"):
+            await engine.run(TextMessage(data="你好"), token="t")
+        engine.release()
+
+    async def test_run_error(self, nlsModule, monkeypatch):
+        with open(os.path.join(CONFIG_ROOT_PATH, "engines", "tts", "aliNLS.yaml"), encoding="utf-8") as f:
+            engine = nlsModule.AliNLSTTS(CN.load_cfg(f), ENGINE_TYPE.TTS)
+        monkeypatch.setattr(engine, "generate_remotion_ssml_text", lambda text: text)
+        # 合成失败的错误直接抛出
+        with pytest.raises(RuntimeError, match="fake error"):
+            await engine.run(TextMessage(data="error"), token="t")
+        engine.release()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_tencent_tts.py
+@Author  :   一力辉
+'''
+
+import os
+import time
+import asyncio
+from yacs.config import CfgNode as CN
+from digitalHuman.protocol import TextMessage, ENGINE_TYPE
+from digitalHuman.utils import splitText, AsyncRateLimiter
+from digitalHuman.utils.env import CONFIG_ROOT_PATH
+from digitalHuman.engine.tts.tencentTTS import TencentApiTts, MAX_INPUT_LENGTH
+
+
+def _engine() -> TencentApiTts:
+    with open(os.path.join(CONFIG_ROOT_PATH, "engines", "tts", "tencentAPI.yaml"), encoding="utf-8") as f:
+        config = CN.load_cfg(f)
+    return TencentApiTts(config, ENGINE_TYPE.TTS)
+
+
+class Test_TencentApiTts():
+    def test_split_text(self):
+        assert splitText("你好。", MAX_INPUT_LENGTH) == ["你好。"]
+        text = "今天天气不错。" * 30
+        segments = splitText(text, MAX_INPUT_LENGTH)
+        assert "".join(segments) == text
+        assert all(len(segment) <= MAX_INPUT_LENGTH and segment.endswith("。") for segment in segments)
+        # 没有句末标点时在句中标点处断开, 都没有时按长度截断
+        assert splitText("一二三，四五六七", 5) == ["一二三，", "四五六七"]
+        assert splitText("一二三四五六七", 5) == ["一二三四五", "六七"]
+
+    async def test_segments_in_order(self, monkeypatch):
+        engine = _engine()
+
+        async def synthesize(text, *args):
+            # 后面的分段先完成
+            await asyncio.sleep(0.05 if text.startswith("一") else 0.01)
+            return text.encode("utf-8")
+        monkeypatch.setattr(engine, "_synthesize", synthesize)
+
+        text = "一" * 100 + "。" + "二" * 100 + "。" + "三" * 10
+        chunks = [chunk async for chunk in engine.stream(TextMessage(data=text))]
+        assert b"".join(chunks).decode("utf-8") == text
+        assert len(chunks) == 2
+        output = await engine.run(TextMessage(data=text))
+        assert output.data.decode("utf-8") == text
+
+    async def test_rate_limiter(self):
+        limiter = AsyncRateLimiter(rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+        assert time.monotonic() - start >= 0.09
+        # 不限流
+        unlimited = AsyncRateLimiter(rate=0)
+        start = time.monotonic()
+        for _ in range(100):
+            await unlimited.acquire()
+        assert time.monotonic() - start < 0.05
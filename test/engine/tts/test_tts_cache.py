@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_tts_cache.py
+@Author  :   一力辉
+'''
+
+import asyncio
+import pytest
+from yacs.config import CfgNode as CN
+from digitalHuman.protocol import TextMessage, AudioMessage
+from digitalHuman.engine.tts import ttsCache as ttsCacheModule
+from digitalHuman.engine.tts.ttsCache import TTSCache
+
+
+class FakeEngine():
+    name = "Fake"
+
+    def __init__(self, delay: float = 0, error: bool = False):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    def checkParameter(self, **kwargs):
+        return {"voice": "default", **kwargs}
+
+    async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error: raise RuntimeError("synthesize failed")
+        return AudioMessage(data=input.data.encode("utf-8"))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch) -> TTSCache:
+    monkeypatch.setattr(ttsCacheModule, "CACHE_PATH", str(tmp_path))
+    # 绕过单例, 每个用例使用独立实例
+    cache = object.__new__(TTSCache)
+    TTSCache.__init__(cache)
+    cache.setup(CN({"ENABLE": True, "MEMORY_MAX_BYTES": 16, "DISK_MAX_BYTES": 1024, "TTL": 0}))
+    return cache
+
+
+class Test_TTSCache():
+    async def test_memory_and_disk_hit(self, cache: TTSCache):
+        engine = FakeEngine()
+        first = await cache.run(engine, TextMessage(data="你好 "), user="a")
+        second = await cache.run(engine, TextMessage(data="你好"), user="b")
+        assert engine.calls == 1
+        assert second.data == first.data
+        assert cache.stats()["memory_hits"] == 1
+        # 参数不同则不命中
+        await cache.run(engine, TextMessage(data="你好"), voice="other")
+        assert engine.calls == 2
+        # 超过内存上限后从磁盘读取
+        await cache.run(engine, TextMessage(data="a long sentence"))
+        await cache.run(engine, TextMessage(data="你好"))
+        assert engine.calls == 3
+        assert cache.stats()["disk_hits"] == 1
+
+    async def test_single_flight(self, cache: TTSCache):
+        engine = FakeEngine(delay=0.05)
+        outputs = await asyncio.gather(*[cache.run(engine, TextMessage(data="并发"), user=str(i)) for i in range(5)])
+        # 并发的相同请求只合成一次, 各自得到独立的副本
+        assert engine.calls == 1
+        assert cache.stats()["misses"] == 1
+        assert all(output.data == "并发".encode("utf-8") for output in outputs)
+        assert len({id(output) for output in outputs}) == 5
+
+    async def test_single_flight_error(self, cache: TTSCache):
+        engine = FakeEngine(delay=0.05, error=True)
+        results = await asyncio.gather(*[cache.run(engine, TextMessage(data="失败")) for _ in range(3)], return_exceptions=True)
+        assert engine.calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        # 失败不缓存, 之后重新合成
+        engine.error = False
+        assert (await cache.run(engine, TextMessage(data="失败"))).data == "失败".encode("utf-8")
+        assert engine.calls == 2
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_voice_catalog.py
+@Author  :   一力辉
+'''
+
+import os
+import asyncio
+import pytest
+from yacs.config import CfgNode as CN
+from digitalHuman.protocol import TextMessage, AudioMessage, ENGINE_TYPE, GENDER_TYPE
+from digitalHuman.utils.env import CONFIG_ROOT_PATH
+from digitalHuman.engine import BaseTTSEngine, VoiceCatalog, VoiceInfo
+from digitalHuman.engine.tts.tencentTTS import TencentApiTts
+from digitalHuman.engine.tts.cozeTTS import CozeApiTts
+
+
+VOICES = [
+    VoiceInfo(id="1", name="A", gender=GENDER_TYPE.FEMALE, locale="zh-CN"),
+    VoiceInfo(id="2", name="B", gender=GENDER_TYPE.MALE, locale="zh-CN"),
+    VoiceInfo(id="3", name="C", gender=GENDER_TYPE.FEMALE, locale="en-US"),
+]
+
+class _RemoteTTS(BaseTTSEngine):
+    def setup(self):
+        self.loaded = []
+        self.release_load = asyncio.Event()
+
+    def defaultVoices(self):
+        return VOICES[:1]
+
+    def voiceKey(self, **kwargs):
+        return kwargs.get("token")
+
+    async def loadVoices(self, **kwargs):
+        self.loaded.append(kwargs.get("token"))
+        await self.release_load.wait()
+        return VOICES
+
+    async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
+        return AudioMessage(data=b"")
+
+
+class Test_VoiceCatalog():
+    def test_index(self):
+        catalog = VoiceCatalog(VOICES)
+        assert catalog.get("B").id == "2"
+        assert catalog.getById("3").name == "C"
+        assert catalog.get("D") is None
+        assert [voice.name for voice in catalog.filter(gender="female")] == ["A", "C"]
+        assert [voice.name for voice in catalog.filter(locale="zh-CN")] == ["A", "B"]
+        assert [voice.name for voice in catalog.filter(GENDER_TYPE.FEMALE, "en-US")] == ["C"]
+        assert [voice.name for voice in catalog.list()] == ["A", "B", "C"]
+
+    async def test_background_load(self):
+        engine = _RemoteTTS(CN({"NAME": "RemoteTTS"}), ENGINE_TYPE.TTS)
+        # 远程列表加载完成前返回内置音色, 不等待网络
+        voices = await asyncio.wait_for(engine.voices(token="t1"), 0.1)
+        assert [voice.name for voice in voices] == ["A"]
+        assert engine.findVoice("B", token="t1") is None
+        await asyncio.sleep(0)
+        assert engine.loaded == ["t1"]
+        engine.release_load.set()
+        await asyncio.sleep(0.01)
+        assert engine.findVoice("B", token="t1").id == "2"
+        # 只加载一次, 不同token使用各自的目录
+        await engine.voices(token="t1")
+        await engine.voices(token="t2")
+        await asyncio.sleep(0.01)
+        assert engine.loaded == ["t1", "t2"]
+
+    async def test_resolve_voice(self):
+        engine = _RemoteTTS(CN({"NAME": "RemoteTTS"}), ENGINE_TYPE.TTS)
+        # 首次查找等待远程列表加载完成
+        task = asyncio.create_task(engine.resolveVoice("B", token="t1"))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        engine.release_load.set()
+        assert (await task).id == "2"
+        assert (await engine.resolveVoice("3", token="t1")).name == "C"
+        assert await engine.resolveVoice("D", token="t1") is None
+        assert engine.loaded == ["t1"]
+
+    async def test_coze_voice(self, monkeypatch):
+        engine = CozeApiTts(CN({"NAME": "Coze"}), ENGINE_TYPE.TTS)
+        async def loadVoices(**kwargs):
+            return VOICES
+        monkeypatch.setattr(engine, "loadVoices", loadVoices)
+        with pytest.raises(RuntimeError, match="voice not found"):
+            await engine.run(TextMessage(data="你好"), token="t", bot_id="b", voice="D")
+
+    async def test_load_failed(self):
+        async def loader():
+            raise RuntimeError("network error")
+        catalog = VoiceCatalog(VOICES[:1], loader, interval=60)
+        catalog.refresh()
+        await asyncio.sleep(0.01)
+        # 失败时保留旧列表
+        assert [voice.name for voice in catalog.list()] == ["A"]
+
+    async def test_tencent_voices(self):
+        with open(os.path.join(CONFIG_ROOT_PATH, "engines", "tts", "tencentAPI.yaml"), encoding="utf-8") as f:
+            engine = TencentApiTts(CN.load_cfg(f), ENGINE_TYPE.TTS)
+        voice = engine.findVoice("爱小璟")
+        assert voice.id == "601012" and voice.locale == "zh-CN"
+        voices = await engine.voices(gender="male", locale="en-US")
+        assert [voice.name for voice in voices] == ["WeJames"]
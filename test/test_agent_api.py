@@ -6,6 +6,8 @@
 
 import pytest
 from httpx import AsyncClient
+from digitalHuman.agent import AgentPool
+from digitalHuman.utils import config
 
 
 class Test_AGENT_API():
@@ -33,4 +35,72 @@ class Test_AGENT_API():
         assert resp.status_code == 200
         resp = resp.json()
         assert resp["code"] == 0
-        assert resp["data"] == "你好"
\ No newline at end of file
+        assert resp["data"] == "你好"
+
+    # ======================== trace =========================
+    @pytest.mark.asyncio(scope="session")
+    async def test_stream_trace(self, version: str, client: AsyncClient):
+        url = f"/adh/agent/{version}/engine"
+        item = {"engine": "default", "data": "你好"}
+        resp = await client.post(url, json=item, headers={"request-id": "test-trace"})
+        assert resp.status_code == 200
+        assert resp.headers["request-id"] == "test-trace"
+        assert "event: DONE" in resp.text
+        resp = await client.get(f"/adh/agent/{version}/trace/test-trace")
+        resp = resp.json()
+        assert resp["code"] == 0
+        assert resp["data"]["status"] == "done"
+        assert resp["data"]["first_text_ms"] is not None
+        assert resp["data"]["done_ms"] >= resp["data"]["first_text_ms"]
+        resp = await client.get(f"/adh/agent/{version}/trace", params={"limit": 1})
+        assert resp.json()["data"][0]["request_id"] == "test-trace"
+
+    # ======================= speech =========================
+    @pytest.mark.asyncio(scope="session")
+    async def test_speech_unknown_tts(self, version: str, client: AsyncClient):
+        url = f"/adh/agent/{version}/speech"
+        item = {"engine": "default", "data": "你好", "tts": {"engine": "NoSuchTTS"}}
+        resp = await client.post(url, json=item)
+        assert resp.status_code == 200
+        # 引擎不存在时在响应开始前返回错误事件
+        assert "event: ERROR" in resp.text
+        assert "event: DONE" in resp.text
+
+    # ======================= catalog ========================
+    @pytest.mark.asyncio(scope="session")
+    async def test_engine_catalog(self, version: str, client: AsyncClient):
+        url = f"/adh/agent/{version}/engine"
+        resp = await client.get(url)
+        assert resp.status_code == 200
+        assert resp.json()["code"] == 0
+        assert "Repeater" in [engine["name"] for engine in resp.json()["data"]]
+        etag = resp.headers["etag"]
+        resp = await client.get(url, headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        # 配置未变时重新setup, etag不变
+        AgentPool().setup(config.SERVER.AGENTS)
+        resp = await client.get(url, headers={"If-None-Match": f'W/{etag}, "other"'})
+        assert resp.status_code == 304
+        resp = await client.get(f"{url}/Repeater")
+        assert resp.status_code == 200 and "etag" in resp.headers
+        # 不存在的引擎不缓存
+        resp = await client.get(f"{url}/NotExistAgent")
+        assert resp.json()["code"] != 0
+        assert "etag" not in resp.headers
+
+    async def test_release_on_config_change(self, monkeypatch):
+        agentPool = AgentPool()
+        agent = agentPool.get("Repeater")
+        released = []
+        monkeypatch.setattr(agent, "release", lambda: released.append(agent.name))
+        agents = config.SERVER.AGENTS.clone()
+        agents.defrost()
+        for cfg in agents.SUPPORT_LIST:
+            if cfg.NAME == "Repeater": cfg.DESC = "changed"
+        try:
+            agentPool.setup(agents)
+            assert released == ["Repeater"]
+            assert agentPool.get("Repeater") is not agent
+        finally:
+            agentPool.setup(config.SERVER.AGENTS)
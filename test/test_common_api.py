@@ -8,6 +8,7 @@ from starlette.testclient import TestClient
 from httpx import AsyncClient
 
 from digitalHuman.server import app
+from digitalHuman.utils import getHttpClient
 
 
 class Test_COMMON_API():
@@ -28,3 +29,24 @@ class Test_COMMON_API():
             data = ws.receive_text()
             assert data == "pong"
 
+
+    @pytest.mark.asyncio(scope="session")
+    async def test_http_stats(self, version: str, client: AsyncClient):
+        url = f"/adh/common/{version}/stats/http"
+        # 测试客户端不执行lifespan, 手动创建默认客户端
+        getHttpClient()
+        resp = await client.get(url)
+        assert resp.status_code == 200
+        resp = resp.json()
+        assert resp["code"] == 0
+        assert "default" in resp["data"]
+        assert resp["data"]["default"]["max_connections"] > 0
+
+    @pytest.mark.asyncio(scope="session")
+    async def test_metrics(self, version: str, client: AsyncClient):
+        url = f"/adh/common/{version}/metrics"
+        resp = await client.get(url)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert "# TYPE adh_runner_requests_total counter" in resp.text
+        assert "# TYPE adh_runner_latency_seconds histogram" in resp.text
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_protocol.py
+@Author  :   一力辉
+'''
+
+import pytest
+from digitalHuman.protocol import (
+    struct_message, struct_messages, parse_message, parse_messages,
+    WS_SEND_ACTION_TYPE, WS_RECV_ACTION_TYPE, PROTOCOL_HEADER_SIZE, AudioMessage
+)
+
+
+class Test_Protocol():
+    def test_roundtrip(self):
+        message = struct_message(WS_SEND_ACTION_TYPE.ENGINE_PARTIAL_OUTPUT, "你好")
+        assert len(message) == PROTOCOL_HEADER_SIZE + len("你好".encode("utf-8"))
+        action, payload = parse_message(message)
+        assert action == WS_SEND_ACTION_TYPE.ENGINE_PARTIAL_OUTPUT
+        assert payload == "你好".encode("utf-8")
+        assert parse_message(struct_message(WS_SEND_ACTION_TYPE.PONG, b"")) == ("PONG", b"")
+
+    def test_batch_frames(self):
+        audio = bytes(range(256)) * 8
+        message = struct_messages([
+            (WS_RECV_ACTION_TYPE.ENGINE_PARTIAL_INPUT, audio),
+            (WS_RECV_ACTION_TYPE.ENGINE_FINAL_INPUT, b""),
+            (WS_RECV_ACTION_TYPE.ENGINE_STOP, ""),
+        ])
+        frames = parse_messages(message)
+        assert [action for action, _ in frames] == ["PARTIAL_INPUT", "FINAL_INPUT", "ENGINE_STOP"]
+        payload = frames[0][1]
+        # payload直接引用原消息
+        assert isinstance(payload, memoryview) and payload.obj is message
+        assert payload == audio
+        assert len(frames[1][1]) == 0
+        # 单帧解析不接受多帧消息
+        with pytest.raises(ValueError):
+            parse_message(message)
+
+    def test_invalid_message(self):
+        with pytest.raises(ValueError):
+            parse_messages(b"PING")
+        with pytest.raises(ValueError):
+            parse_messages(struct_message("PING", b"1234")[:-1])
+        with pytest.raises(ValueError):
+            struct_message("A" * 19, b"")
+
+    def test_audio_message(self):
+        # 字符串按base64解码, 内部统一为bytes
+        message = AudioMessage(data="aGVsbG8=")
+        assert message.data == b"hello"
+        assert AudioMessage(data=memoryview(b"hello")).data == b"hello"
+        # base64只计算一次, data替换后重新计算
+        assert message.base64 == "aGVsbG8="
+        assert message.base64 is message.base64
+        message.data = b"world"
+        assert message.base64 == "d29ybGQ="
+        assert AudioMessage().base64 == ""
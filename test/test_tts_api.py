@@ -5,10 +5,46 @@
 '''
 
 import os
+import json
 import base64
 import pytest
 from httpx import AsyncClient
+from fastapi import WebSocketDisconnect
+from starlette.testclient import TestClient
+from yacs.config import CfgNode as CN
 from digitalHuman.utils.env import  OUTPUT_PATH
+from digitalHuman.utils import pcmToWav
+from digitalHuman.engine import EnginePool, BaseTTSEngine
+from digitalHuman.engine.tts.ttsCache import TTSCache
+from digitalHuman.protocol import ENGINE_TYPE, AUDIO_TYPE, TextMessage, AudioMessage
+from digitalHuman.protocol import WS_RECV_ACTION_TYPE, WS_SEND_ACTION_TYPE, struct_message, parse_message
+from digitalHuman.server import app
+from digitalHuman.server.core import api_tts_v0_impl
+from digitalHuman.server.api.tts.tts_api_v0 import api_tts_infer_audio
+from digitalHuman.server.models import TTSEngineInput
+
+
+class _FakeTTS(BaseTTSEngine):
+    async def run(self, input: TextMessage, **kwargs) -> AudioMessage:
+        data = pcmToWav(b"\x00\x00" * 160, sampleRate=16000)
+        return AudioMessage(data=base64.b64encode(data).decode("utf-8"), type=AUDIO_TYPE.WAV, sampleRate=16000, sampleWidth=2)
+
+    async def stream(self, input: TextMessage, **kwargs):
+        self.closed = False
+        try:
+            yield b"ID3" + b"\x00" * 7
+            yield b"\xff\xfb" + b"\x00" * 10
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def fakeTTS(monkeypatch) -> str:
+    engine = _FakeTTS(CN({"NAME": "FakeTTS"}), ENGINE_TYPE.TTS)
+    monkeypatch.setitem(EnginePool()._pool[ENGINE_TYPE.TTS], "FakeTTS", engine)
+    # 不经过缓存, 避免写入outputs/tts_cache
+    monkeypatch.setattr(TTSCache(), "_enable", False)
+    return "FakeTTS"
 
 
 class Test_TTS_API():
@@ -48,4 +84,87 @@ class Test_TTS_API():
         audio = base64.b64decode(resp["data"])
         assert len(audio) > 10
         with open(os.path.join(OUTPUT_PATH, "test_edgeAPI_infer." + resp["format"]), "wb") as f:
-            f.write(audio)
\ No newline at end of file
+            f.write(audio)
+
+    # ====================== 二进制音频 =======================
+    @pytest.mark.asyncio(scope="session")
+    async def test_binary_audio(self, version: str, client: AsyncClient, fakeTTS: str):
+        item = {"engine": fakeTTS, "data": "二进制音频"}
+        resp = await client.post(f"/adh/tts/{version}/engine/audio", json=item)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "audio/wav"
+        assert resp.headers["x-sample-rate"] == "16000"
+        assert resp.content[:4] == b"RIFF"
+        # Accept协商
+        resp = await client.post(f"/adh/tts/{version}/engine", json=item, headers={"Accept": "audio/*"})
+        assert resp.headers["content-type"] == "audio/wav"
+        assert len(resp.content) == 44 + 320
+        # json接口返回base64
+        resp = await client.post(f"/adh/tts/{version}/engine", json=item)
+        assert base64.b64decode(resp.json()["data"])[:4] == b"RIFF"
+
+    @pytest.mark.asyncio(scope="session")
+    async def test_binary_audio_stream(self, version: str, client: AsyncClient, fakeTTS: str):
+        item = {"engine": fakeTTS, "data": "流式音频"}
+        resp = await client.post(f"/adh/tts/{version}/engine/audio", json=item, params={"stream": True})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "audio/mpeg"
+        assert resp.headers["x-sample-rate"] == "16000"
+        assert resp.headers["x-sample-width"] == "2"
+        assert len(resp.content) == 22
+        resp = await client.post(f"/adh/tts/{version}/engine/audio", json={"engine": "NotExist", "data": "错误"})
+        assert resp.status_code == 500
+        assert resp.json()["code"] != 0
+
+    @pytest.mark.asyncio(scope="session")
+    async def test_binary_audio_stream_close(self, fakeTTS: str):
+        resp = await api_tts_infer_audio(TTSEngineInput(engine=fakeTTS, data="断开"), None, stream=True)
+        body = resp.body_iterator
+        assert len(await anext(body)) == 10
+        # 客户端断开时关闭引擎的流
+        await body.aclose()
+        assert EnginePool().getEngine(ENGINE_TYPE.TTS, fakeTTS).closed
+
+    # ====================== 流式websocket =======================
+    @pytest.mark.asyncio(scope="session")
+    async def test_stream_websocket(self, version: str, fakeTTS: str):
+        client = TestClient(app)
+        with client.websocket_connect(f"/adh/tts/{version}/engine/stream") as ws:
+            ws.send_bytes(struct_message(WS_RECV_ACTION_TYPE.PING, b""))
+            assert parse_message(ws.receive_bytes())[0] == WS_SEND_ACTION_TYPE.PONG
+            ws.send_bytes(struct_message(WS_RECV_ACTION_TYPE.ENGINE_START, json.dumps({"engine": fakeTTS, "config": {}})))
+            assert parse_message(ws.receive_bytes())[0] == WS_SEND_ACTION_TYPE.ENGINE_STARTED
+            ws.send_bytes(struct_message(WS_RECV_ACTION_TYPE.ENGINE_PARTIAL_INPUT, "流式"))
+            ws.send_bytes(struct_message(WS_RECV_ACTION_TYPE.ENGINE_FINAL_INPUT, "音频"))
+            chunks = []
+            while True:
+                action, payload = parse_message(ws.receive_bytes())
+                if action != WS_SEND_ACTION_TYPE.ENGINE_PARTIAL_OUTPUT: break
+                chunks.append(payload)
+            assert action == WS_SEND_ACTION_TYPE.ENGINE_FINAL_OUTPUT
+            assert len(b"".join(chunks)) == 22
+            ws.send_bytes(struct_message(WS_RECV_ACTION_TYPE.ENGINE_STOP, b""))
+            assert parse_message(ws.receive_bytes())[0] == WS_SEND_ACTION_TYPE.ENGINE_STOPPED
+
+    @pytest.mark.asyncio(scope="session")
+    async def test_stream_websocket_disconnect(self, fakeTTS: str, monkeypatch):
+        class _Websocket():
+            """发送第一块音频时客户端断开"""
+            def __init__(self):
+                self.messages = [
+                    struct_message(WS_RECV_ACTION_TYPE.ENGINE_START, json.dumps({"engine": fakeTTS, "config": {}})),
+                    struct_message(WS_RECV_ACTION_TYPE.ENGINE_FINAL_INPUT, "断开"),
+                ]
+            async def accept(self): pass
+            async def receive_bytes(self) -> bytes:
+                if not self.messages: raise WebSocketDisconnect(code=1000)
+                return self.messages.pop(0)
+            async def send_bytes(self, data: bytes):
+                if parse_message(data)[0] == WS_SEND_ACTION_TYPE.ENGINE_PARTIAL_OUTPUT:
+                    raise WebSocketDisconnect(code=1006)
+        errors = []
+        monkeypatch.setattr(api_tts_v0_impl.logger, "error", lambda *args, **kwargs: errors.append(args))
+        await api_tts_v0_impl.tts_stream_infer(None, _Websocket())
+        # 断开不记录为错误, 引擎的流及时关闭
+        assert errors == []
+        assert EnginePool().getEngine(ENGINE_TYPE.TTS, fakeTTS).closed
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_async_cache.py
+@Author  :   一力辉
+'''
+
+import asyncio
+import pytest
+from digitalHuman.utils import AsyncTTLCache
+
+
+class Test_AsyncTTLCache():
+    async def test_single_flight(self):
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "voice"
+
+        cache = AsyncTTLCache(ttl=10)
+        results = await asyncio.gather(*[cache.get("bot", loader) for _ in range(10)])
+        assert results == ["voice"] * 10
+        assert await cache.get("bot", loader) == "voice"
+        assert len(calls) == 1
+
+    async def test_refresh_and_expire(self):
+        values = iter(["v1", "v2", "v3"])
+
+        async def loader():
+            return next(values)
+
+        cache = AsyncTTLCache(ttl=0.2, refreshBefore=0.1)
+        assert await cache.get("bot", loader) == "v1"
+        await asyncio.sleep(0.12)
+        # 临近过期返回旧值, 后台刷新
+        assert await cache.get("bot", loader) == "v1"
+        await asyncio.sleep(0.01)
+        assert await cache.get("bot", loader) == "v2"
+        await asyncio.sleep(0.25)
+        # 已过期同步加载
+        assert await cache.get("bot", loader) == "v3"
+
+    async def test_error_not_cached(self):
+        async def failed():
+            raise RuntimeError("bot not found")
+
+        async def loader():
+            return "voice"
+
+        cache = AsyncTTLCache(ttl=10, maxSize=1)
+        with pytest.raises(RuntimeError):
+            await cache.get("bot", failed)
+        assert await cache.get("bot", loader) == "voice"
+        await cache.get("other", loader)
+        assert len(cache) == 1
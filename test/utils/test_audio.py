@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_audio.py
+@Author  :   一力辉
+'''
+
+import wave
+import numpy as np
+from io import BytesIO
+import asyncio
+from digitalHuman.utils import (
+    detectSpeech, trimSilence, wavToPcm, pcmToWav, convertPcm, wavToMp3, wavToMp3Async,
+    wavHeader, WavStreamDecoder, Mp3StreamEncoder, audioMimeType
+)
+
+SAMPLE_RATE = 16000
+
+
+def _wav(samples: np.ndarray, sampleRate: int = SAMPLE_RATE) -> bytes:
+    data = BytesIO()
+    with wave.open(data, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sampleRate)
+        writer.writeframes(samples.astype(np.int16).tobytes())
+    return data.getvalue()
+
+
+def _speech(silence: float, speech: float) -> np.ndarray:
+    silent = np.zeros(int(SAMPLE_RATE * silence))
+    t = np.arange(int(SAMPLE_RATE * speech)) / SAMPLE_RATE
+    tone = 8000 * np.sin(2 * np.pi * 440 * t)
+    return np.concatenate([silent, tone, silent])
+
+
+class Test_Audio():
+    def test_detect_speech(self):
+        pcm = _speech(1.0, 0.5).astype(np.int16).tobytes()
+        start, end = detectSpeech(pcm, SAMPLE_RATE, 2, paddingMs=0)
+        # 按30ms帧对齐
+        assert abs(start - SAMPLE_RATE) < SAMPLE_RATE * 0.03
+        assert abs(end - SAMPLE_RATE * 1.5) < SAMPLE_RATE * 0.03
+        assert detectSpeech(np.zeros(SAMPLE_RATE, dtype=np.int16).tobytes(), SAMPLE_RATE, 2) is None
+
+    def test_trim_silence(self):
+        trimmed, duration, trimmedDuration = trimSilence(_wav(_speech(1.0, 0.5)), paddingMs=100)
+        assert abs(duration - 2.5) < 1e-6
+        assert 1.7 < trimmedDuration < 1.8
+        with wave.open(BytesIO(trimmed), "rb") as reader:
+            assert reader.getframerate() == SAMPLE_RATE
+            assert abs(reader.getnframes() / SAMPLE_RATE - (duration - trimmedDuration)) < 1e-6
+
+    def test_silent_and_invalid(self):
+        trimmed, duration, trimmedDuration = trimSilence(_wav(np.zeros(SAMPLE_RATE)))
+        assert trimmed is None and duration == trimmedDuration == 1.0
+        # 无需裁剪时原样返回
+        data = _wav(_speech(0, 1.0))
+        assert trimSilence(data) == (data, 1.0, 0.0)
+        assert trimSilence(b"ID3 not a wav") == (b"ID3 not a wav", 0.0, 0.0)
+
+    def test_wav_pcm(self):
+        pcm = _speech(0, 0.1).astype(np.int16).tobytes()
+        wav = pcmToWav(pcm, SAMPLE_RATE)
+        assert wav == _wav(_speech(0, 0.1))
+        assert wavToPcm(wav) == (pcm, SAMPLE_RATE, 2, 1)
+        # 分块输入流式解析
+        decoder = WavStreamDecoder()
+        output = b"".join(decoder.feed(wav[i:i + 7]) for i in range(0, len(wav), 7))
+        assert decoder.ready and output == pcm
+        assert (decoder.sampleRate, decoder.sampleWidth, decoder.channels) == (SAMPLE_RATE, 2, 1)
+        assert len(wavHeader()) == 44
+
+    def test_convert_pcm(self):
+        stereo = np.array([[1000, 3000]] * 480, dtype=np.int16).tobytes()
+        mono = np.frombuffer(convertPcm(stereo, 48000, 2, 2, targetRate=16000, targetChannels=1), dtype=np.int16)
+        assert len(mono) == 160
+        assert np.all(np.abs(mono - 2000) <= 1)
+        pcm = np.zeros(100, dtype=np.int16).tobytes()
+        assert convertPcm(pcm, SAMPLE_RATE, 2) is pcm
+
+    async def test_mp3(self):
+        wav = _wav(_speech(0, 1.0))
+        mp3 = wavToMp3(wav)
+        assert len(mp3) > 0 and len(mp3) < len(wav)
+        assert await wavToMp3Async(wav) == mp3
+        # 并发编码结果一致
+        assert await asyncio.gather(*[wavToMp3Async(wav) for _ in range(4)]) == [mp3] * 4
+        # 流式编码与整段编码结果一致
+        pcm = wavToPcm(wav)[0]
+        encoder = Mp3StreamEncoder(SAMPLE_RATE)
+        chunks = [encoder.encode(pcm[i:i + 999]) for i in range(0, len(pcm), 999)]
+        assert b"".join(chunks) + encoder.flush() == mp3
+
+    def test_mp3_24bit(self):
+        samples = _speech(0, 0.5)
+        pcm16 = samples.astype(np.int16).tobytes()
+        # 16bit采样左移8位得到等价的24bit采样
+        pcm24 = b"".join((int(value) << 8).to_bytes(3, "little", signed=True) for value in samples.astype(np.int16))
+        converted = np.frombuffer(convertPcm(pcm24, SAMPLE_RATE, 3), dtype=np.int16).astype(np.int32)
+        assert np.all(np.abs(converted - np.frombuffer(pcm16, dtype=np.int16)) <= 1)
+        wav24 = pcmToWav(pcm24, SAMPLE_RATE, 3)
+        assert len(wavToMp3(wav24)) > 0
+
+    def test_mime_type(self):
+        assert audioMimeType(pcmToWav(b"\x00\x00" * 10)) == "audio/wav"
+        assert audioMimeType(b"ID3\x04\x00") == "audio/mpeg"
+        assert audioMimeType(b"\xff\xf3\x00") == "audio/mpeg"
+        assert audioMimeType(b"", "mp3") == "audio/mpeg"
+        assert audioMimeType(b"\x00\x01") == "application/octet-stream"
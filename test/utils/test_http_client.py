@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_http_client.py
+@Author  :   一力辉
+'''
+
+import httpx
+import digitalHuman.utils
+from digitalHuman.utils import getHttpClient, closeHttpClients
+from digitalHuman.utils.httpClient import _MeteredTransport, _ClientStats, _profile
+
+
+class Test_HttpClient():
+    def test_profile(self):
+        assert getHttpClient() is getHttpClient("default")
+        assert getHttpClient("dify") is getHttpClient("DIFY")
+        assert getHttpClient("dify") is not getHttpClient()
+        assert not hasattr(digitalHuman.utils, "httpxAsyncClient")
+        # 未配置的项继承DEFAULT
+        default, dify = _profile("DEFAULT"), _profile("DIFY")
+        assert dify["READ_TIMEOUT"] == 300
+        assert dify["MAX_CONNECTIONS"] == default["MAX_CONNECTIONS"]
+        assert getHttpClient("dify").timeout.read == 300
+
+    async def test_close(self):
+        client = getHttpClient()
+        await closeHttpClients()
+        assert client.is_closed
+        # 关闭后重新获取得到新的客户端
+        assert not getHttpClient().is_closed
+
+    async def test_metered_transport(self):
+        stats = _ClientStats()
+
+        async def body():
+            yield b"da"
+            yield b"ta"
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/error":
+                raise httpx.ConnectError("refused")
+            # 流式响应体, 读取完成后才释放
+            return httpx.Response(200, content=body())
+        transport = _MeteredTransport(httpx.MockTransport(handler), stats)
+        async with httpx.AsyncClient(transport=transport, base_url="http://upstream") as client:
+            async with client.stream("GET", "/stream") as response:
+                assert stats.active == 1
+                assert await response.aread() == b"data"
+            assert stats.active == 0
+            try:
+                await client.get("/error")
+            except httpx.ConnectError:
+                pass
+        assert (stats.requests, stats.errors, stats.active) == (2, 1, 0)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_logger.py
+@Author  :   一力辉
+'''
+
+import json
+import queue
+import logging
+from digitalHuman.utils.logger import JsonFormatter, ModuleLevelFilter, SampleFilter, DroppingQueueHandler
+
+
+def _record(level: int = logging.DEBUG, module: str = "difyAgent", msg: str = "chunk", **extra) -> logging.LogRecord:
+    record = logging.LogRecord("system", level, f"/tmp/{module}.py", 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class Test_Logger():
+    def test_module_level(self):
+        filter = ModuleLevelFilter(logging.INFO, {"difyAgent": logging.DEBUG, "edgeTTS": logging.ERROR})
+        assert filter.filter(_record(logging.DEBUG, "difyAgent"))
+        assert not filter.filter(_record(logging.DEBUG, "cozeAgent"))
+        assert filter.filter(_record(logging.INFO, "cozeAgent"))
+        assert not filter.filter(_record(logging.WARNING, "edgeTTS"))
+
+    def test_sample(self):
+        filter = SampleFilter(rate=2)
+        results = [filter.filter(_record(sample="chunk")) for _ in range(5)]
+        assert results == [True, True, False, False, False]
+        # 未标记采样的日志不受影响
+        assert all(filter.filter(_record()) for _ in range(5))
+        # 新窗口输出丢弃条数
+        start, count, dropped = filter._windows["chunk"]
+        filter._windows["chunk"] = (start - 1, count, dropped)
+        record = _record(sample="chunk")
+        assert filter.filter(record)
+        assert "3 suppressed" in record.getMessage()
+
+    def test_json(self):
+        data = json.loads(JsonFormatter().format(_record(logging.INFO, msg="你好")))
+        assert data["level"] == "INFO"
+        assert data["module"] == "difyAgent"
+        assert data["message"] == "你好"
+
+    def test_queue_full(self):
+        handler = DroppingQueueHandler(queue.Queue(1))
+        handler.handle(_record())
+        handler.handle(_record())
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_metrics.py
+@Author  :   一力辉
+'''
+
+import pytest
+from yacs.config import CfgNode as CN
+from digitalHuman.core import BaseRunner
+from digitalHuman.core.instrument import REQUESTS, ERRORS, LATENCY, FIRST_CHUNK, INPUT_BYTES, OUTPUT_BYTES
+from digitalHuman.protocol import ENGINE_TYPE, TextMessage, eventStreamText, eventStreamError
+from digitalHuman.utils.metrics import Counter, Gauge, Histogram
+
+
+class _EchoRunner(BaseRunner):
+    async def run(self, input: TextMessage, **kwargs):
+        if input.data == "error":
+            raise RuntimeError("error")
+        return TextMessage(data=input.data)
+
+
+class _StreamRunner(BaseRunner):
+    async def run(self, input: TextMessage, **kwargs):
+        yield eventStreamText(input.data)
+        if input.data == "error":
+            yield eventStreamError("upstream")
+
+
+class Test_Metrics():
+    def test_render(self):
+        counter = Counter("test_total", "test counter", register=False)
+        counter.inc(2, name="a")
+        gauge = Gauge("test_gauge", "test gauge", register=False)
+        gauge.set(1.5)
+        histogram = Histogram("test_seconds", "test histogram", buckets=(0.1, 1), register=False)
+        histogram.observe(0.05, name="a")
+        histogram.observe(0.5, name="a")
+        histogram.observe(5, name="a")
+        assert 'test_total{name="a"} 2' in counter.render()
+        assert "test_gauge 1.5" in gauge.render()
+        lines = histogram.render()
+        assert 'test_seconds_bucket{name="a",le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{name="a",le="1"} 2' in lines
+        assert 'test_seconds_bucket{name="a",le="+Inf"} 3' in lines
+        assert 'test_seconds_count{name="a"} 3' in lines
+        assert histogram.get(name="a") == (3, 5.55)
+
+    async def test_runner(self):
+        runner = _EchoRunner(CN({"NAME": "echo"}), ENGINE_TYPE.TTS)
+        labels = {"type": str(ENGINE_TYPE.TTS), "name": "echo", "method": "run"}
+        requests, errors = REQUESTS.get(**labels), ERRORS.get(**labels)
+        output = await runner.run(TextMessage(data="你好"))
+        assert output.data == "你好"
+        with pytest.raises(RuntimeError):
+            await runner.run(TextMessage(data="error"))
+        assert REQUESTS.get(**labels) == requests + 2
+        assert ERRORS.get(**labels) == errors + 1
+        assert LATENCY.get(**labels)[0] >= 2
+        assert INPUT_BYTES.get(**labels) >= 6 + 5
+        assert OUTPUT_BYTES.get(**labels) >= 6
+
+    async def test_input_keyword(self):
+        runner = _EchoRunner(CN({"NAME": "keyword"}), ENGINE_TYPE.ASR)
+        labels = {"type": str(ENGINE_TYPE.ASR), "name": "keyword", "method": "run"}
+        await runner.run(input=TextMessage(data="hello"))
+        assert INPUT_BYTES.get(**labels) == 5
+        runner = _StreamRunner(CN({"NAME": "keyword"}), ENGINE_TYPE.AGENT)
+        labels = {"type": str(ENGINE_TYPE.AGENT), "name": "keyword", "method": "run"}
+        async for _ in runner.run(input=TextMessage(data="hi"), streaming=True): pass
+        assert INPUT_BYTES.get(**labels) == 2
+
+    async def test_stream_runner(self):
+        runner = _StreamRunner(CN({"NAME": "stream"}), ENGINE_TYPE.AGENT)
+        labels = {"type": str(ENGINE_TYPE.AGENT), "name": "stream", "method": "run"}
+        errors = ERRORS.get(**labels)
+        chunks = [chunk async for chunk in runner.run(TextMessage(data="hi"))]
+        assert chunks == [eventStreamText("hi")]
+        assert ERRORS.get(**labels) == errors
+        async for _ in runner.run(TextMessage(data="error")): pass
+        assert ERRORS.get(**labels) == errors + 1
+        assert FIRST_CHUNK.get(**labels)[0] >= 2
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_registry.py
+@Author  :   一力辉
+'''
+
+import os
+import sys
+import subprocess
+from digitalHuman.utils import Registry
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Test_Registry():
+    def test_lazy(self):
+        registry = Registry()
+        registry.registerLazy("json", "json")
+        registry.register("dict", dict)
+        assert sorted(registry.list()) == ["dict", "json"]
+        # 模块未注册同名对象
+        assert registry.get("json") is None
+        assert "json" not in registry.list()
+
+    def test_lazy_import(self, tmp_path, monkeypatch):
+        # 使用一次性模块, 不受其它用例导入的影响
+        (tmp_path / "lazyRegistryModule.py").write_text(
+            "from digitalHuman.utils import Registry\n"
+            "REGISTRY = Registry()\n"
+            "REGISTRY.registerLazy('Lazy', __name__ + '_impl')\n",
+            encoding="utf-8"
+        )
+        (tmp_path / "lazyRegistryModule_impl.py").write_text(
+            "from lazyRegistryModule import REGISTRY\n"
+            "REGISTRY.register('Lazy', object)\n",
+            encoding="utf-8"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        for name in ("lazyRegistryModule", "lazyRegistryModule_impl"):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+        import lazyRegistryModule
+        registry = lazyRegistryModule.REGISTRY
+        assert "Lazy" in registry._lazy
+        assert "lazyRegistryModule_impl" not in sys.modules
+        assert registry.list() == ["Lazy"]
+        # 首次获取时导入模块完成注册
+        assert registry.get("Lazy") is object
+        assert "lazyRegistryModule_impl" in sys.modules
+        assert "Lazy" not in registry._lazy
+
+    def test_engine_lazy_import(self):
+        # 在新的解释器中检查, 避免同一会话中其它用例已导入引擎模块
+        code = "\n".join([
+            "import sys",
+            "from digitalHuman.engine import EnginePool",
+            "from digitalHuman.engine.builder import TTSEngines",
+            "from digitalHuman.protocol import ENGINE_TYPE",
+            "from digitalHuman.utils import config",
+            "enginePool = EnginePool()",
+            "enginePool.setup(config.SERVER.ENGINES)",
+            "module = 'digitalHuman.engine.tts.cozeTTS'",
+            "assert 'Coze' in TTSEngines._lazy and module not in sys.modules",
+            "assert 'Coze' in enginePool.listEngine(ENGINE_TYPE.TTS)",
+            "engine = enginePool.getEngine(ENGINE_TYPE.TTS, 'Coze')",
+            "assert module in sys.modules",
+            "assert enginePool.getEngine(ENGINE_TYPE.TTS, 'Coze') is engine",
+        ])
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_PATH, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
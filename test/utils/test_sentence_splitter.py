@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_sentence_splitter.py
+@Author  :   一力辉
+'''
+
+from digitalHuman.utils import SentenceSplitter
+
+
+class Test_SentenceSplitter():
+    def test_streaming_split(self):
+        splitter = SentenceSplitter()
+        assert splitter.feed("你好") == []
+        assert splitter.feed("啊，今天天气真好。我") == ["你好啊，今天天气真好。"]
+        assert splitter.feed("们出去玩吧！好不") == []
+        assert splitter.feed("好？") == ["我们出去玩吧！好不好？"]
+        assert splitter.flush() == []
+
+    def test_flush_remainder(self):
+        splitter = SentenceSplitter()
+        assert splitter.feed("短句。") == []
+        assert splitter.flush() == ["短句。"]
+        assert splitter.flush() == []
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_stream_parser.py
+@Author  :   一力辉
+'''
+
+from digitalHuman.protocol import EVENT_TYPE, eventStreamText, eventStreamThink
+from digitalHuman.utils import StreamingTagParser, resonableStreamingParser
+
+
+def parse(chunks, tags=None):
+    parser = StreamingTagParser(tags)
+    results = []
+    for chunk in chunks:
+        results.extend(parser.feed(chunk))
+    results.extend(parser.flush())
+    return results
+
+
+class Test_StreamParser():
+    def test_split_tags(self):
+        chunks = ["好的<th", "ink>思考", "中</", "think>回答<", "b>"]
+        assert parse(chunks) == [
+            (EVENT_TYPE.TEXT, "好的"),
+            (EVENT_TYPE.THINK, "思考"),
+            (EVENT_TYPE.THINK, "中"),
+            (EVENT_TYPE.TEXT, "回答"),
+            (EVENT_TYPE.TEXT, "<b>"),
+        ]
+
+    def test_repeated_tags(self):
+        chunks = ["<think>a</think>b<think>c</think>d"]
+        assert parse(chunks) == [
+            (EVENT_TYPE.THINK, "a"),
+            (EVENT_TYPE.TEXT, "b"),
+            (EVENT_TYPE.THINK, "c"),
+            (EVENT_TYPE.TEXT, "d"),
+        ]
+
+    def test_custom_tags_and_flush(self):
+        tags = {"think": EVENT_TYPE.THINK, "tool": EVENT_TYPE.TASK}
+        assert parse(["<tool>x</tool>1 < 2", "</thi"], tags) == [
+            (EVENT_TYPE.TASK, "x"),
+            (EVENT_TYPE.TEXT, "1 < 2"),
+            (EVENT_TYPE.TEXT, "</thi"),
+        ]
+
+    def test_tags_share_event(self):
+        # 多个标签对应同一事件类型时各自匹配结束标签
+        tags = {"think": EVENT_TYPE.THINK, "reasoning": EVENT_TYPE.THINK}
+        assert parse(["<think>a</think>b<reasoning>c</rea", "soning>d"], tags) == [
+            (EVENT_TYPE.THINK, "a"),
+            (EVENT_TYPE.TEXT, "b"),
+            (EVENT_TYPE.THINK, "c"),
+            (EVENT_TYPE.TEXT, "d"),
+        ]
+        # 标签对应TEXT时同样可以结束
+        assert parse(["<plain>a</plain><think>b</think>"], {"plain": EVENT_TYPE.TEXT, "think": EVENT_TYPE.THINK}) == [
+            (EVENT_TYPE.TEXT, "a"),
+            (EVENT_TYPE.THINK, "b"),
+        ]
+
+    async def test_async_parser(self):
+        async def generator():
+            for chunk in ["<think>嗯", "</think>你好"]:
+                yield (EVENT_TYPE.TEXT, chunk)
+        results = [result async for result in resonableStreamingParser(generator())]
+        assert results == [eventStreamThink("嗯"), eventStreamText("你好")]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+'''
+@File    :   test_tracing.py
+@Author  :   一力辉
+'''
+
+import pytest
+from digitalHuman.utils.tracing import StreamTraceStore, markUpstream
+from digitalHuman.protocol import eventStreamThink, eventStreamText, eventStreamError, eventStreamDone
+
+
+async def _stream(error: bool = False):
+    markUpstream()
+    yield eventStreamThink("思考")
+    yield eventStreamText("你")
+    yield eventStreamText("好")
+    if error:
+        yield eventStreamError("upstream")
+    yield eventStreamDone()
+
+
+class Test_StreamTraceStore():
+    async def test_trace(self):
+        store = StreamTraceStore(maxTraces=2, maxGaps=2)
+        trace = store.start("req", "agent")
+        chunks = [chunk async for chunk in store.trace(trace, _stream())]
+        assert len(chunks) == 4
+        data = store.get("req").toDict()
+        assert data["status"] == "done"
+        assert data["chunks"] == 4
+        assert data["upstream_connect_ms"] <= data["first_think_ms"] <= data["first_text_ms"] <= data["done_ms"]
+        # 超出上限的间隔只计入统计
+        assert len(data["gaps_ms"]) == 2
+        assert data["gap_max_ms"] >= data["gap_avg_ms"]
+        # 上游打点只在trace期间生效
+        markUpstream()
+
+    async def test_ring_buffer(self):
+        store = StreamTraceStore(maxTraces=2)
+        first = store.start("", "agent")
+        assert first.requestId
+        # 重复的request-id生成新的id
+        assert store.start("req", "agent").requestId == "req"
+        assert store.start("req", "agent").requestId.startswith("req-")
+        assert len(store) == 2
+        assert store.get(first.requestId) is None
+
+    async def test_error(self):
+        store = StreamTraceStore()
+        trace = store.start("error", "agent")
+        async for _ in store.trace(trace, _stream(error=True)): pass
+        assert trace.status == "error"
+
+        async def broken():
+            yield eventStreamText("你")
+            raise RuntimeError("broken")
+        trace = store.start("broken", "agent")
+        with pytest.raises(RuntimeError):
+            async for _ in store.trace(trace, broken()): pass
+        assert trace.toDict()["error"] == "broken"
+
+        trace = store.start("cancel", "agent")
+        stream = store.trace(trace, _stream())
+        await stream.__anext__()
+        await stream.aclose()
+        assert trace.status == "cancelled"